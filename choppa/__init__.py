@@ -1,7 +1,19 @@
 from pathlib import Path
+from typing import Any
 
-from .srx_parser import SrxDocument
-from .iterators import AccurateSrxTextIterator, SrxTextIterator
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .srx_parser import SrxDocument
+    from .iterators import (
+        AccurateSrxTextIterator,
+        AsyncSrxTextIterator,
+        CombinedSrxTextIterator,
+        IncrementalSrxTextIterator,
+        SrxTextIterator,
+    )
+    from .batch import segment_batch
+    from .registry import get_document
 
 __author__ = "Dmytro Chaplynskyi, Jarek Lipski"
 __email__ = "chaplinsky.dmitry@gmail.com"
@@ -15,6 +27,41 @@ __all__ = [
     "SrxDocument",
     "SrxTextIterator",
     "AccurateSrxTextIterator",
+    "CombinedSrxTextIterator",
+    "AsyncSrxTextIterator",
+    "IncrementalSrxTextIterator",
+    "segment_batch",
+    "get_document",
     "DEFAULT_SRX_RULESET",
     "SRX_2_XSD",
 ]
+
+# Exported names are imported from their modules on first access, so that
+# the daemon client (see server.py) starts without importing the regex
+# package.
+EXPORTS = {
+    "SrxDocument": "srx_parser",
+    "SrxTextIterator": "iterators",
+    "AccurateSrxTextIterator": "iterators",
+    "CombinedSrxTextIterator": "iterators",
+    "AsyncSrxTextIterator": "iterators",
+    "IncrementalSrxTextIterator": "iterators",
+    "segment_batch": "batch",
+    "get_document": "registry",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(EXPORTS))
@@ -1,16 +1,295 @@
 import argparse
+import itertools
+import os
 import sys
+import time
 from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
 
-from choppa import DEFAULT_SRX_RULESET, SRX_2_XSD, SrxDocument
-from choppa.iterators import ITERATORS, AbstractTextIterator
+from choppa import DEFAULT_SRX_RULESET, SRX_2_XSD
+from choppa.compressed import (
+    COMPRESSIONS,
+    EXTENSION_OF,
+    detect_compression,
+    get_compression,
+    open_input,
+    open_output,
+)
+from choppa.output import DEFAULT_BUFFER_SIZE, FORMATS, SegmentWriter
 
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from choppa import SrxDocument
+    from choppa.server import Client
+    from choppa.structures import FileResult, WarmUpReport
+
+# Mirrors of choppa.iterators.ITERATORS and the iterator defaults, so that
+# the arguments are parsed (and a running daemon is used) without
+# importing the segmentation modules.
+ITERATOR_NAMES: List[str] = ["AccurateSrxTextIterator", "CombinedSrxTextIterator", "SrxTextIterator"]
+DEFAULT_BUFFER_LENGTH: int = 1024 * 1024
+DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH: int = 100
+
+# Lines sent to the daemon per request in --line-by-line mode.
+DAEMON_BATCH: int = 1024
+# Characters of stdin (or of a --line-by-line batch) sent to the daemon per
+# request; longer input is split in-process as a stream, so that neither
+# the client nor the request holds all of it.
+DAEMON_MAX_LENGTH: int = DEFAULT_BUFFER_LENGTH
+
+
+class PrefixedReader:
+    # Text reader returning the text already read from a reader, then the
+    # rest of the reader.
+
+    def __init__(self, prefix: str, reader: IO[str]):
+        self.prefix: str = prefix
+        self.reader: IO[str] = reader
+
+    def read(self, amount: int = -1) -> str:
+        text: str = self.prefix
+        if amount < 0:
+            self.prefix = ""
+            return text + self.reader.read()
+        text, self.prefix = text[:amount], text[amount:]
+        if len(text) < amount:
+            text += self.reader.read(amount - len(text))
+        return text
+
+
+def print_warm_up_report(reports: List["WarmUpReport"]) -> None:
+    for report in reports:
+        print(
+            f"{report.language_code}: {report.pattern_count} patterns compiled in {report.seconds * 1000:.0f} ms",
+            file=sys.stderr,
+        )
+        for seconds, pattern in report.slowest:
+            shown: str = pattern if len(pattern) <= 60 else pattern[:57] + "..."
+            print(f"  {seconds * 1000:6.1f} ms  {len(pattern):6} chars  {shown}", file=sys.stderr)
+
+
+def write_texts(client: "Client", request: Dict[str, Any], texts: List[str], writer: SegmentWriter) -> None:
+    for sentences in client.request(dict(request, texts=texts)):
+        writer.reset()
+        writer.write_all(sentences)
+
+
+def segment_with_daemon(args: argparse.Namespace, writer: SegmentWriter) -> bool:
+    """
+    Splits the input with the running daemon (see choppa serve).
+    Files are read by the daemon; stdin is sent if it has at most
+    DAEMON_MAX_LENGTH characters (per batch of lines with --line-by-line),
+    and at most --buffer-length, so that it is split as by a stream.
+    @return False if no daemon is running, the options need in-process
+    segmentation, or the input is too long to send; the input is then
+    replaced with the part not yet split
+    """
+    if args.no_daemon or args.jobs > 1 or args.low_latency or args.warm_up or args.validate or args.input_dir:
+        return False
+
+    from choppa.server import Client, ServerError, connect, get_socket_path
+
+    connection = connect(args.socket or get_socket_path())
+    if connection is None:
+        return False
+
+    request: Dict[str, Any] = {
+        "language": args.language,
+        "srx": os.path.realpath(args.srx),
+        "iterator": args.iterator,
+        "buffer_length": args.buffer_length,
+        "max_lookbehind_construct_length": args.max_lookbehind_construct_length,
+    }
+    if args.read_ahead:
+        request["read_ahead"] = True
+
+    try:
+        with Client(connection) as client:
+            if args.line_by_line:
+                chunk: List[str] = []
+                length: int = 0
+                lines: Iterator[str] = iter(args.input)
+                rest: Optional[Iterator[str]] = None
+                for line in lines:
+                    if len(line) > DAEMON_MAX_LENGTH:
+                        # This line and the rest are split in-process.
+                        rest = itertools.chain([line], lines)
+                        break
+                    chunk.append(line.strip())
+                    length += len(line)
+                    if len(chunk) == DAEMON_BATCH or length >= DAEMON_MAX_LENGTH:
+                        write_texts(client, request, chunk, writer)
+                        chunk, length = [], 0
+                if chunk:
+                    write_texts(client, request, chunk, writer)
+                if rest is not None:
+                    args.input = rest
+                    return False
+            else:
+                if args.input_path is not None and os.path.isfile(args.input_path):
+                    # The daemon reads (and decompresses) the file itself.
+                    request["path"] = os.path.realpath(args.input_path)
+                else:
+                    # Text fitting in one buffer is split by a stream as a
+                    # whole, so the output is the same as without the daemon.
+                    max_length: int = min(DAEMON_MAX_LENGTH, args.buffer_length)
+                    text: str = args.input.read(max_length + 1)
+                    if len(text) > max_length:
+                        # Split in-process, starting with the text read.
+                        args.input = PrefixedReader(text, args.input)
+                        return False
+                    request["text"] = text
+                writer.write_all(client.request(request))
+    except ServerError as error:
+        sys.exit(f"choppa: {error}")
+
+    return True
+
+
+def segment_directory(args: argparse.Namespace, document: "SrxDocument", iterator_class: Type[Any]) -> int:
+    """
+    Splits the files matching --glob under --input-dir into files with the
+    same relative paths under --output-dir, with --jobs processes, and
+    reports the failures and the throughput on stderr.
+    @return exit status: 1 if any file failed
+    """
+    from choppa.iterators import SrxTextIterator
+    from choppa.pool import SegmenterPool, segment_file
+    from choppa.structures import FileResult
+
+    input_dir: Path = args.input_dir
+    output_dir: Path = args.output_dir.resolve()
+    paths: List[Path] = [
+        path
+        for path in input_dir.glob(args.glob)
+        if path.is_file() and output_dir not in path.resolve().parents
+    ]
+    # Largest first, so that the small files fill the gaps at the end.
+    sizes: Dict[Path, int] = {path: path.stat().st_size for path in paths}
+    paths.sort(key=lambda path: sizes[path], reverse=True)
+
+    def get_output_path(path: Path) -> str:
+        # Compressed inputs lose their extension, compressed outputs get one.
+        relative: Path = path.relative_to(input_dir)
+        if get_compression(relative) is not None:
+            relative = relative.with_suffix("")
+        if args.compress is not None:
+            relative = relative.with_name(relative.name + EXTENSION_OF[args.compress])
+        return str(output_dir / relative)
+
+    # Inputs with the same output path (a.txt and a.txt.gz) fail instead
+    # of overwriting each other's output.
+    inputs: Dict[str, List[Path]] = {}
+    for path in paths:
+        inputs.setdefault(get_output_path(path), []).append(path)
+    pairs: List[Tuple[str, str]] = []
+    conflicts: List[FileResult] = []
+    for path in paths:
+        output_path: str = get_output_path(path)
+        if len(inputs[output_path]) == 1:
+            pairs.append((str(path), output_path))
+        else:
+            others: str = ", ".join(str(other) for other in inputs[output_path] if other != path)
+            conflicts.append(FileResult(str(path), output_path, sizes[path], 0, 0.0, f"same output file as {others}"))
+
+    kwargs: Dict[str, Any] = {"max_lookbehind_construct_length": args.max_lookbehind_construct_length}
+    if issubclass(iterator_class, SrxTextIterator):
+        kwargs["buffer_length"] = args.buffer_length
+        kwargs["read_ahead"] = args.read_ahead
+
+    report = None if args.report is None else open(args.report, "w", encoding="utf-8")
+    if report is not None:
+        report.write("path\tbytes\tsegments\tseconds\terror\n")
+
+    started: float = time.perf_counter()
+    files: int = 0
+    failed: int = 0
+    segments: int = 0
+    size: int = 0
+
+    def record(results: Iterable["FileResult"]) -> None:
+        nonlocal files, failed, segments, size
+        for result in results:
+            files += 1
+            segments += result.segments
+            size += result.size
+            if result.error is not None:
+                failed += 1
+                print(f"choppa: {result.input_path}: {result.error}", file=sys.stderr)
+            if report is not None:
+                report.write(
+                    f"{result.input_path}\t{result.size}\t{result.segments}\t{result.seconds:.3f}\t{result.error or ''}\n"
+                )
+
+    try:
+        record(conflicts)
+        if args.jobs > 1 and len(pairs) > 1:
+            with SegmenterPool(document, [args.language], args.jobs, iterator_class, **kwargs) as pool:
+                record(pool.imap_files(pairs, output_format=args.format, compression=args.compress))
+        else:
+            record(
+                segment_file(document, args.language, *pair, iterator_class, kwargs, args.format, args.compress)
+                for pair in pairs
+            )
+    finally:
+        if report is not None:
+            report.close()
+
+    seconds: float = time.perf_counter() - started
+    print(
+        f"{files} files, {failed} failed, {segments} segments, {size / 1e6:.1f} MB "
+        f"in {seconds:.1f} s ({size / 1e6 / max(seconds, 1e-9):.1f} MB/s)",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+def serve(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        "choppa serve",
+        description="Keep the rules loaded and compiled, and split text for "
+        "choppa runs on this machine through a Unix domain socket.",
+    )
+    parser.add_argument("--socket", help="socket path (default: $CHOPPA_SOCKET or choppa.sock in $XDG_RUNTIME_DIR)")
+    parser.add_argument(
+        "-s",
+        "--srx",
+        type=Path,
+        default=DEFAULT_SRX_RULESET,
+        help="default SRX 2.0 rules file (default: bundled LanguageTool segment.srx)",
+    )
+    parser.add_argument(
+        "-l",
+        "--language",
+        action="append",
+        help="language key to compile the rules of before accepting requests; repeatable (default: uk_two)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="number of requests split at once (default: %(default)s)"
+    )
+    args = parser.parse_args(argv)
+
+    from choppa.server import get_socket_path, serve as serve_forever
+
+    try:
+        serve_forever(args.socket or get_socket_path(), args.srx, args.language or ["uk_two"], args.workers)
+    except RuntimeError as error:
+        parser.exit(1, f"choppa serve: {error}\n")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["serve"]:
+        serve(argv[1:])
+        return
 
-def main() -> None:
     parser = argparse.ArgumentParser(
         "choppa",
         description="Split text into sentences using SRX rules "
-        "(reads text from a file or stdin, writes one segment per line).",
+        "(reads text from a file or stdin, writes one segment per line). "
+        "Uses the daemon started by `choppa serve` when it is running.",
     )
     parser.add_argument(
         "input",
@@ -38,66 +317,263 @@ def main() -> None:
     parser.add_argument(
         "-i",
         "--iterator",
-        choices=sorted(ITERATORS),
+        choices=ITERATOR_NAMES,
         default="SrxTextIterator",
         help="segmentation algorithm (default: %(default)s)",
     )
     parser.add_argument(
         "--max-lookbehind-construct-length",
         type=int,
-        default=AbstractTextIterator.DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH,
+        default=DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH,
         help="maximum length of a regular expression construct that occurs "
         "in lookbehind (default: %(default)s)",
     )
     parser.add_argument(
         "--buffer-length",
         type=int,
-        default=AbstractTextIterator.DEFAULT_BUFFER_LENGTH,
+        default=DEFAULT_BUFFER_LENGTH,
         help="read buffer size for streaming; must be at least as long as "
         "the longest segment in the text (default: %(default)s)",
     )
+    parser.add_argument(
+        "--read-ahead",
+        action="store_true",
+        help="read the next buffer of input in a background thread while the "
+        "current one is split; helps with slow disks and network file systems",
+    )
     parser.add_argument(
         "--line-by-line",
         action="store_true",
         help="run a separate segmenter on each input line; faster if your "
         "sentences never span multiple lines",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="split the input in N processes; the whole input is read into "
+        "memory, output is identical to a single process (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--low-latency",
+        action="store_true",
+        help="split whatever input has arrived and flush the output instead "
+        "of waiting for a full buffer, e.g. for `tail -f`; output may differ "
+        "if a rule looks further ahead than the margin",
+    )
+    parser.add_argument(
+        "--warm-up",
+        action="store_true",
+        help="compile all rule patterns before reading the input and report "
+        "the compilation time and the slowest patterns on stderr",
+    )
     parser.add_argument(
         "--validate",
         action="store_true",
         help="validate the SRX file against the SRX 2.0 XML schema first",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="lines",
+        help="output format: lines (segment and line break), nul (segment and NUL), "
+        "jsonl (index, start, end and text as JSON), offsets (start<TAB>end), "
+        "tsv (index, start, end and escaped text); offsets are character positions "
+        "in the input, or in the line with --line-by-line (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--output-buffer",
+        type=int,
+        default=DEFAULT_BUFFER_SIZE,
+        help="characters of output collected before writing them; 0 to write "
+        "every segment at once. The output is also flushed whenever "
+        "--low-latency waits for input (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        help="compress the output (zstd needs Python 3.14 or the zstandard package); "
+        "compressed input is detected by file extension or content and decompressed "
+        "in a background thread",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="split in this process even if a daemon is running",
+    )
+    parser.add_argument("--socket", help="daemon socket path (default: as for choppa serve)")
+    parser.add_argument(
+        "--input-dir",
+        type=Path,
+        help="split every file matching --glob in this directory into a file "
+        "with the same relative path in --output-dir, in --jobs processes",
+    )
+    parser.add_argument(
+        "--glob",
+        default="**/*",
+        help="pattern of the files to split, relative to --input-dir (default: %(default)s)",
+    )
+    parser.add_argument("--output-dir", type=Path, help="directory to write the split files to")
+    parser.add_argument(
+        "--report",
+        type=Path,
+        help="with --input-dir, write bytes, segments, seconds and error per file to this TSV file",
+    )
+    args = parser.parse_args(argv)
+
+    if args.input_dir is not None:
+        if args.output_dir is None:
+            parser.error("--input-dir requires --output-dir")
+        if args.input is not sys.stdin or args.line_by_line or args.low_latency:
+            parser.error("--input-dir cannot be combined with an input file, --line-by-line or --low-latency")
+    elif args.output_dir is not None or args.report is not None:
+        parser.error("--output-dir and --report require --input-dir")
+
+    # Checked before the daemon is used, so that it reports the same errors.
+    if args.read_ahead and (
+        args.line_by_line
+        or args.low_latency
+        or (args.jobs > 1 and args.input_dir is None)
+        or args.iterator == "AccurateSrxTextIterator"
+    ):
+        parser.error("--read-ahead requires a streaming iterator, and no --jobs, --line-by-line or --low-latency")
+
+    # In directory mode --compress applies to the output files.
+    compress: bool = args.compress is not None and args.input_dir is None
+    if compress and sys.stdout.isatty():
+        parser.error("refusing to write compressed output to a terminal")
+
+    try:
+        decompress_input(args)
+        output: IO[str] = open_output(sys.stdout.buffer, args.compress) if compress else sys.stdout
+    except ImportError as error:
+        parser.error(str(error))
+
+    writer: SegmentWriter = SegmentWriter(output, args.format, args.output_buffer)
+    try:
+        segment(parser, args, writer)
+    finally:
+        writer.flush()
+        if output is not sys.stdout:
+            # Finishes the compressed data.
+            output.close()
+
+
+def decompress_input(args: argparse.Namespace) -> None:
+    """
+    Replaces the input with a stream decompressing it in a background
+    thread if the input file has the extension of a compression, or the
+    input starts with its magic number; sets args.compression, and
+    args.input_path (None for stdin). The stream is not read before the
+    first read of the input.
+    """
+    args.compression = None
+    args.input_path = None if args.input is sys.stdin else args.input.name
+    if args.input_dir is not None or args.input.isatty():
+        return
+
+    if args.input is not sys.stdin:
+        args.compression = get_compression(args.input.name)
+    if args.compression is None:
+        args.compression = detect_compression(args.input.buffer)
+    if args.compression is not None:
+        # Detached, so that the replaced file object does not close the
+        # stream when it is collected.
+        encoding: str = args.input.encoding
+        stream = args.input.buffer if args.input is sys.stdin else args.input.detach()
+        args.input = open_input(stream, args.compression, encoding)
+
+
+def segment(parser: argparse.ArgumentParser, args: argparse.Namespace, writer: SegmentWriter) -> None:
+    if segment_with_daemon(args, writer):
+        return
+
+    from choppa import SrxDocument, segment_batch
+    from choppa.iterators import ITERATORS, CombinedSrxTextIterator, SrxTextIterator
+    from choppa.text_manager import AvailableTextReader
 
     document = SrxDocument(
         ruleset=args.srx,
         validate_ruleset=SRX_2_XSD if args.validate else None,
+        languages=[args.language],
     )
     iterator_class = ITERATORS[args.iterator]
 
+    # In directory mode --jobs is the number of files split at once.
+    if args.input_dir is None:
+        if args.jobs > 1 and (args.line_by_line or not issubclass(iterator_class, SrxTextIterator)):
+            parser.error("--jobs requires SrxTextIterator or CombinedSrxTextIterator and no --line-by-line")
+
+        if args.low_latency and (
+            args.jobs > 1 or not (args.line_by_line or issubclass(iterator_class, SrxTextIterator))
+        ):
+            parser.error("--low-latency requires a streaming iterator or --line-by-line, and no --jobs")
+
+    if args.warm_up:
+        print_warm_up_report(
+            document.warm_up(
+                [args.language],
+                args.max_lookbehind_construct_length,
+                scanner=iterator_class is CombinedSrxTextIterator,
+            )
+        )
+
+    if args.input_dir is not None:
+        sys.exit(segment_directory(args, document, iterator_class))
+
     if sys.stdin.isatty() and args.input is sys.stdin:
         print("reading from stdin...", file=sys.stderr)
 
     if args.line_by_line:
-        for line in args.input:
-            iterator = iterator_class(
+        # One iterator is reset for every line instead of creating a new one.
+        for sentences in segment_batch(
+            document,
+            args.language,
+            (line.strip() for line in args.input),
+            iterator_class,
+            max_lookbehind_construct_length=args.max_lookbehind_construct_length,
+        ):
+            writer.reset()
+            writer.write_all(sentences)
+            if args.low_latency:
+                writer.flush()
+    elif args.jobs > 1:
+        # Imported here, so that other modes do not import multiprocessing.
+        from choppa.parallel import segment_parallel
+
+        writer.write_all(
+            segment_parallel(
                 document,
                 args.language,
-                line.strip(),
+                args.input.read(),
+                args.jobs,
+                iterator_class,
                 max_lookbehind_construct_length=args.max_lookbehind_construct_length,
             )
-            for sentence in iterator:
-                print(sentence)
+        )
     else:
-        # SrxTextIterator consumes the input as a stream with a fixed-size
-        # buffer; the accurate iterator only works on full strings.
-        if iterator_class is ITERATORS["SrxTextIterator"]:
+        # SrxTextIterator (and its combined-scanner variant) consumes the
+        # input as a stream with a fixed-size buffer; the accurate iterator
+        # only works on full strings.
+        if args.low_latency:
+            # The output is flushed whenever more input is awaited.
+            iterator = iterator_class(
+                document,
+                args.language,
+                AvailableTextReader(args.input.buffer, args.input.encoding, writer.flush),
+                buffer_length=args.buffer_length,
+                max_lookbehind_construct_length=args.max_lookbehind_construct_length,
+                low_latency=True,
+            )
+        elif issubclass(iterator_class, SrxTextIterator):
             iterator = iterator_class(
                 document,
                 args.language,
                 args.input,
                 buffer_length=args.buffer_length,
                 max_lookbehind_construct_length=args.max_lookbehind_construct_length,
+                read_ahead=args.read_ahead,
             )
         else:
             iterator = iterator_class(
@@ -106,8 +582,7 @@ def main() -> None:
                 args.input.read(),
                 max_lookbehind_construct_length=args.max_lookbehind_construct_length,
             )
-        for sentence in iterator:
-            print(sentence)
+        writer.write_all(iterator)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+import collections
+import itertools
+import threading
+from typing import Any, Deque, Iterable, Iterator, List, Optional, Type
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+from .iterators import AbstractTextIterator, CombinedSrxTextIterator, SrxTextIterator
+from .srx_parser import SrxDocument
+
+
+# Number of texts handed to a worker thread at once.
+CHUNK_SIZE: int = 64
+
+
+def segment_batch(
+    document: SrxDocument,
+    language_code: str,
+    texts: Iterable[str],
+    iterator_class: Type[AbstractTextIterator] = SrxTextIterator,
+    workers: int = 1,
+    **kwargs: Any,
+) -> Iterator[List[str]]:
+    """
+    Splits each of given texts into segments. One iterator is created and
+    reset for every text, so language rules are resolved and rule matchers
+    are created only once - much cheaper than an iterator per text when
+    texts are short.
+    With workers > 1 texts are split by a pool of threads sharing the
+    document, each with its own iterator matching with the GIL released
+    (concurrent=True).
+    @param document document containing language rules
+    @param language_code language code to select the rules
+    @param texts texts to split
+    @param iterator_class SrxTextIterator or any other iterator with reset()
+    @param workers number of threads
+    @param kwargs other iterator constructor arguments
+    @return iterator over segment lists, one per text, in input order
+    """
+
+    if workers < 2:
+        yield from Segmenter(document, language_code, iterator_class, kwargs).segment_all(texts)
+        return
+
+    # Imported here, so that importing choppa does not import the thread
+    # pool machinery.
+    from concurrent.futures import ThreadPoolExecutor
+
+    kwargs["concurrent"] = True
+    local = threading.local()
+
+    # Resolves the rules, creates the rule manager and compiles its
+    # patterns (and the scanner patterns) once, before the threads share
+    # them.
+    document.warm_up(
+        [language_code],
+        kwargs.get("max_lookbehind_construct_length", AbstractTextIterator.DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH),
+        scanner=issubclass(iterator_class, CombinedSrxTextIterator),
+    )
+
+    def segment_chunk(chunk: List[str]) -> List[List[str]]:
+        if not hasattr(local, "segmenter"):
+            local.segmenter = Segmenter(document, language_code, iterator_class, kwargs)
+        return list(local.segmenter.segment_all(chunk))
+
+    text_iterator: Iterator[str] = iter(texts)
+    with ThreadPoolExecutor(workers) as executor:
+        # Keep a bounded number of chunks in flight, so texts are consumed
+        # lazily and results come back in input order.
+        pending: Deque["Future"] = collections.deque()
+        while True:
+            chunk: List[str] = list(itertools.islice(text_iterator, CHUNK_SIZE))
+            if chunk:
+                pending.append(executor.submit(segment_chunk, chunk))
+            if pending and (not chunk or len(pending) > 2 * workers):
+                yield from pending.popleft().result()
+            elif not chunk:
+                break
+
+
+class Segmenter:
+    # Splits texts one after another with a single reused iterator.
+
+    def __init__(
+        self,
+        document: SrxDocument,
+        language_code: str,
+        iterator_class: Type[AbstractTextIterator],
+        kwargs: Any,
+    ) -> None:
+        self.document: SrxDocument = document
+        self.language_code: str = language_code
+        self.iterator_class: Type[AbstractTextIterator] = iterator_class
+        self.kwargs: Any = kwargs
+        self.iterator: Optional[Any] = None
+
+    def segment_all(self, texts: Iterable[str]) -> Iterator[List[str]]:
+        for text in texts:
+            if self.iterator is None:
+                self.iterator = self.iterator_class(self.document, self.language_code, text, **self.kwargs)
+            else:
+                self.iterator.reset(text)
+
+            yield list(self.iterator)
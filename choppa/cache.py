@@ -0,0 +1,102 @@
+import collections
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from .structures import CacheStats
+
+
+class LruCache:
+    """
+    Thread-safe mapping with an optional size limit: when it is full, the
+    least recently used entry is evicted. Counts hits, misses and evictions
+    (hits are not counted under the lock, so concurrent threads may lose a
+    few).
+    """
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        """
+        @param max_size maximum number of entries, None for no limit
+        """
+        assert max_size is None or max_size > 0, "Cache size must be positive."
+
+        self.max_size: Optional[int] = max_size
+        self.entries: "collections.OrderedDict[Hashable, Any]" = collections.OrderedDict()
+        self.lock: threading.Lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        @param key key
+        @return cached value, None if key is not cached
+        """
+        # Hits, by far the most common case, take the lock only to update
+        # the recency order of a bounded cache.
+        value: Any = self.entries.get(key)
+        if value is None:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        self.hits += 1
+        if self.max_size is not None:
+            with self.lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        """
+        Caches value created after get returned None. Values are created
+        outside the lock, so a slow creation (compiling a pattern) does
+        not block other threads; if two threads create a value for the
+        same key, the first one stored wins.
+        @param key key
+        @param value value to cache
+        @return cached value
+        """
+        with self.lock:
+            stored: Any = self.entries.get(key)
+            if stored is not None:
+                return stored
+            self.entries[key] = value
+            if self.max_size is not None and len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            return value
+
+    def remove(self, predicate: Callable[[Hashable, Any], bool]) -> List[Any]:
+        """
+        Removes the entries given predicate accepts.
+        @param predicate called with key and value
+        @return removed values
+        """
+        with self.lock:
+            keys: List[Hashable] = [key for key, value in self.entries.items() if predicate(key, value)]
+            return [self.entries.pop(key) for key in keys]
+
+    def values(self) -> List[Any]:
+        with self.lock:
+            return list(self.entries.values())
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self.entries), self.max_size)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks cannot be pickled, e.g. when a document is sent to a worker
+        # process.
+        state: Dict[str, Any] = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
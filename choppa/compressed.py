@@ -0,0 +1,227 @@
+import io
+import os
+from typing import IO, Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+from .text_manager import ReadAheadReader
+
+# Compressed text streams: gzip, bzip2, xz and Zstandard, recognized by
+# file extension or by the magic number at the start of the data.
+# Zstandard needs Python 3.14 (compression.zstd) or the zstandard package.
+# The compression modules are imported when used, so that the command line
+# imports this module without them.
+COMPRESSIONS: List[str] = ["gzip", "bz2", "xz", "zstd"]
+
+EXTENSIONS: Dict[str, str] = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+EXTENSION_OF: Dict[str, str] = {compression: extension for extension, compression in EXTENSIONS.items()}
+
+# None of them starts valid UTF-8 text, except "BZh", so the magic number
+# of the first bzip2 block (or of the end of an empty stream) after the
+# block size is required too.
+MAGIC_NUMBERS: List[Tuple[bytes, str]] = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+BZ2_MAGIC_NUMBER: bytes = b"BZh"
+BZ2_BLOCK_MAGIC_NUMBERS: Tuple[bytes, bytes] = (b"1AY&SY", b"\x17rE8P\x90")
+
+# Decompressed bytes read ahead by ThreadedReader: chunks of this size,
+# at most READ_AHEAD_CHUNKS of them waiting.
+READ_AHEAD_CHUNK_SIZE: int = 1024 * 1024
+READ_AHEAD_CHUNKS: int = 2
+
+
+def get_compression(path: Union[str, os.PathLike]) -> Optional[str]:
+    """
+    @param path file path
+    @return compression indicated by the extension of path, None if it has
+    none of EXTENSIONS
+    """
+    name: str = str(path).lower()
+    for extension, compression in EXTENSIONS.items():
+        if name.endswith(extension):
+            return compression
+    return None
+
+
+def detect_compression(stream: BinaryIO) -> Optional[str]:
+    """
+    Looks at the start of a stream without consuming it.
+    @param stream binary stream with peek(), e.g. sys.stdin.buffer or a
+        file opened in "rb" mode
+    @return compression of the data, None if it is not compressed
+    """
+    # Waits for the first read only: a pipe may return fewer bytes, but
+    # the first few bytes of a stream arrive together.
+    head: bytes = stream.peek(len(BZ2_MAGIC_NUMBER) + 1 + len(BZ2_BLOCK_MAGIC_NUMBERS[0]))  # type: ignore
+    for magic_number, compression in MAGIC_NUMBERS:
+        if head.startswith(magic_number):
+            return compression
+    if (
+        head.startswith(BZ2_MAGIC_NUMBER)
+        and head[3:4] in b"123456789"
+        and head[4:].startswith(BZ2_BLOCK_MAGIC_NUMBERS)
+    ):
+        return "bz2"
+    return None
+
+
+def open_zstd(stream: BinaryIO, mode: str) -> BinaryIO:
+    try:
+        from compression import zstd  # type: ignore
+
+        return zstd.ZstdFile(stream, mode)
+    except ImportError:
+        pass
+
+    try:
+        import zstandard  # type: ignore
+    except ImportError:
+        raise ImportError("Zstandard needs Python 3.14 or the zstandard package (pip install zstandard)") from None
+
+    if mode == "rb":
+        return zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True)
+    return zstandard.ZstdCompressor().stream_writer(stream, closefd=False)
+
+
+def decompressing(stream: BinaryIO, compression: str) -> BinaryIO:
+    """
+    @param stream compressed binary stream, closed with the returned one
+    @param compression one of COMPRESSIONS
+    @return binary stream of the decompressed data
+    """
+    if compression == "gzip":
+        import gzip
+
+        return gzip.GzipFile(fileobj=stream, mode="rb")  # type: ignore
+    if compression == "bz2":
+        import bz2
+
+        return bz2.BZ2File(stream, "rb")  # type: ignore
+    if compression == "xz":
+        import lzma
+
+        return lzma.LZMAFile(stream, "rb")  # type: ignore
+    if compression == "zstd":
+        return open_zstd(stream, "rb")
+    raise ValueError(f"Unknown compression {compression!r}")
+
+
+def compressing(stream: BinaryIO, compression: str) -> BinaryIO:
+    """
+    @param stream binary stream to write the compressed data to; closing
+        the returned stream finishes the compressed data, but leaves stream
+        open
+    @param compression one of COMPRESSIONS
+    @return binary stream compressing the data written to it
+    """
+    if compression == "gzip":
+        import gzip
+
+        # Level 6 like the gzip tool, and no file name or time in the
+        # header, so that equal output compresses to equal bytes.
+        return gzip.GzipFile(filename="", mode="wb", compresslevel=6, fileobj=stream, mtime=0)  # type: ignore
+    if compression == "bz2":
+        import bz2
+
+        return bz2.BZ2File(stream, "wb")  # type: ignore
+    if compression == "xz":
+        import lzma
+
+        return lzma.LZMAFile(stream, "wb")  # type: ignore
+    if compression == "zstd":
+        return open_zstd(stream, "wb")
+    raise ValueError(f"Unknown compression {compression!r}")
+
+
+class ThreadedReader(io.RawIOBase):
+    """
+    Reads a binary stream in a background thread (see
+    text_manager.ReadAheadReader), so that reading and decompressing the
+    next chunks overlaps with processing the previous ones; zlib, bzip2,
+    lzma and zstd release the GIL while decompressing. At most `chunks`
+    chunks are read ahead, from the first read on.
+    """
+
+    def __init__(self, stream: BinaryIO, chunk_size: int = READ_AHEAD_CHUNK_SIZE, chunks: int = READ_AHEAD_CHUNKS):
+        """
+        @param stream binary stream, closed with this reader
+        @param chunk_size number of bytes read at once
+        @param chunks number of chunks read ahead
+        """
+        super().__init__()
+        self.stream: BinaryIO = stream
+        self.chunk_size: int = chunk_size
+        self.chunks: int = chunks
+        # Started by the first read, so that a stream that is never read
+        # is not decompressed.
+        self.reader: Optional[ReadAheadReader] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        if self.reader is None:
+            # read1 returns what one read of the compressed data yields, so
+            # that available data is passed on without waiting for a full
+            # chunk.
+            self.reader = ReadAheadReader(
+                getattr(self.stream, "read1", self.stream.read), self.chunk_size, self.chunks, self.stream.close
+            )
+        data: bytes = self.reader.read_chunk(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            if self.reader is None:
+                self.stream.close()
+            else:
+                self.reader.close()
+        super().close()
+
+
+def open_input(
+    stream: BinaryIO, compression: str, encoding: str = "utf-8", threaded: bool = True
+) -> IO[str]:
+    """
+    @param stream binary stream, closed with the returned one
+    @param compression one of COMPRESSIONS, see get_compression and
+        detect_compression
+    @param encoding text encoding
+    @param threaded decompress in a background thread (see ThreadedReader)
+    @return text stream of the decompressed data, with newlines translated
+    like in text mode
+    """
+    binary: Any = decompressing(stream, compression)
+    if threaded:
+        binary = io.BufferedReader(ThreadedReader(binary))
+    return io.TextIOWrapper(binary, encoding=encoding)
+
+
+def open_output(stream: BinaryIO, compression: str, encoding: str = "utf-8") -> IO[str]:
+    """
+    @param stream binary stream, left open when the returned one is closed
+    @param compression one of COMPRESSIONS
+    @return text stream writing compressed data to stream; close it to
+    finish the compressed data
+    """
+    return io.TextIOWrapper(compressing(stream, compression), encoding=encoding)
+
+
+def open_file(path: Union[str, os.PathLike], encoding: str = "utf-8", threaded: bool = True) -> IO[str]:
+    """
+    Opens a text file for reading, decompressing it if its extension or
+    its first bytes show it is compressed.
+    @param path file path
+    @return text stream
+    """
+    stream: Any = open(path, "rb")
+    try:
+        compression: Optional[str] = get_compression(path) or detect_compression(stream)
+    except BaseException:
+        stream.close()
+        raise
+    if compression is None:
+        return io.TextIOWrapper(stream, encoding=encoding)
+    return open_input(stream, compression, encoding, threaded)
@@ -1,11 +1,13 @@
+import codecs
 import io
 import regex as re  # type: ignore
-from typing import List, Union, Optional
+from typing import Any, Iterator, List, Optional, Tuple, Type, Union
 
-from .structures import LanguageRule, Rule
+from .structures import LanguageRule, Rule, ShiftStats
 from .srx_parser import SrxDocument
-from .rule_matcher import RuleMatcher
-from .text_manager import TextManager
+from .rule_matcher import RuleMatcher, RuleMatcherQueue
+from .rule_scanner import RuleScanner
+from .text_manager import ReadAheadReader, TextManager, TextNotAvailable, TextQueue
 from .rule_manager import RuleManager
 from .utils import create_lookbehind_pattern
 
@@ -46,6 +48,7 @@ class AccurateSrxTextIterator(AbstractTextIterator):
         language_code: str,
         text: str,
         max_lookbehind_construct_length: int = AbstractTextIterator.DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH,
+        concurrent: bool = False,
     ) -> None:
         """
         Legacy alert: this is the implementation of the legacy accurate iterator
@@ -59,6 +62,8 @@ class AccurateSrxTextIterator(AbstractTextIterator):
         document document containing language rules
         language_code language code to select the rules
         text
+        concurrent release the GIL while matching, for splitting texts in
+        parallel threads
         """
 
         self.language_rule_list: List[LanguageRule] = document.get_language_rule_list(language_code)
@@ -77,7 +82,7 @@ class AccurateSrxTextIterator(AbstractTextIterator):
                         after_pattern=rule.after_pattern,
                     )
 
-                matcher: RuleMatcher = RuleMatcher(document=document, rule=rule, text=text)
+                matcher: RuleMatcher = RuleMatcher(document=document, rule=rule, text=text, concurrent=concurrent)
                 self.rule_matcher_list.append(matcher)
 
     def __next__(self) -> str:
@@ -94,7 +99,7 @@ class AccurateSrxTextIterator(AbstractTextIterator):
 
             found: bool = False
 
-            while len(self.rule_matcher_list) and not found:
+            while len(self.rule_matcher_queue) and not found:
                 min_matcher: RuleMatcher = self.get_min_matcher()
                 self.end_position = min_matcher.get_break_position()
                 if min_matcher.rule.is_break and self.end_position > self.start_position:
@@ -113,6 +118,21 @@ class AccurateSrxTextIterator(AbstractTextIterator):
         else:
             raise StopIteration
 
+    def reset(self, text: str) -> None:
+        """
+        Resets iterator to split given text with the same rules. Rule matchers
+        are reused, so this is cheaper than creating a new iterator.
+        @param text text
+        """
+
+        self.text = text
+        self.segment = None
+        self.start_position = 0
+        self.end_position = 0
+
+        for matcher in self.rule_matcher_list:
+            matcher.reset(text)
+
     def has_next(self) -> bool:
         """
         Returns true when more segments are available
@@ -120,49 +140,29 @@ class AccurateSrxTextIterator(AbstractTextIterator):
         return self.start_position < len(self.text)
 
     def init_matchers(self) -> None:
-        for matcher in self.rule_matcher_list[:]:
+        self.rule_matcher_queue: RuleMatcherQueue = RuleMatcherQueue()
+        for index, matcher in enumerate(self.rule_matcher_list):
             matcher.find()
-            if matcher.hit_end():
-                # TODO: More optimal removal of rules
-                self.rule_matcher_list.remove(matcher)
+            self.rule_matcher_queue.push(index, matcher)
 
     def move_matchers(self) -> None:
         """
         Moves iterators to the next position if necessary.
 
         """
-        for matcher in self.rule_matcher_list[:]:
-            while matcher.get_break_position() <= self.end_position:
-                matcher.find()
-                if matcher.hit_end():
-                    # TODO: More optimal removal of rules
-                    self.rule_matcher_list.remove(matcher)
-                    break
+        self.rule_matcher_queue.move(self.end_position)
 
     def cut_matchers(self) -> None:
         """
         Move matchers that start before previous segment end.
         """
-
-        for matcher in self.rule_matcher_list[:]:
-            if matcher.get_start_position() < self.end_position:
-                matcher.find(self.end_position)
-                if matcher.hit_end():
-                    # TODO: More optimal removal of rules
-                    self.rule_matcher_list.remove(matcher)
+        self.rule_matcher_queue.cut(self.end_position)
 
     def get_min_matcher(self) -> Optional[RuleMatcher]:
         """
         Returns an iterator of the first match hit
         """
-
-        min_position: int = MAX_INT_VALUE
-        min_matcher: Optional[RuleMatcher] = None
-        for matcher in self.rule_matcher_list:
-            if matcher.get_break_position() < min_position:
-                min_position = matcher.get_break_position()
-                min_matcher = matcher
-        return min_matcher
+        return self.rule_matcher_queue.get_min_matcher()
 
 
 class SrxTextIterator(AbstractTextIterator):
@@ -192,7 +192,7 @@ class SrxTextIterator(AbstractTextIterator):
     When the end of it is reached or break position is in the margin
     (break position &gt; buffer size - margin) and there is more text,
     the buffer is moved in the text until it starts after last found segment.
-    If this happens rule matchers are reinitialized and the text is searched again.
+    If this happens rule matchers are reset and the text is searched again.
     Streaming version has a limitation that read buffer must be at least as long
     as any segment in the text.
 
@@ -218,6 +218,9 @@ class SrxTextIterator(AbstractTextIterator):
         buffer_length: int = AbstractTextIterator.DEFAULT_BUFFER_LENGTH,
         max_lookbehind_construct_length: int = AbstractTextIterator.DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH,
         margin: int = DEFAULT_MARGIN,
+        concurrent: bool = False,
+        low_latency: bool = False,
+        read_ahead: bool = False,
     ) -> None:
         """
         Creates text iterator that obtains language rules from given document
@@ -229,80 +232,117 @@ class SrxTextIterator(AbstractTextIterator):
         and more text is read and rule is matched again.
         This is needed because incomplete rule can be located at the end of the
         buffer and never matched.
+        If concurrent is true, the GIL is released while matching (regex
+        concurrent=True), so texts can be split in parallel threads.
+        If low_latency is true, the reader may return whatever text is
+        available (see text_manager.AvailableTextReader) and segments are
+        returned as soon as they are outside the margin of the text read so
+        far, without waiting for a full buffer. Output can then differ from
+        the default mode when a rule looks further ahead than the margin.
+        If read_ahead is true, the next buffer of text is read from the
+        reader in a background thread while the current one is split (see
+        text_manager.ReadAheadReader); output is the same. Not possible
+        with low_latency.
         """
 
+        assert not (low_latency and read_ahead), "Read-ahead cannot be combined with low latency."
+
         self.buffer_length: int = buffer_length
         self.max_lookbehind_construct_length: int = max_lookbehind_construct_length
-        self.margin: int = margin
+        self.reader_margin: int = margin
+        self.concurrent: bool = concurrent
+        self.low_latency: bool = low_latency
+        self.read_ahead: bool = read_ahead
+
+        self.document: SrxDocument = document
+        self.language_rule_list: List[LanguageRule] = document.get_language_rule_list(language_code)
+        self.rule_manager: RuleManager = self.document.get_rule_manager(
+            self.language_rule_list, self.max_lookbehind_construct_length
+        )
+        self.rule_matcher_list: Optional[List[RuleMatcher]] = None
+        # See RuleMatcher; set before the first segment (parallel.py does).
+        self.search_window: Optional[int] = None
+
+        self.reset(text)
+
+    def reset(self, text: Union[str, io.TextIOBase]) -> None:
+        """
+        Resets iterator to split given text (or text read from given reader)
+        with the same rules. Rule manager and rule matchers are reused, so
+        this is cheaper than creating a new iterator.
+        @param text text or reader
+        """
 
         if isinstance(text, str):
             self.text_manager: TextManager = TextManager(text=text)
-            self.margin = 0
+            self.margin: int = 0
         else:
-            self.text_manager = TextManager(reader=text, buffer_length=self.buffer_length)
+            reader: Any = text
+            if self.read_ahead:
+                # Double buffering: one buffer is read while another is split.
+                reader = ReadAheadReader(text.read, self.buffer_length)
+            self.text_manager = TextManager(
+                reader=reader, buffer_length=self.buffer_length, partial_reads=self.low_latency
+            )
+            self.margin = self.reader_margin
 
-        self.document: SrxDocument = document
-        self.language_rule_list: List[LanguageRule] = document.get_language_rule_list(language_code)
         self.segment: Optional[str] = None
         self.start_position: int = 0
         self.end_position: int = 0
-        self.rule_manager: RuleManager = self.document.get_rule_manager(
-            self.language_rule_list, self.max_lookbehind_construct_length
-        )
+        self.rule_matcher_queue: Optional[RuleMatcherQueue] = None
+
+    def init_matchers(self, position: int = 0) -> None:
+        # Initializes matcher queue according to rules from rule_manager and
+        # text from text_manager, searching from given position. After a
+        # buffer shift the matchers are reset to the new text instead of
+        # being created again.
+
+        text: str = self.text_manager.get_text()
+        if self.rule_matcher_list is None:
+            self.rule_matcher_list = [
+                RuleMatcher(self.document, rule, text, self.concurrent, self.search_window)
+                for rule in self.rule_manager.break_rule_list
+            ]
+        else:
+            for matcher in self.rule_matcher_list:
+                matcher.reset(text)
 
-    def init_matchers(self) -> None:
-        # Initializes matcher list according to rules from rule_manager and
-        # text from text_manager.
+        self.rule_matcher_queue = RuleMatcherQueue()
+        for index, matcher in enumerate(self.rule_matcher_list):
+            matcher.find(position)
+            self.rule_matcher_queue.push(index, matcher)
 
-        self.rule_matcher_list: List[RuleMatcher] = []
-        for rule in self.rule_manager.break_rule_list:
-            matcher: RuleMatcher = RuleMatcher(
-                document=self.document,
-                rule=rule,
-                text=self.text_manager.get_text(),
-            )
-            matcher.find()
-            if not matcher.hit_end():
-                self.rule_matcher_list.append(matcher)
+    def seek(self, position: int) -> None:
+        """
+        Continues splitting from given position as if a segment ended there.
+        Rules are searched from the position on; text before it is still
+        visible to lookbehind. Only possible when splitting a string.
+        @param position position in text
+        """
+
+        assert not self.text_manager.has_more_text(), "Cannot seek in a stream."
+
+        self.start_position = position
+        self.end_position = position
+        self.init_matchers(position)
 
-    # TODO: here and below DRY
     def move_matchers(self) -> None:
         """
         Moves iterators to the next position if necessary.
         """
-        for matcher in self.rule_matcher_list[:]:
-            while matcher.get_break_position() <= self.end_position:
-                matcher.find()
-                if matcher.hit_end():
-                    # TODO: More optimal removal of rules
-                    self.rule_matcher_list.remove(matcher)
-                    break
+        self.rule_matcher_queue.move(self.end_position)
 
     def cut_matchers(self) -> None:
         """
         Move matchers that start before previous segment end.
         """
-
-        for matcher in self.rule_matcher_list[:]:
-            if matcher.get_start_position() < self.end_position:
-                matcher.find(self.end_position)
-                if matcher.hit_end():
-                    # TODO: More optimal removal of rules
-                    self.rule_matcher_list.remove(matcher)
+        self.rule_matcher_queue.cut(self.end_position)
 
     def get_min_matcher(self) -> Optional[RuleMatcher]:
         """
         Returns an iterator of the first match hit
         """
-
-        min_position: int = MAX_INT_VALUE
-        min_matcher: Optional[RuleMatcher] = None
-        for matcher in self.rule_matcher_list:
-            if matcher.get_break_position() < min_position:
-                min_position = matcher.get_break_position()
-                min_matcher = matcher
-
-        return min_matcher
+        return self.rule_matcher_queue.get_min_matcher()
 
     def is_exception(self, rule_matcher: RuleMatcher) -> bool:
         """
@@ -321,7 +361,7 @@ class SrxTextIterator(AbstractTextIterator):
             # the match is anchored at pos and lookbehind constructs can
             # see the text before pos (transparent left bound).
             return (
-                pattern.match(self.text_manager.get_text(), rule_matcher.get_break_position())
+                pattern.match(self.text_manager.get_text(), rule_matcher.get_break_position(), None, self.concurrent)
                 is None
             )
         else:
@@ -335,61 +375,295 @@ class SrxTextIterator(AbstractTextIterator):
 
         # TODO: replace with an iterator/generator
         if self.has_next():
-            # Initialize matchers before first search.
-            if self.segment is None:
-                self.init_matchers()
+            self.find_next()
 
-            found: bool = False
+            self.segment = self.text_manager.get_text()[self.start_position : self.end_position]
+            self.start_position = self.end_position
 
-            while not found:
-                min_matcher: Optional[RuleMatcher] = self.get_min_matcher()
+            return self.segment
+        else:
+            raise StopIteration
 
-                if min_matcher is None and not self.text_manager.has_more_text():
-                    found = True
-                    self.end_position = len(self.text_manager.get_text())
-                else:
-                    if self.text_manager.has_more_text() and (
-                        min_matcher is None
-                        or min_matcher.get_break_position() > self.text_manager.buffer_length - self.margin
-                    ):
-                        if self.start_position == 0:
-                            # TODO: proper exceptions
-                            raise Exception(
-                                "Buffer too short"
-                                + " - it must be at least as long as the"
-                                + " longest segment in the text; "
-                                + "try using the bufferLength option"
-                            )
+    def get_shift_stats(self) -> ShiftStats:
+        """
+        @return buffer shifts done so far splitting the current text (none
+        when splitting a string), and the characters they carried over
+        """
+        return ShiftStats(self.text_manager.shift_count, self.text_manager.copied_length)
 
-                        self.text_manager.read_text(self.start_position)
-                        # Positions are relative to the shifted buffer now.
-                        self.start_position = 0
-                        self.init_matchers()
-                        min_matcher = self.get_min_matcher()
+    def spans(self) -> Iterator[Tuple[int, int]]:
+        """
+        Returns an iterator over the (start, end) offsets of the remaining
+        segments, counted from the beginning of the whole text, also in
+        streaming mode. No segment strings are created.
+        """
 
-                    self.end_position = min_matcher.get_break_position()
+        while self.has_next():
+            self.find_next()
 
-                    if self.end_position > self.start_position:
-                        found = self.is_exception(min_matcher)
+            offset: int = self.text_manager.offset
+            yield offset + self.start_position, offset + self.end_position
+            self.start_position = self.end_position
 
-                        if found:
-                            self.cut_matchers()
+    def find_next(self) -> None:
+        """
+        Finds the end of the next segment, shifting the buffer if needed.
+        The segment is then text[start_position:end_position] of the current
+        text manager text.
+        """
 
-                self.move_matchers()
+        # Initialize matchers before first search.
+        if self.rule_matcher_queue is None:
+            self.init_matchers()
+
+        found: bool = False
+
+        while not found:
+            min_matcher: Optional[RuleMatcher] = self.get_min_matcher()
+
+            if min_matcher is None and not self.text_manager.has_more_text():
+                found = True
+                self.end_position = len(self.text_manager.get_text())
+            else:
+                # Text length is equal to buffer size when there is more
+                # text, except with partial reads.
+                if self.text_manager.has_more_text() and (
+                    min_matcher is None
+                    or min_matcher.get_break_position() > len(self.text_manager.get_text()) - self.margin
+                ):
+                    if self.start_position == 0 and len(self.text_manager.get_text()) == self.text_manager.buffer_length:
+                        # TODO: proper exceptions
+                        raise Exception(
+                            "Buffer too short"
+                            + " - it must be at least as long as the"
+                            + " longest segment in the text; "
+                            + "try using the bufferLength option"
+                        )
+
+                    self.text_manager.read_text(self.start_position)
+                    # Positions are relative to the shifted buffer now.
+                    self.start_position = 0
+                    self.init_matchers()
+                    min_matcher = self.get_min_matcher()
+
+                    # Look again if no rule matches the new text, or if the
+                    # text is still shorter than the buffer.
+                    if min_matcher is None or (
+                        self.text_manager.has_more_text()
+                        and len(self.text_manager.get_text()) < self.text_manager.buffer_length
+                    ):
+                        continue
 
-            self.segment = self.text_manager.get_text()[self.start_position : self.end_position]
-            self.start_position = self.end_position
+                self.end_position = min_matcher.get_break_position()
 
-            return self.segment
-        else:
-            raise StopIteration
+                if self.end_position > self.start_position:
+                    found = self.is_exception(min_matcher)
+
+                    if found:
+                        self.cut_matchers()
+
+            self.move_matchers()
 
     def has_next(self) -> bool:
         return self.text_manager.has_more_text() or self.start_position < len(self.text_manager.get_text())
 
 
+class CombinedSrxTextIterator(SrxTextIterator):
+    """
+    SrxTextIterator variant that matches break rules with a RuleScanner:
+    all break rules that can be matched together are compiled into a single
+    pattern, so the leftmost break is found by one search instead of
+    walking one RuleMatcher per rule. Rules the scanner cannot handle
+    exactly (see rule_scanner.is_scannable) keep their own RuleMatcher.
+
+    Produces the same segments as SrxTextIterator; ties between the scanner
+    and the remaining matchers are resolved by SRX rule order.
+    """
+
+    def init_matchers(self, position: int = 0) -> None:
+        text: str = self.text_manager.get_text()
+        self.rule_scanner: RuleScanner = RuleScanner(self.rule_manager, text, self.concurrent)
+        self.rule_scanner.cut(position)
+
+        if self.rule_matcher_list is None:
+            self.rule_matcher_list = [
+                RuleMatcher(self.document, rule, text, self.concurrent, self.search_window)
+                for _, rule in self.rule_manager.matcher_rule_list
+            ]
+        else:
+            for matcher in self.rule_matcher_list:
+                matcher.reset(text)
+
+        self.rule_matcher_queue = RuleMatcherQueue()
+        for (index, _), matcher in zip(self.rule_manager.matcher_rule_list, self.rule_matcher_list):
+            matcher.find(position)
+            self.rule_matcher_queue.push(index, matcher)
+
+    def move_matchers(self) -> None:
+        super().move_matchers()
+        self.rule_scanner.move(self.end_position)
+
+    def cut_matchers(self) -> None:
+        super().cut_matchers()
+        self.rule_scanner.cut(self.end_position)
+
+    def get_min_matcher(self) -> Optional[Union[RuleMatcher, RuleScanner]]:
+        entry = self.rule_matcher_queue.peek()
+
+        if not self.rule_scanner.find():
+            return None if entry is None else self.rule_matcher_queue.matchers[entry[1]]
+
+        if entry is not None and entry[:2] < self.rule_scanner.get_key():
+            return self.rule_matcher_queue.matchers[entry[1]]
+
+        return self.rule_scanner
+
+
+class AsyncSrxTextIterator:
+    """
+    Asynchronous streaming text iterator: splits text read from an async
+    reader (asyncio.StreamReader or any object with an awaitable read(n)
+    returning str or bytes) with `async for sentence in iterator`.
+
+    The reader is awaited only when the search for the next segment needs
+    more text than has been read, so a segment is returned as soon as the
+    text it depends on has arrived and the segmentation itself never blocks
+    the event loop on I/O. Buffer, margin and "Buffer too short" semantics are the same as in
+    streaming SrxTextIterator, which does the actual splitting.
+    """
+
+    def __init__(
+        self,
+        document: SrxDocument,
+        language_code: str,
+        reader: Any,
+        buffer_length: int = AbstractTextIterator.DEFAULT_BUFFER_LENGTH,
+        max_lookbehind_construct_length: int = AbstractTextIterator.DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH,
+        margin: int = SrxTextIterator.DEFAULT_MARGIN,
+        encoding: str = "utf-8",
+        iterator_class: Type[SrxTextIterator] = SrxTextIterator,
+    ) -> None:
+        """
+        Creates asynchronous text iterator; see SrxTextIterator for the
+        parameters.
+        @param reader async reader
+        @param encoding encoding used when the reader returns bytes
+        @param iterator_class SrxTextIterator or CombinedSrxTextIterator
+        """
+
+        self.reader: Any = reader
+        self.decoder: codecs.IncrementalDecoder = codecs.getincrementaldecoder(encoding)()
+        self.text_queue: TextQueue = TextQueue()
+        self.iterator: SrxTextIterator = iterator_class(
+            document,
+            language_code,
+            self.text_queue,  # type: ignore
+            buffer_length=buffer_length,
+            max_lookbehind_construct_length=max_lookbehind_construct_length,
+            margin=margin,
+        )
+
+    def __aiter__(self) -> "AsyncSrxTextIterator":
+        return self
+
+    async def __anext__(self) -> str:
+        while True:
+            try:
+                return next(self.iterator)
+            except StopIteration:
+                raise StopAsyncIteration
+            except TextNotAvailable:
+                # The search stopped at the read that needs more text, and
+                # resumes there once it is read.
+                await self.fill()
+
+    async def fill(self) -> None:
+        """
+        Reads text once, at most up to a full buffer in the queue, or closes
+        the queue when the reader is exhausted.
+        """
+
+        queue: TextQueue = self.text_queue
+        data = await self.reader.read(self.iterator.buffer_length + 1 - queue.available())
+        if isinstance(data, bytes):
+            queue.append(self.decoder.decode(data, final=not data))
+        else:
+            queue.append(data)
+        if not data:
+            queue.close()
+
+
+class IncrementalSrxTextIterator:
+    """
+    Push-based streaming splitter: text is given in chunks of any size with
+    feed() and every call returns the segments that became final; close()
+    marks the end of the text and returns the rest.
+
+    A segment is final once the text it can depend on has arrived: the whole
+    read buffer it is found in (buffer_length + 1 characters), exactly as in
+    streaming SrxTextIterator, so the output is identical to SrxTextIterator
+    over a reader of the concatenated chunks with the same buffer_length and
+    margin. A smaller buffer_length means final segments are returned
+    sooner; at most about a buffer plus the last chunk is kept in memory.
+    """
+
+    def __init__(
+        self,
+        document: SrxDocument,
+        language_code: str,
+        buffer_length: int = AbstractTextIterator.DEFAULT_BUFFER_LENGTH,
+        max_lookbehind_construct_length: int = AbstractTextIterator.DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH,
+        margin: int = SrxTextIterator.DEFAULT_MARGIN,
+        iterator_class: Type[SrxTextIterator] = SrxTextIterator,
+    ) -> None:
+        """
+        Creates incremental text iterator; see SrxTextIterator for the
+        parameters.
+        @param iterator_class SrxTextIterator or CombinedSrxTextIterator
+        """
+
+        self.text_queue: TextQueue = TextQueue()
+        self.iterator: SrxTextIterator = iterator_class(
+            document,
+            language_code,
+            self.text_queue,  # type: ignore
+            buffer_length=buffer_length,
+            max_lookbehind_construct_length=max_lookbehind_construct_length,
+            margin=margin,
+        )
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Adds text to split.
+        @param text next chunk of text
+        @return segments that became final
+        """
+        self.text_queue.append(text)
+        return self.get_final_segments()
+
+    def close(self) -> List[str]:
+        """
+        Marks the end of the text.
+        @return remaining segments
+        """
+        self.text_queue.close()
+        return self.get_final_segments()
+
+    def get_final_segments(self) -> List[str]:
+        segments: List[str] = []
+        try:
+            while self.iterator.has_next():
+                segments.append(next(self.iterator))
+        except TextNotAvailable:
+            # The search stopped at the read that needs more text, and
+            # resumes there when more text is fed.
+            pass
+        return segments
+
+
 # Registry used by the CLI and tooling to select an algorithm by name.
 ITERATORS = {
     "SrxTextIterator": SrxTextIterator,
     "AccurateSrxTextIterator": AccurateSrxTextIterator,
+    "CombinedSrxTextIterator": CombinedSrxTextIterator,
 }
@@ -0,0 +1,134 @@
+import json
+from typing import IO, Callable, Iterable, Iterator, List
+
+# Output formats of the command line, one record per segment:
+#   lines    the segment and a line break (segments ending with a line break
+#            are followed by an empty line)
+#   nul      the segment and a NUL character, unambiguous for any text
+#   jsonl    {"index": ..., "start": ..., "end": ..., "text": ...}
+#   offsets  start<TAB>end, without the text
+#   tsv      index<TAB>start<TAB>end<TAB>text, with backslash, tab, line
+#            feed and carriage return in the text escaped as \\, \t, \n, \r
+# Offsets are character positions in the text being split.
+FORMATS: List[str] = ["lines", "nul", "jsonl", "offsets", "tsv"]
+
+# Characters buffered before they are written to the stream.
+DEFAULT_BUFFER_SIZE: int = 1024 * 1024
+
+# JSON string literal of a str, without escaping non-ASCII characters.
+encode_string: Callable[[str], str] = json.encoder.encode_basestring  # type: ignore
+
+
+class SegmentWriter:
+    """
+    Formats segments and writes them to a text stream in large chunks,
+    instead of one write call (and one flush, on a terminal) per segment.
+    """
+
+    def __init__(self, stream: IO[str], output_format: str = "lines", buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        """
+        @param stream stream to write to
+        @param output_format one of FORMATS
+        @param buffer_size number of characters collected before they are
+            written; 0 to write every segment at once
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}")
+
+        self.stream: IO[str] = stream
+        self.output_format: str = output_format
+        self.buffer_size: int = buffer_size
+        self.buffer: List[str] = []
+        self.buffered: int = 0
+        # Index of the next segment and its start in the current text.
+        self.index: int = 0
+        self.start: int = 0
+
+    def reset(self) -> None:
+        """
+        Starts a new text: offsets of following segments count from its
+        start. Segment indexes keep counting.
+        """
+        self.start = 0
+
+    def format_all(self, segments: Iterable[str]) -> Iterator[str]:
+        # One loop per format, with everything in local variables: this
+        # runs once per segment.
+        output_format: str = self.output_format
+        index: int = self.index
+        start: int = self.start
+        try:
+            if output_format == "lines":
+                for segment in segments:
+                    index += 1
+                    start += len(segment)
+                    yield segment + "\n"
+            elif output_format == "nul":
+                for segment in segments:
+                    index += 1
+                    start += len(segment)
+                    yield segment + "\0"
+            elif output_format == "offsets":
+                for segment in segments:
+                    end: int = start + len(segment)
+                    index += 1
+                    yield f"{start}\t{end}\n"
+                    start = end
+            elif output_format == "tsv":
+                for segment in segments:
+                    end = start + len(segment)
+                    if "\\" in segment or "\t" in segment or "\n" in segment or "\r" in segment:
+                        segment = (
+                            segment.replace("\\", "\\\\")
+                            .replace("\t", "\\t")
+                            .replace("\n", "\\n")
+                            .replace("\r", "\\r")
+                        )
+                    yield f"{index}\t{start}\t{end}\t{segment}\n"
+                    index += 1
+                    start = end
+            else:
+                for segment in segments:
+                    end = start + len(segment)
+                    yield f'{{"index": {index}, "start": {start}, "end": {end}, "text": {encode_string(segment)}}}\n'
+                    index += 1
+                    start = end
+        finally:
+            self.index = index
+            self.start = start
+
+    def write(self, segment: str) -> None:
+        """
+        Formats segment and writes it once the buffer is full.
+        """
+        self.write_all((segment,))
+
+    def write_all(self, segments: Iterable[str]) -> None:
+        """
+        Formats segments and writes them whenever the buffer is full.
+        """
+        buffer: List[str] = self.buffer
+        buffered: int = self.buffered
+        buffer_size: int = self.buffer_size
+        for record in self.format_all(segments):
+            buffer.append(record)
+            buffered += len(record)
+            if buffered >= buffer_size:
+                self.stream.write("".join(buffer))
+                buffer.clear()
+                buffered = 0
+        self.buffered = buffered
+
+    def write_buffer(self) -> None:
+        # Writes the buffered records to the stream, without flushing it.
+        if self.buffer:
+            self.stream.write("".join(self.buffer))
+            self.buffer.clear()
+            self.buffered = 0
+
+    def flush(self) -> None:
+        """
+        Writes the buffered records and flushes the stream.
+        """
+        self.write_buffer()
+        self.stream.flush()
@@ -0,0 +1,208 @@
+import multiprocessing
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from .iterators import SrxTextIterator
+from .rule_matcher import RuleMatcher
+from .srx_parser import SrxDocument
+from .utils import LazyPattern
+
+
+# Chunks are cut after a paragraph break (the bundled _two rules always
+# break after it) near the chunk boundary, or at the first line start when
+# there is none nearby.
+PARAGRAPH_PATTERN: LazyPattern = LazyPattern(r"\n\s*\n\t*")
+LINE_PATTERN: LazyPattern = LazyPattern(r"\n")
+PARAGRAPH_LOOKAHEAD: int = 64 * 1024
+
+# Shortest chunk worth sending to another process.
+MIN_CHUNK_LENGTH: int = 64 * 1024
+
+# Chunks per worker, so that workers finishing early get more work.
+CHUNKS_PER_JOB: int = 4
+
+# Characters a rule matcher of a worker searches at once (see RuleMatcher).
+# Workers seek in the whole text, and without a window a matcher of a rare
+# rule would search the rest of the text at every seek.
+SEARCH_WINDOW: int = 4096
+
+
+def find_seams(text: str, count: int) -> List[int]:
+    """
+    Finds positions splitting text into about count chunks of equal length.
+    Positions are only candidates: segmentation is verified to break there.
+    @param text text
+    @param count number of chunks
+    @return increasing list of chunk start positions, starting with 0
+    """
+
+    seams: List[int] = [0]
+
+    for index in range(1, count):
+        target: int = max(index * len(text) // count, seams[-1] + 1)
+        match = PARAGRAPH_PATTERN.search(text, target, target + PARAGRAPH_LOOKAHEAD)
+        if match is None:
+            match = LINE_PATTERN.search(text, target)
+        if match is None:
+            break
+        if seams[-1] < match.end() < len(text):
+            seams.append(match.end())
+
+    return seams
+
+
+def get_search_position(matcher: RuleMatcher) -> int:
+    # Position the matcher searches from, after the text end if exhausted.
+    return matcher.text_len + 1 if matcher.hit_end() else matcher.get_position()
+
+
+def in_sync(iterator: SrxTextIterator, probe: SrxTextIterator, limit: int) -> bool:
+    """
+    Compares the rule matchers of two iterators at the same position. A
+    pending matcher behind the other one of its pair is resumed up to the
+    other's search position first, as it may still reach the same state;
+    resumed matchers are queued again.
+    @param limit last search position to resume matchers to; pairs that
+        differ beyond it count as not in sync
+    @return true if all matchers are in the same state
+    """
+    assert iterator.rule_matcher_list is not None and probe.rule_matcher_list is not None
+
+    for matcher, other in zip(iterator.rule_matcher_list, probe.rule_matcher_list):
+        while matcher.get_state() != other.get_state():
+            pending: List[RuleMatcher] = [item for item in (matcher, other) if item.pending]
+            if not pending:
+                return False
+            behind: RuleMatcher = min(pending, key=get_search_position)
+            ahead: RuleMatcher = other if behind is matcher else matcher
+            position: int = get_search_position(ahead)
+            if get_search_position(behind) >= position or position > limit:
+                return False
+            behind.find(limit=position - 1)
+            for checked in (iterator, probe):
+                queue = checked.rule_matcher_queue
+                assert queue is not None
+                for index, queued in list(queue.matchers.items()):
+                    if queued is behind:
+                        queue.push(index, behind)
+
+    return True
+
+
+def segment_chunk(
+    iterator: SrxTextIterator, probe: SrxTextIterator, seams: List[int], index: int
+) -> Tuple[List[int], int]:
+    """
+    Splits text starting at the seam with given index until a later seam is
+    reached in sync: the iterator breaks exactly at the seam and all its rule
+    matchers are in the same state as the matchers of an iterator started at
+    the seam (the probe). From there on both produce the same segments, so
+    the chunk starting at that seam continues the output.
+    @return segment end positions and index of the seam where iterator is in sync (len(seams) at text end)
+    """
+
+    iterator.seek(seams[index])
+    ends: List[int] = []
+    next_index: int = index + 1
+
+    while iterator.has_next():
+        iterator.find_next()
+        iterator.start_position = iterator.end_position
+        ends.append(iterator.end_position)
+
+        while next_index < len(seams) and seams[next_index] < iterator.end_position:
+            next_index += 1
+
+        if next_index < len(seams) and seams[next_index] == iterator.end_position:
+            # The probe starts at the seam and moves past it.
+            probe.seek(iterator.end_position)
+            probe.move_matchers()
+            if in_sync(iterator, probe, iterator.end_position + 2 * SEARCH_WINDOW):
+                return ends, next_index
+
+    return ends, len(seams)
+
+
+class ChunkWorker:
+    # Per-process state of the worker pool: the document is warmed by the
+    # first chunk and reused for the following ones.
+
+    iterator: Optional[SrxTextIterator] = None
+    probe: Optional[SrxTextIterator] = None
+    seams: List[int] = []
+
+    @classmethod
+    def init(
+        cls,
+        document: SrxDocument,
+        language_code: str,
+        text: str,
+        seams: List[int],
+        iterator_class: Type[SrxTextIterator],
+        kwargs: Dict[str, Any],
+    ) -> None:
+        cls.iterator = iterator_class(document, language_code, text, **kwargs)
+        cls.probe = iterator_class(document, language_code, text, **kwargs)
+        cls.iterator.search_window = SEARCH_WINDOW
+        cls.probe.search_window = SEARCH_WINDOW
+        cls.seams = seams
+
+    @classmethod
+    def segment(cls, index: int) -> Tuple[List[int], int]:
+        assert cls.iterator is not None and cls.probe is not None
+        return segment_chunk(cls.iterator, cls.probe, cls.seams, index)
+
+
+def segment_parallel(
+    document: SrxDocument,
+    language_code: str,
+    text: str,
+    jobs: Optional[int] = None,
+    iterator_class: Type[SrxTextIterator] = SrxTextIterator,
+    **kwargs: Any,
+) -> Iterator[str]:
+    """
+    Splits one large text into segments using a pool of processes. The text
+    is cut into chunks at likely segment breaks, chunks are split in
+    parallel and merged in order. Every seam is checked (see segment_chunk);
+    when the check fails the previous chunk is split further instead, so the
+    output is always identical to a single SrxTextIterator.
+    @param document document containing language rules
+    @param language_code language code to select the rules
+    @param text text to split
+    @param jobs number of processes, multiprocessing.cpu_count() by default
+    @param iterator_class SrxTextIterator or CombinedSrxTextIterator
+    @param kwargs other iterator constructor arguments
+    @return iterator over segments
+    """
+
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+
+    count: int = min(jobs * CHUNKS_PER_JOB, len(text) // MIN_CHUNK_LENGTH)
+    seams: List[int] = find_seams(text, count)
+
+    if jobs < 2 or len(seams) < 2:
+        yield from iterator_class(document, language_code, text, **kwargs)
+        return
+
+    initargs = (document, language_code, text, seams, iterator_class, kwargs)
+    with multiprocessing.Pool(jobs, initializer=ChunkWorker.init, initargs=initargs) as pool:
+        yield from split(text, pool.imap(ChunkWorker.segment, range(len(seams))), seams)
+
+
+def split(text: str, results: Iterator[Tuple[List[int], int]], seams: List[int]) -> Iterator[str]:
+    # Merges chunk results in seam order, skipping the chunks whose seam was
+    # not confirmed by the previous chunk.
+
+    start: int = 0
+    next_index: int = 0
+
+    for index, (ends, sync_index) in enumerate(results):
+        if index != next_index:
+            continue
+
+        for end in ends:
+            yield text[start:end]
+            start = end
+
+        next_index = sync_index
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import pathlib
+from typing import Any, Dict, List, Optional, Union
+
+from .structures import LanguageRule, Rule
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .srx_parser import SrxDocument
+
+
+# Segmentation plan: the parsed content of an SRX file (header, language
+# rules and language maps) stored as JSON, so that documents can be created
+# without parsing the XML again. Plans are keyed by the SHA-256 of the SRX
+# file; compiled patterns are not stored - the regex package pickles a
+# pattern as its source and compiles it again on load.
+
+# Bump when the plan format or the parsed representation changes.
+PLAN_VERSION: int = 1
+
+PLAN_SUFFIX: str = ".plan.json"
+
+
+def get_ruleset_hash(ruleset: Union[pathlib.Path, str]) -> str:
+    """
+    @param ruleset path to the SRX file
+    @return key of the plans of given SRX file
+    """
+    digest = hashlib.sha256(pathlib.Path(ruleset).read_bytes())
+    digest.update(f"plan-{PLAN_VERSION}".encode())
+    return digest.hexdigest()
+
+
+def get_plan_paths(
+    ruleset: Union[pathlib.Path, str], ruleset_hash: str, plan_dir: Optional[pathlib.Path]
+) -> List[pathlib.Path]:
+    """
+    @return candidate plan files: the one next to the SRX file (shipped
+    with it, like the plan of the bundled rules) and the one in the cache
+    directory, if any
+    """
+    ruleset = pathlib.Path(ruleset)
+    paths: List[pathlib.Path] = [ruleset.with_name(ruleset.stem + PLAN_SUFFIX)]
+    if plan_dir is not None:
+        paths.append(get_cache_path(plan_dir, ruleset_hash))
+    return paths
+
+
+def get_cache_path(plan_dir: pathlib.Path, ruleset_hash: str) -> pathlib.Path:
+    """
+    @return plan file of the SRX file with given hash in the cache directory
+    """
+    return plan_dir / (ruleset_hash + PLAN_SUFFIX)
+
+
+def create_plan(document: "SrxDocument", ruleset_hash: str) -> Dict[str, Any]:
+    """
+    @param document document parsed from the SRX file
+    @param ruleset_hash see get_ruleset_hash
+    @return plan of given document
+    """
+
+    language_rule_list: List[LanguageRule] = []
+    indexes: Dict[int, int] = {}
+    for language_map in document.language_map_list:
+        language_rule: LanguageRule = language_map.language_rule
+        if language_rule is not None and id(language_rule) not in indexes:
+            indexes[id(language_rule)] = len(language_rule_list)
+            language_rule_list.append(language_rule)
+
+    return {
+        "version": PLAN_VERSION,
+        "hash": ruleset_hash,
+        "cascade": document.cascade,
+        "language_rules": [
+            {"name": language_rule.name, "rules": [list(rule) for rule in language_rule.rules]}
+            for language_rule in language_rule_list
+        ],
+        "language_maps": [
+            [
+                language_map.language_pattern.pattern,
+                None if language_map.language_rule is None else indexes[id(language_map.language_rule)],
+            ]
+            for language_map in document.language_map_list
+        ],
+    }
+
+
+def load_plan(path: pathlib.Path, ruleset_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    @return plan stored in given file, or None if there is no such file or
+    it was created for another SRX file or plan version
+    """
+    try:
+        with open(path, encoding="utf-8") as plan_file:
+            plan: Dict[str, Any] = json.load(plan_file)
+    except (OSError, ValueError):
+        return None
+
+    if plan.get("version") != PLAN_VERSION or plan.get("hash") != ruleset_hash:
+        return None
+
+    return plan
+
+
+def save_plan(path: pathlib.Path, plan: Dict[str, Any]) -> None:
+    """
+    Writes plan to given file atomically, so that concurrent readers never
+    see a partial plan.
+    """
+    # Imported here: only needed when a plan is written.
+    import tempfile
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temporary_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as plan_file:
+            json.dump(plan, plan_file, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def apply_plan(document: "SrxDocument", plan: Dict[str, Any]) -> None:
+    """
+    Adds language maps and rules from given plan to the document, exactly as
+    parsing the SRX file would.
+    """
+    document.cascade = plan["cascade"]
+
+    language_rule_list: List[LanguageRule] = [
+        LanguageRule(item["name"], [Rule(*rule) for rule in item["rules"]]) for item in plan["language_rules"]
+    ]
+    for pattern, index in plan["language_maps"]:
+        document.add_language_map(pattern, None if index is None else language_rule_list[index])
@@ -0,0 +1,307 @@
+import contextlib
+import gc
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+
+from .batch import CHUNK_SIZE, Segmenter
+from .compressed import open_file, open_output
+from .iterators import AbstractTextIterator, CombinedSrxTextIterator, SrxTextIterator
+from .output import SegmentWriter
+from .srx_parser import SrxDocument
+from .structures import FileResult, WorkerStats
+
+
+def get_memory_usage() -> Tuple[int, Optional[int]]:
+    """
+    @return resident set size of this process in bytes and the part of it
+    not shared with other processes, None where the platform does not tell
+    (everywhere but Linux)
+    """
+    try:
+        with open("/proc/self/smaps_rollup", encoding="ascii") as smaps:
+            sizes: Dict[str, int] = {}
+            for line in smaps:
+                fields: List[str] = line.split()
+                if len(fields) == 3 and fields[2] == "kB":
+                    sizes[fields[0].rstrip(":")] = int(fields[1]) * 1024
+        return sizes["Rss"], sizes["Private_Clean"] + sizes["Private_Dirty"]
+    except (OSError, KeyError, ValueError):
+        pass
+
+    import resource
+
+    # Peak RSS: in kilobytes on Linux, in bytes on macOS.
+    rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return (rss if sys.platform == "darwin" else rss * 1024), None
+
+
+def segment_file(
+    document: SrxDocument,
+    language_code: str,
+    input_path: str,
+    output_path: str,
+    iterator_class: Type[AbstractTextIterator] = SrxTextIterator,
+    kwargs: Optional[Dict[str, Any]] = None,
+    output_format: str = "lines",
+    compression: Optional[str] = None,
+) -> FileResult:
+    """
+    Splits a UTF-8 text file, decompressing it if it is compressed (see
+    compressed.open_file), and writes the segments in given format (see
+    output.FORMATS), as the command line does. The output is written to a
+    temporary file in the output directory first and then renamed, so that
+    it is either complete or missing.
+    @param compression compression of the output (see
+        compressed.COMPRESSIONS), None to write plain text
+    @return result; errors are reported in it instead of raised
+    """
+    started: float = time.perf_counter()
+    writer: Optional[SegmentWriter] = None
+    temporary_path: Optional[str] = None
+    try:
+        size: int = os.path.getsize(input_path)
+        directory: str = os.path.dirname(output_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # Unique per process; created with the usual permissions, unlike
+        # tempfile.mkstemp files.
+        temporary_path = os.path.join(directory, f".{os.path.basename(output_path)}.{os.getpid()}.tmp")
+        with contextlib.ExitStack() as files:
+            input_file: IO[str] = files.enter_context(open_file(input_path))
+            output_file: IO[str]
+            if compression is None:
+                output_file = files.enter_context(open(temporary_path, "w", encoding="utf-8"))
+            else:
+                output_file = files.enter_context(
+                    open_output(files.enter_context(open(temporary_path, "wb")), compression)
+                )
+            writer = SegmentWriter(output_file, output_format)
+            text: Any = input_file if issubclass(iterator_class, SrxTextIterator) else input_file.read()
+            writer.write_all(iterator_class(document, language_code, text, **(kwargs or {})))
+            writer.write_buffer()
+        os.replace(temporary_path, output_path)
+    except Exception as exception:
+        if temporary_path is not None and os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+        return FileResult(
+            input_path,
+            output_path,
+            0,
+            0 if writer is None else writer.index,
+            time.perf_counter() - started,
+            f"{type(exception).__name__}: {exception}",
+        )
+
+    return FileResult(input_path, output_path, size, writer.index, time.perf_counter() - started, None)
+
+
+class PoolWorker:
+    # Per-process state of SegmenterPool: one reused Segmenter per language
+    # code, created from the document inherited from the parent.
+
+    segmenters: Dict[str, Segmenter] = {}
+    document: Optional[SrxDocument] = None
+    iterator_class: Type[AbstractTextIterator] = SrxTextIterator
+    kwargs: Dict[str, Any] = {}
+
+    @classmethod
+    def init(
+        cls,
+        document: SrxDocument,
+        language_codes: List[str],
+        iterator_class: Type[AbstractTextIterator],
+        kwargs: Dict[str, Any],
+        reports: Any,
+        started: float,
+    ) -> None:
+        cls.document = document
+        cls.iterator_class = iterator_class
+        cls.kwargs = kwargs
+        try:
+            cls.segmenters = {
+                language_code: Segmenter(document, language_code, iterator_class, kwargs)
+                for language_code in language_codes
+            }
+            # Resolves the rules and creates the rule matchers now, so that
+            # the startup time includes them.
+            for segmenter in cls.segmenters.values():
+                list(segmenter.segment_all([""]))
+        except BaseException as exception:
+            reports.put(exception)
+            raise
+
+        rss, private = get_memory_usage()
+        reports.put(WorkerStats(os.getpid(), time.monotonic() - started, rss, private))
+
+    @classmethod
+    def segment(cls, task: Tuple[int, str, List[str]]) -> Tuple[int, List[List[str]]]:
+        index, language_code, texts = task
+        return index, list(cls.segmenters[language_code].segment_all(texts))
+
+    @classmethod
+    def segment_file(cls, task: Tuple[str, str, str, str, Optional[str]]) -> FileResult:
+        language_code, input_path, output_path, output_format, compression = task
+        assert cls.document is not None
+        return segment_file(
+            cls.document,
+            language_code,
+            input_path,
+            output_path,
+            cls.iterator_class,
+            cls.kwargs,
+            output_format,
+            compression,
+        )
+
+
+class SegmenterPool:
+    """
+    Pool of processes splitting texts into segments. The document is warmed
+    up (see SrxDocument.warm_up) in the calling process before the workers
+    are forked, so they share its parsed rules and compiled patterns
+    copy-on-write instead of parsing and compiling them again. Where fork
+    is not available the document is sent to every worker and its patterns
+    are compiled there.
+    """
+
+    def __init__(
+        self,
+        document: SrxDocument,
+        language_codes: Sequence[str],
+        processes: Optional[int] = None,
+        iterator_class: Type[AbstractTextIterator] = SrxTextIterator,
+        chunk_size: int = CHUNK_SIZE,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Warms up the document and starts the workers; returns once all of
+        them are ready.
+        @param document document containing language rules
+        @param language_codes language codes texts will be split in
+        @param processes number of processes, multiprocessing.cpu_count() by default
+        @param iterator_class SrxTextIterator or any other iterator with reset()
+        @param chunk_size number of texts sent to a worker at once
+        @param kwargs other iterator constructor arguments
+        """
+        assert language_codes, "At least one language code is required."
+
+        self.language_codes: List[str] = list(language_codes)
+        self.processes: int = processes or multiprocessing.cpu_count()
+        self.chunk_size: int = chunk_size
+
+        document.warm_up(
+            self.language_codes,
+            kwargs.get(
+                "max_lookbehind_construct_length", AbstractTextIterator.DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH
+            ),
+            scanner=issubclass(iterator_class, CombinedSrxTextIterator),
+        )
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+
+        reports = context.SimpleQueue()
+        initargs = (document, self.language_codes, iterator_class, kwargs, reports, time.monotonic())
+
+        # Objects tracked by the garbage collector are moved to a permanent
+        # generation, so that collections in the workers do not write to
+        # (and copy) the pages of the inherited document.
+        gc.freeze()
+        try:
+            self.pool = context.Pool(self.processes, initializer=PoolWorker.init, initargs=initargs)
+        finally:
+            gc.unfreeze()
+
+        # Startup time, RSS and unshared memory of every worker.
+        self.worker_stats: List[WorkerStats] = []
+        while len(self.worker_stats) < self.processes:
+            report = reports.get()
+            if isinstance(report, BaseException):
+                self.pool.terminate()
+                raise report
+            self.worker_stats.append(report)
+
+    def get_language_code(self, language_code: Optional[str]) -> str:
+        if language_code is None:
+            return self.language_codes[0]
+        if language_code not in self.language_codes:
+            raise ValueError(f"Language {language_code!r} was not given to the pool")
+        return language_code
+
+    def get_tasks(self, texts: Iterable[str], language_code: Optional[str]) -> Iterator[Tuple[int, str, List[str]]]:
+        language_code = self.get_language_code(language_code)
+
+        text_iterator: Iterator[str] = iter(texts)
+        for index in itertools.count():
+            chunk: List[str] = list(itertools.islice(text_iterator, self.chunk_size))
+            if not chunk:
+                break
+            yield index * self.chunk_size, language_code, chunk
+
+    def imap(self, texts: Iterable[str], language_code: Optional[str] = None) -> Iterator[List[str]]:
+        """
+        @param texts texts to split
+        @param language_code one of the pool's language codes, the first one by default
+        @return iterator over segment lists, one per text, in input order
+        """
+        for _, results in self.pool.imap(PoolWorker.segment, self.get_tasks(texts, language_code)):
+            yield from results
+
+    def imap_unordered(
+        self, texts: Iterable[str], language_code: Optional[str] = None
+    ) -> Iterator[Tuple[int, List[str]]]:
+        """
+        Like imap, but yields the segments of every chunk of texts as soon as
+        it is split.
+        @return iterator over (index of the text, segment list) pairs
+        """
+        for index, results in self.pool.imap_unordered(PoolWorker.segment, self.get_tasks(texts, language_code)):
+            yield from enumerate(results, index)
+
+    def imap_files(
+        self,
+        paths: Iterable[Tuple[str, str]],
+        language_code: Optional[str] = None,
+        output_format: str = "lines",
+        compression: Optional[str] = None,
+    ) -> Iterator[FileResult]:
+        """
+        Splits text files (see segment_file), one file per task, in the
+        order given; pass the largest files first, so that small ones fill
+        the gaps at the end.
+        @param paths (input path, output path) pairs
+        @param language_code one of the pool's language codes, the first one by default
+        @param output_format see output.FORMATS
+        @param compression compression of the outputs, see compressed.COMPRESSIONS
+        @return iterator over results, in completion order
+        """
+        language_code = self.get_language_code(language_code)
+        tasks = (
+            (language_code, input_path, output_path, output_format, compression) for input_path, output_path in paths
+        )
+        yield from self.pool.imap_unordered(PoolWorker.segment_file, tasks)
+
+    def close(self) -> None:
+        """
+        Waits for the workers to finish their tasks and stops them.
+        """
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self) -> None:
+        """
+        Stops the workers immediately.
+        """
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self) -> "SegmenterPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.terminate()
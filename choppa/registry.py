@@ -0,0 +1,80 @@
+import os
+import pathlib
+import threading
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from .srx_parser import SrxDocument
+
+
+# Process-wide documents, keyed by (resolved ruleset path, pattern flags).
+# Every entry keeps the modification time and size of the file it was
+# loaded from, to detect changes when asked to, and the (language code,
+# scanner) pairs the document has been warmed up for.
+documents: Dict[Tuple[str, int], Tuple[Tuple[int, int], SrxDocument, Set[Tuple[str, bool]]]] = {}
+lock: threading.Lock = threading.Lock()
+
+
+def get_document(
+    ruleset: Union[pathlib.Path, None, str] = None,
+    pattern_flags: int = 0,
+    warm_up: Iterable[str] = (),
+    reload: bool = False,
+    scanner: bool = False,
+) -> SrxDocument:
+    """
+    Returns the document of given ruleset shared by the whole process, so
+    that the file is loaded and its patterns are compiled once, however
+    many callers ask for it. Safe to call from many threads: the document
+    is created, and warmed up for each language code, once.
+    @param ruleset path to the SRX file, the bundled LanguageTool rules by default
+    @param pattern_flags see SrxDocument
+    @param warm_up language codes to compile the patterns of (see SrxDocument.warm_up)
+    @param reload load the file again if it changed since it was loaded
+    @param scanner also compile the CombinedSrxTextIterator patterns when warming up
+    @return shared document
+    """
+
+    if ruleset is None:
+        from . import DEFAULT_SRX_RULESET
+
+        ruleset = DEFAULT_SRX_RULESET
+
+    path: str = os.path.realpath(ruleset)
+    key: Tuple[str, int] = (path, pattern_flags)
+
+    entry = documents.get(key)
+    if entry is None or reload:
+        with lock:
+            status = os.stat(path)
+            version: Tuple[int, int] = (status.st_mtime_ns, status.st_size)
+            # Another thread may have loaded it meanwhile.
+            entry = documents.get(key)
+            if entry is None or entry[0] != version:
+                entry = (version, SrxDocument(ruleset=path, pattern_flags=pattern_flags), set())
+                documents[key] = entry
+
+    document: SrxDocument = entry[1]
+    warmed_up: Set[Tuple[str, bool]] = entry[2]
+    language_codes: List[str] = list(warm_up)
+    if not warmed_up.issuperset([(language_code, scanner) for language_code in language_codes]):
+        with lock:
+            # Once per document and language code, however many threads ask.
+            language_codes = [
+                language_code for language_code in language_codes if (language_code, scanner) not in warmed_up
+            ]
+            if language_codes:
+                document.warm_up(language_codes, scanner=scanner)
+                # A scanner warm-up compiles the other patterns as well.
+                for language_code in language_codes:
+                    warmed_up.add((language_code, scanner))
+                    warmed_up.add((language_code, False))
+
+    return document
+
+
+def clear_documents() -> None:
+    """
+    Forgets all shared documents; documents in use stay valid.
+    """
+    with lock:
+        documents.clear()
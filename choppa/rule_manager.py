@@ -1,8 +1,10 @@
+import threading
 import regex as re  # type: ignore
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 
 from choppa.structures import LanguageRule, Rule
 from choppa.utils import finitize
+from choppa.rule_scanner import create_scanner_pattern_string, is_scannable, starts_with_rare_character
 
 from typing import TYPE_CHECKING
 
@@ -14,6 +16,10 @@ if TYPE_CHECKING:
 
 
 class RuleManager:
+    # Serializes get_scanner_patterns of rule managers shared by threads;
+    # class level, so that rule managers stay picklable.
+    scanner_lock: threading.Lock = threading.Lock()
+
     def __init__(
         self,
         document: "SrxDocument",
@@ -37,6 +43,17 @@ class RuleManager:
         self.break_rule_list: List[Rule] = []
         self.exception_pattern_map: Dict[Rule, Optional[re.Regex]] = {}
 
+        # Combined break rule patterns used by RuleScanner, built on first use.
+        self.scanner_patterns: Optional[List[List[re.Regex]]] = None
+        self.scanner_rule_list: List[Tuple[int, Rule]] = []
+        # Rule index -> (lane, position in lane).
+        self.scanner_rule_positions: Dict[int, Tuple[int, int]] = {}
+        self.matcher_rule_list: List[Tuple[int, Rule]] = []
+        self.scanner_pattern_strings: List[str] = []
+
+        # Exception pattern strings compiled for the break rules.
+        self.exception_pattern_strings: List[str] = []
+
         exception_pattern_builder: str = ""
 
         for language_rule in language_rule_list:
@@ -48,6 +65,7 @@ class RuleManager:
 
                     if exception_pattern_builder:
                         exception_pattern = document.compile(exception_pattern_builder)
+                        self.exception_pattern_strings.append(exception_pattern_builder)
                     else:
                         exception_pattern = None
 
@@ -59,6 +77,76 @@ class RuleManager:
                     pattern_string: str = self.create_exception_pattern_string(rule)
                     exception_pattern_builder += pattern_string
 
+    def get_scanner_patterns(self) -> List[List[re.Regex]]:
+        """
+        Splits break rules into the ones RuleScanner can match together
+        (scanner_rule_list) and the ones that need a RuleMatcher each
+        (matcher_rule_list), both as (rule index, rule) pairs in rule order.
+        Scannable rules starting with a rare character share one lane, every
+        other scannable rule gets a lane of its own.
+        @return scanner patterns per lane; pattern k of a lane is the
+        alternation of the lane's rules starting from the k-th one
+        """
+
+        if self.scanner_patterns is not None:
+            return self.scanner_patterns
+
+        with self.scanner_lock:
+            if self.scanner_patterns is not None:
+                return self.scanner_patterns
+
+            # Built in locals and published at once, scanner_patterns last,
+            # so that other threads never see partly built lists.
+            flags: int = self.document.pattern_flags
+            lanes: List[List[Tuple[int, Rule]]] = [[]]
+            matcher_rule_list: List[Tuple[int, Rule]] = []
+            scanner_rule_list: List[Tuple[int, Rule]] = []
+            scanner_rule_positions: Dict[int, Tuple[int, int]] = {}
+            scanner_pattern_strings: List[str] = []
+
+            for index, rule in enumerate(self.break_rule_list):
+                if not is_scannable(rule, flags):
+                    matcher_rule_list.append((index, rule))
+                    continue
+
+                scanner_rule_list.append((index, rule))
+                if starts_with_rare_character(rule, flags):
+                    lanes[0].append((index, rule))
+                else:
+                    lanes.append([(index, rule)])
+
+            scanner_patterns: List[List[re.Regex]] = []
+            for lane_rule_list in lanes:
+                if not lane_rule_list:
+                    continue
+                for position, (index, _) in enumerate(lane_rule_list):
+                    scanner_rule_positions[index] = (len(scanner_patterns), position)
+                pattern_strings: List[str] = [
+                    create_scanner_pattern_string(lane_rule_list[position:]) for position in range(len(lane_rule_list))
+                ]
+                scanner_pattern_strings.extend(pattern_strings)
+                scanner_patterns.append([self.document.compile(pattern_string) for pattern_string in pattern_strings])
+
+            self.matcher_rule_list = matcher_rule_list
+            self.scanner_rule_list = scanner_rule_list
+            self.scanner_rule_positions = scanner_rule_positions
+            self.scanner_pattern_strings = scanner_pattern_strings
+            self.scanner_patterns = scanner_patterns
+
+        return self.scanner_patterns
+
+    def get_pattern_strings(self) -> Set[str]:
+        """
+        @return strings of all patterns compiled for this rule manager:
+        break rule parts, exception patterns and scanner patterns
+        """
+        pattern_strings: Set[str] = set(self.exception_pattern_strings)
+        pattern_strings.update(self.scanner_pattern_strings)
+        for rule in self.break_rule_list:
+            pattern_strings.add(rule.before_pattern)
+            pattern_strings.add(rule.after_pattern)
+        return pattern_strings
+
     def get_exception_pattern(self, break_rule: Rule) -> re.Regex:
         """
         @param break_rule
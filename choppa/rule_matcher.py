@@ -1,5 +1,6 @@
+import heapq
 import regex as re  # type: ignore
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from .srx_parser import SrxDocument
 from .structures import Rule
 
@@ -24,6 +25,13 @@ class RuleMatcher:
 
     Verified byte-identical to segment 2.0.3 (ultimate algorithm) on a
     100k-line real-world corpus.
+
+    With a search window, find() gives up after searching that many
+    characters and the matcher is pending: its next break is not before
+    the position searched up to, and the next find() resumes the search.
+    RuleMatcherQueue resumes pending matchers only when their break is
+    needed, so a matcher of a rare rule does not search the rest of the
+    text whenever it is reset (see parallel.py).
     """
 
     __slots__ = (
@@ -37,16 +45,32 @@ class RuleMatcher:
         "_start_position",
         "_break_position",
         "_end_position",
+        "concurrent",
+        "search_window",
+        "pending",
     )
 
-    def __init__(self, document: SrxDocument, rule: Rule, text: str) -> None:
+    def __init__(
+        self,
+        document: SrxDocument,
+        rule: Rule,
+        text: str,
+        concurrent: bool = False,
+        search_window: Optional[int] = None,
+    ) -> None:
         """
         Creates matcher.
         rule rule which will be searched in the text
         text text
+        concurrent release the GIL while matching (regex concurrent=True)
+        search_window number of characters searched by one find(), None
+            to search until a match or the end of the text
         """
 
         self.rule: Rule = rule
+        self.concurrent: bool = concurrent
+        self.search_window: Optional[int] = search_window
+        self.pending: bool = False
         self.text: str = text
         self.text_len: int = len(text)
         self.before_pattern: re.Regex = document.compile(rule.before_pattern)
@@ -58,10 +82,29 @@ class RuleMatcher:
         self._break_position: int = 0
         self._end_position: int = 0
 
-    def find(self, start: Optional[int] = None) -> bool:
+    def reset(self, text: str) -> None:
+        """
+        Resets matcher to search given text from the beginning, the same as
+        Java Matcher.reset(CharSequence). Compiled patterns are kept.
+        @param text new text
+        """
+
+        self.text = text
+        self.text_len = len(text)
+        self.found = True
+        self.pending = False
+
+        self._position = 0
+        self._start_position = 0
+        self._break_position = 0
+        self._end_position = 0
+
+    def find(self, start: Optional[int] = None, limit: Optional[int] = None) -> bool:
         """
         Finds next rule match after previously found.
         param start start position
+        param limit last position to search from instead of the search
+            window; the matcher is pending if no match starts before
         return true if rule has been matched
         """
 
@@ -69,14 +112,24 @@ class RuleMatcher:
             self._position = start
 
         self.found = False
+        self.pending = False
 
         text = self.text
         search_before = self.before_pattern.search
         match_after = self.after_pattern.match
         position = self._position
+        concurrent = self.concurrent
+        if limit is None:
+            limit = self.text_len if self.search_window is None else position + self.search_window
 
         while position <= self.text_len:
-            before_match = search_before(text, position)
+            if position > limit:
+                self.pending = True
+                break
+            if concurrent:
+                before_match = search_before(text, position, None, True)
+            else:
+                before_match = search_before(text, position)
             if before_match is None:
                 break
 
@@ -88,7 +141,10 @@ class RuleMatcher:
             else:
                 position = break_position
 
-            after_match = match_after(text, break_position)
+            if concurrent:
+                after_match = match_after(text, break_position, None, True)
+            else:
+                after_match = match_after(text, break_position)
             if after_match is not None:
                 self.found = True
                 self._start_position = before_match.start()
@@ -103,7 +159,26 @@ class RuleMatcher:
         """
         @return true if end of text has been reached while searching
         """
-        return not self.found
+        return not self.found and not self.pending
+
+    def get_state(self) -> Optional[Tuple[int, ...]]:
+        """
+        Two matchers over the same text in the same state find the same
+        matches from now on.
+        @return search position and last match positions (only the search
+        position while pending), None if end of text has been reached
+        """
+        if self.pending:
+            return (self._position,)
+        if not self.found:
+            return None
+        return self._position, self._start_position, self._break_position, self._end_position
+
+    def get_position(self) -> int:
+        """
+        @return position the next find() searches from
+        """
+        return self._position
 
     def get_start_position(self) -> int:
         """
@@ -125,3 +200,123 @@ class RuleMatcher:
 
     def __str__(self) -> str:
         return f"{self.before_pattern.pattern}: {self.after_pattern.pattern} <{self._position}>"
+
+
+class RuleMatcherQueue:
+    """
+    Priority queue of rule matchers keyed by (break position, rule index),
+    so the first matcher in terms of break position - the first one in rule
+    order among equal positions - is available without scanning all of
+    them. A second heap keyed by (start position, rule index) finds the
+    matchers a cut has to move.
+
+    Heap entries carry the matcher version they were pushed with; whenever
+    a matcher moves it is pushed again with a new version and the old
+    entries are skipped when they surface. Only matchers whose position
+    actually changes are re-keyed, and exhausted matchers drop out in
+    O(log n).
+
+    A pending matcher is keyed by its search position in both heaps, a
+    lower bound of its break and start positions, and resumes searching
+    when it surfaces.
+    """
+
+    __slots__ = ("matchers", "versions", "break_heap", "start_heap")
+
+    def __init__(self) -> None:
+        self.matchers: Dict[int, RuleMatcher] = {}
+        self.versions: Dict[int, int] = {}
+        self.break_heap: List[Tuple[int, int, int]] = []
+        self.start_heap: List[Tuple[int, int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.matchers)
+
+    def push(self, index: int, matcher: RuleMatcher) -> None:
+        """
+        Adds matcher (which has already searched) under given rule index,
+        replacing its previous entry. Exhausted matchers are removed.
+        """
+
+        version: int = self.versions.get(index, 0) + 1
+        self.versions[index] = version
+
+        if matcher.hit_end():
+            self.matchers.pop(index, None)
+            return
+
+        self.matchers[index] = matcher
+        if matcher.pending:
+            heapq.heappush(self.break_heap, (matcher.get_position(), index, version))
+            heapq.heappush(self.start_heap, (matcher.get_position(), index, version))
+        else:
+            heapq.heappush(self.break_heap, (matcher.get_break_position(), index, version))
+            heapq.heappush(self.start_heap, (matcher.get_start_position(), index, version))
+
+    def peek(self) -> Optional[Tuple[int, int, int]]:
+        """
+        @return (break position, rule index, version) of the first matcher
+        """
+
+        heap = self.break_heap
+        versions = self.versions
+        while heap:
+            _, index, version = heap[0]
+            if versions[index] != version:
+                heapq.heappop(heap)
+            elif self.matchers[index].pending:
+                heapq.heappop(heap)
+                self.matchers[index].find()
+                self.push(index, self.matchers[index])
+            else:
+                return heap[0]
+        return None
+
+    def get_min_matcher(self) -> Optional[RuleMatcher]:
+        """
+        Returns the matcher of the first match hit
+        """
+
+        entry = self.peek()
+        return None if entry is None else self.matchers[entry[1]]
+
+    def move(self, end_position: int) -> None:
+        """
+        Moves matchers breaking at or before given position past it.
+        """
+
+        heap = self.break_heap
+        versions = self.versions
+        while heap and heap[0][0] <= end_position:
+            _, index, version = heapq.heappop(heap)
+            if versions[index] != version:
+                continue
+
+            matcher: RuleMatcher = self.matchers[index]
+            while (matcher.get_position() if matcher.pending else matcher.get_break_position()) <= end_position:
+                matcher.find()
+                if matcher.hit_end():
+                    break
+            self.push(index, matcher)
+
+    def cut(self, end_position: int) -> None:
+        """
+        Moves matchers that start before given position (end of the
+        previous segment) so they search from it.
+        """
+
+        heap = self.start_heap
+        versions = self.versions
+        while heap and heap[0][0] < end_position:
+            _, index, version = heapq.heappop(heap)
+            if versions[index] != version:
+                continue
+
+            matcher: RuleMatcher = self.matchers[index]
+            # A pending matcher is cut only if its next match starts before
+            # the position.
+            while matcher.pending and matcher.get_position() < end_position:
+                matcher.find()
+            if matcher.found and matcher.get_start_position() < end_position:
+                matcher.find(end_position)
+            self.push(index, matcher)
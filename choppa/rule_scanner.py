@@ -0,0 +1,471 @@
+import array
+import heapq
+import sys
+import regex as re  # type: ignore
+from typing import List, Optional, Tuple
+
+from .structures import Rule
+from .utils import LazyPattern, translate_java_regex
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .rule_manager import RuleManager
+
+
+# Quantifier following an atom: ?, *, +, {n}, {n,}, {n,m}, {,m}, with an
+# optional lazy (?) or possessive (+) suffix.
+QUANTIFIER_PATTERN: LazyPattern = LazyPattern(r"(?:[?*+]|\{\d*(?:,\d*)?\})[?+]?")
+LOOKAROUND_PREFIXES = ("(?=", "(?!", "(?<=", "(?<!")
+GROUP_PREFIXES = ("(?:", "(?>")
+# Zero-width escapes; everything else after a backslash consumes a character.
+ASSERTION_ESCAPES = "bBAZzG"
+# Escapes whose argument is enclosed in braces or has a fixed length.
+BRACED_ESCAPES = "pPNx"
+FIXED_ESCAPES = {"u": 4, "U": 8, "x": 2}
+
+_all_characters: Optional[str] = None
+
+
+def all_characters() -> str:
+    """
+    Returns a string holding every code point once. Used to test whether
+    two character classes intersect; built on first use (~4 MB).
+    """
+    global _all_characters
+    if _all_characters is None:
+        code_points = array.array("I", range(sys.maxunicode + 1))
+        if sys.byteorder != "little":
+            code_points.byteswap()
+        _all_characters = code_points.tobytes().decode("utf-32-le", "surrogatepass")
+    return _all_characters
+
+
+def split_tokens(pattern: str) -> Optional[List[Tuple[str, str, str]]]:
+    """
+    Splits a pattern into top-level (kind, text, quantifier) tokens, where
+    kind is one of "atom" (consumes one character), "group" (a consuming
+    group), "lookaround", "assertion" or "alternation". Returns None for
+    constructs the scanner does not analyze (backreferences, named groups,
+    inline flags, \\Q...\\E quoting, ...).
+    """
+
+    tokens: List[Tuple[str, str, str]] = []
+    length: int = len(pattern)
+    position: int = 0
+
+    while position < length:
+        char: str = pattern[position]
+        end: int
+
+        if char == "[":
+            end = _find_class_end(pattern, position)
+            kind = "atom"
+        elif char == "\\":
+            end = _find_escape_end(pattern, position)
+            if end < 0:
+                return None
+            kind = "assertion" if pattern[position + 1] in ASSERTION_ESCAPES else "atom"
+        elif char == "(":
+            end = _find_group_end(pattern, position)
+            if end < 0:
+                return None
+            if pattern.startswith(LOOKAROUND_PREFIXES, position):
+                kind = "lookaround"
+            elif pattern.startswith(GROUP_PREFIXES, position) or pattern[position + 1] != "?":
+                kind = "group"
+            else:
+                return None
+        elif char in "^$":
+            end = position + 1
+            kind = "assertion"
+        elif char == "|":
+            end = position + 1
+            kind = "alternation"
+        elif char in ")*+?{":
+            return None
+        else:
+            end = position + 1
+            kind = "atom"
+
+        if end < 0:
+            return None
+
+        quantifier: str = ""
+        quantifier_match = QUANTIFIER_PATTERN.match(pattern, end)
+        if quantifier_match is not None:
+            quantifier = quantifier_match.group()
+
+        tokens.append((kind, pattern[position:end], quantifier))
+        position = end + len(quantifier)
+
+    return tokens
+
+
+def _find_class_end(pattern: str, start: int) -> int:
+    # V1 character classes nest: [[a-z]&&[^aeiou]].
+    depth: int = 0
+    position: int = start
+    while position < len(pattern):
+        char: str = pattern[position]
+        if char == "\\":
+            position += 2
+            continue
+        if char == "[":
+            depth += 1
+            # A "]" right after "[" or "[^" is a literal.
+            if pattern.startswith("^", position + 1):
+                position += 1
+            if pattern.startswith("]", position + 1):
+                position += 1
+        elif char == "]":
+            depth -= 1
+            if depth == 0:
+                return position + 1
+        position += 1
+    return -1
+
+
+def _find_escape_end(pattern: str, start: int) -> int:
+    if start + 1 >= len(pattern):
+        return -1
+
+    char: str = pattern[start + 1]
+
+    if char.isdigit() or char in "gkQE":
+        # Backreferences and block quotes.
+        return -1
+    if char in BRACED_ESCAPES and pattern.startswith("{", start + 2):
+        close: int = pattern.find("}", start + 2)
+        return -1 if close < 0 else close + 1
+    if char in "pP":
+        return start + 3
+    if char in FIXED_ESCAPES:
+        return start + 2 + FIXED_ESCAPES[char]
+    if char in "NRX":
+        return -1
+    return start + 2
+
+
+def _find_group_end(pattern: str, start: int) -> int:
+    depth: int = 0
+    position: int = start
+    while position < len(pattern):
+        char: str = pattern[position]
+        if char == "\\":
+            position += 2
+            continue
+        if char == "[":
+            position = _find_class_end(pattern, position)
+            if position < 0:
+                return -1
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return position + 1
+        position += 1
+    return -1
+
+
+def collect_atoms(tokens: List[Tuple[str, str, str]], atoms: List[str]) -> bool:
+    """
+    Appends every atom that may consume a character, at any nesting level,
+    to atoms. Returns False if the tokens contain an unsupported construct.
+    """
+
+    for kind, text, _ in tokens:
+        if kind == "atom":
+            if text == ".":
+                return False
+            atoms.append(text)
+        elif kind in ("group", "lookaround"):
+            # Strip the group opening ("(", "(?:", "(?<=", ...) and ")".
+            opening: int = 1
+            if text.startswith("(?"):
+                opening = 4 if text.startswith(("(?<=", "(?<!")) else 3
+            inner_tokens = split_tokens(text[opening:-1])
+            if inner_tokens is None or not collect_atoms(inner_tokens, atoms):
+                return False
+    return True
+
+
+def as_class_item(atom: str) -> str:
+    """
+    Returns the atom in a form that can be nested in a V1 character class.
+    """
+    if atom.startswith(("[", "\\")):
+        return atom
+    return re.escape(atom, special_only=False)
+
+
+def classes_intersect(atom: str, other_atoms: List[str], flags: int) -> bool:
+    """
+    Returns true if some character is matched both by atom and by any of
+    other_atoms (tested against every code point).
+    """
+
+    intersection: str = (
+        "[" + as_class_item(atom) + "&&[" + "".join(as_class_item(other) for other in other_atoms) + "]]"
+    )
+    try:
+        intersection_pattern: re.Regex = re.compile(intersection, flags=flags | re.V1)
+    except re.error:
+        return True
+
+    return intersection_pattern.search(all_characters()) is not None
+
+
+def find_first_atom(tokens: List[Tuple[str, str, str]]) -> int:
+    """
+    Returns the index of the token every match of the tokens starts with:
+    a single mandatory character following optional zero-width assertions,
+    or -1 if there is no such token.
+    """
+
+    if any(kind == "alternation" for kind, _, _ in tokens):
+        return -1
+
+    position: int = 0
+    while position < len(tokens) and tokens[position][0] in ("assertion", "lookaround"):
+        if tokens[position][2]:
+            return -1
+        position += 1
+
+    if position == len(tokens):
+        return -1
+
+    kind, atom, quantifier = tokens[position]
+    if kind != "atom" or atom == "." or quantifier not in ("", "{1}"):
+        return -1
+
+    return position
+
+
+def is_self_synchronizing(pattern: str, flags: int) -> bool:
+    """
+    Returns true if no match of the (translated) pattern can start inside
+    another match of it: the pattern begins, after optional zero-width
+    assertions, with a single mandatory character whose class does not
+    intersect any character the rest of the pattern may consume.
+
+    For such patterns Java Matcher.find() visits every position where the
+    pattern matches, so a rule's next hit does not depend on where its
+    search started.
+    """
+
+    tokens = split_tokens(pattern)
+    if tokens is None:
+        return False
+
+    position: int = find_first_atom(tokens)
+    if position < 0:
+        return False
+
+    rest_atoms: List[str] = []
+    if not collect_atoms(tokens[position + 1 :], rest_atoms):
+        return False
+
+    return not rest_atoms or not classes_intersect(tokens[position][1], rest_atoms, flags)
+
+
+def is_scannable(rule: Rule, flags: int) -> bool:
+    """
+    Returns true if the break rule can be matched by RuleScanner without
+    changing the result of Java Matcher.find() iteration.
+    """
+
+    if rule.after_pattern and split_tokens(translate_java_regex(rule.after_pattern)) is None:
+        return False
+
+    if not rule.before_pattern:
+        return True
+
+    return is_self_synchronizing(translate_java_regex(rule.before_pattern), flags)
+
+
+def starts_with_rare_character(rule: Rule, flags: int) -> bool:
+    """
+    Returns true if every match of the scannable rule starts with a
+    character that is not a letter, digit or whitespace. The regex package
+    skips quickly over characters no alternative of a pattern can start
+    with, so only such rules are worth combining into one alternation;
+    a rule starting with e.g. \\p{L} would be tried at almost every
+    position and slow down the whole alternation.
+    """
+
+    tokens = split_tokens(translate_java_regex(rule.before_pattern or rule.after_pattern))
+    if tokens is None:
+        return False
+
+    position: int = find_first_atom(tokens)
+    if position < 0:
+        return False
+
+    return not classes_intersect(tokens[position][1], [r"\p{L}", r"\p{N}", r"\s"], flags)
+
+
+def create_scanner_pattern_string(rule_list: List[Tuple[int, Rule]]) -> str:
+    """
+    Creates an alternation of given break rules in rule order. Each
+    alternative matches the before pattern atomically (as Matcher.find()
+    would) followed by the after pattern in lookahead, and ends with an
+    empty group naming the rule index.
+    """
+
+    alternatives: List[str] = []
+    for index, rule in rule_list:
+        alternative: str = "(?:"
+        if rule.before_pattern:
+            alternative += "(?>" + rule.before_pattern + ")"
+        if rule.after_pattern:
+            alternative += "(?=" + rule.after_pattern + ")"
+        alternative += "(?P<r" + str(index) + ">))"
+        alternatives.append(alternative)
+
+    return "|".join(alternatives)
+
+
+class RuleScanner:
+    """
+    Represents matcher finding break positions of many break rules at once.
+
+    Scannable break rules of a rule manager (see is_scannable) are compiled
+    into combined alternations (lanes, see RuleManager.get_scanner_patterns),
+    so the leftmost break is found by a single search per lane instead of
+    one RuleMatcher.find() per rule. The scanner reproduces the state the
+    individual matchers would be in when driven by SrxTextIterator:
+
+    * after a segment ending at origin is cut, every rule searches from
+      origin (self-synchronizing rules find the same hit whether they were
+      moved or not);
+    * after matchers are moved past threshold, every rule's current hit is
+      its first hit breaking after threshold.
+
+    Hits are kept in a heap keyed by (break position, rule index), which
+    preserves SRX rule order when several rules break at the same position.
+    """
+
+    __slots__ = (
+        "rule_manager",
+        "text",
+        "text_len",
+        "lanes",
+        "cursors",
+        "rule",
+        "threshold",
+        "hits",
+        "_start_position",
+        "_break_position",
+        "concurrent",
+    )
+
+    def __init__(self, rule_manager: "RuleManager", text: str, concurrent: bool = False) -> None:
+        """
+        Creates scanner.
+        rule_manager rule manager providing the scanner patterns
+        text text
+        concurrent release the GIL while matching (regex concurrent=True)
+        """
+
+        self.rule_manager: "RuleManager" = rule_manager
+        self.concurrent: bool = concurrent
+        self.text: str = text
+        self.text_len: int = len(text)
+        self.lanes: List[List[re.Regex]] = rule_manager.get_scanner_patterns()
+        # Every match of a lane starting before its cursor is in hits.
+        self.cursors: List[int] = [0] * len(self.lanes)
+        self.rule: Optional[Rule] = None
+
+        self.threshold: int = -1
+        self.hits: List[Tuple[int, int, int]] = []
+
+        self._start_position: int = 0
+        self._break_position: int = 0
+
+    def find(self) -> bool:
+        """
+        Finds the first hit breaking after threshold.
+        return true if any rule has been matched
+        """
+
+        hits = self.hits
+        text = self.text
+        text_len = self.text_len
+        cursors = self.cursors
+        positions = self.rule_manager.scanner_rule_positions
+
+        while hits and hits[0][0] <= self.threshold:
+            heapq.heappop(hits)
+
+        for lane, patterns in enumerate(self.lanes):
+            # A match starting after the best break cannot break earlier.
+            while cursors[lane] <= (hits[0][0] if hits else text_len):
+                match = patterns[0].search(text, cursors[lane], None, self.concurrent)
+                if match is None:
+                    cursors[lane] = text_len + 1
+                    break
+
+                start: int = match.start()
+                # Other rules may match at the same start; continue with the
+                # alternatives following the one that matched.
+                while match is not None:
+                    index: int = int(match.lastgroup[1:])
+                    if match.end() > self.threshold:
+                        heapq.heappush(hits, (match.end(), index, start))
+                    following: int = positions[index][1] + 1
+                    if following == len(patterns):
+                        break
+                    match = patterns[following].match(text, start, None, self.concurrent)
+
+                cursors[lane] = start + 1
+
+        if not hits:
+            self.rule = None
+            return False
+
+        self._break_position, index, self._start_position = hits[0]
+        self.rule = self.rule_manager.break_rule_list[index]
+        return True
+
+    def cut(self, origin: int) -> None:
+        """
+        Restarts all rules at given position (end of the cut segment).
+        """
+
+        self.hits = [hit for hit in self.hits if hit[2] >= origin]
+        heapq.heapify(self.hits)
+        self.cursors = [max(cursor, origin) for cursor in self.cursors]
+
+    def move(self, threshold: int) -> None:
+        """
+        Moves all rules past given break position.
+        """
+
+        self.threshold = max(self.threshold, threshold)
+
+    def get_key(self) -> Tuple[int, int]:
+        """
+        @return (break position, rule index) of the current hit
+        """
+        return self.hits[0][0], self.hits[0][1]
+
+    def hit_end(self) -> bool:
+        """
+        @return true if no rule has been matched by the last find
+        """
+        return self.rule is None
+
+    def get_start_position(self) -> int:
+        """
+        @return position in text where the current hit starts
+        """
+        return self._start_position
+
+    def get_break_position(self) -> int:
+        """
+        @return position in text where text should be splitted according to current hit
+        """
+        return self._break_position
@@ -0,0 +1,279 @@
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Segmentation daemon: `choppa serve` keeps warmed-up documents (see
+# registry.py) and answers requests on a Unix domain socket, so that short
+# `choppa` runs skip the import, parsing and compilation. This module is
+# also the client: the segmentation modules are imported by the server
+# only, so that the client starts without importing the regex package.
+#
+# Protocol: one JSON object per line in both directions. A request is
+#
+#     {"text": str} | {"path": str} | {"texts": [str, ...]}
+#
+# plus "language" (required), and optionally "srx" (path to the ruleset,
+# the server's default if missing), "iterator" (iterator class name),
+# "mode" ("segments" or "spans"), "buffer_length", "read_ahead" and
+# "max_lookbehind_construct_length". The server answers with any number of
+# {"segments": [...]} lines (or {"spans": [[start, end], ...]}) followed by
+# {"done": true}, or with {"error": str}. With "texts" every item of
+# "segments" is the list of segments of one text. A compressed "path" is
+# decompressed (see compressed.open_file). Requests on one connection are
+# answered in order.
+
+# Items per response line.
+RESPONSE_BATCH: int = 1024
+
+# Longest accepted request line, in bytes.
+MAX_REQUEST_LENGTH: int = 256 * 1024 * 1024
+
+
+class ServerError(Exception):
+    """
+    Error reported by the segmentation daemon for a request.
+    """
+
+
+def get_socket_path() -> str:
+    """
+    @return socket path from CHOPPA_SOCKET, or choppa.sock in the user's
+    runtime directory (a per-user file in the temporary directory if there
+    is none)
+    """
+    path: Optional[str] = os.environ.get("CHOPPA_SOCKET")
+    if path:
+        return path
+
+    runtime_dir: Optional[str] = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "choppa.sock")
+
+    import tempfile
+
+    return os.path.join(tempfile.gettempdir(), f"choppa-{os.getuid()}.sock")
+
+
+def connect(socket_path: str) -> Optional[socket.socket]:
+    """
+    @return connection to the daemon, None if it is not running
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+
+    connection: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+    except OSError:
+        connection.close()
+        return None
+    return connection
+
+
+class Client:
+    """
+    Connection to the segmentation daemon.
+    """
+
+    def __init__(self, connection: socket.socket) -> None:
+        self.connection: socket.socket = connection
+        self.reader = connection.makefile("rb")
+        self.writer = connection.makefile("wb")
+
+    def request(self, request: Dict[str, Any]) -> Iterator[Any]:
+        """
+        Sends a request and reads the answer.
+        @param request request, see the protocol above
+        @return iterator over the items of the answer: segments, spans or
+        segment lists
+        @throws ServerError when the daemon reports an error
+        """
+        self.writer.write(json.dumps(request, ensure_ascii=False).encode() + b"\n")
+        self.writer.flush()
+
+        for line in self.reader:
+            response: Dict[str, Any] = json.loads(line)
+            if "error" in response:
+                raise ServerError(response["error"])
+            if response.get("done"):
+                return
+            yield from response.get("segments", response.get("spans", ()))
+
+        raise ServerError("The daemon closed the connection")
+
+    def close(self) -> None:
+        self.reader.close()
+        self.writer.close()
+        self.connection.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def get_spans(segments: Iterable[str]) -> Iterator[Tuple[int, int]]:
+    # Segments cover the text without gaps, so spans follow from lengths.
+    start: int = 0
+    for segment in segments:
+        yield start, start + len(segment)
+        start += len(segment)
+
+
+def batches(items: Iterable[Any]) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == RESPONSE_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    server: "SegmentationServer"
+
+    def handle(self) -> None:
+        while True:
+            line: bytes = self.rfile.readline(MAX_REQUEST_LENGTH + 1)
+            if not line:
+                return
+            if len(line) > MAX_REQUEST_LENGTH:
+                self.send({"error": f"Request longer than {MAX_REQUEST_LENGTH} bytes"})
+                return
+
+            try:
+                request: Dict[str, Any] = json.loads(line)
+                # Limits the number of requests split at once; the others
+                # wait here, and clients that do not read their answers
+                # block in send, which pauses their segmentation.
+                with self.server.slots:
+                    key: str = "spans" if request.get("mode") == "spans" else "segments"
+                    for batch in batches(self.server.segment(request)):
+                        self.send({key: batch})
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except Exception as exception:
+                self.send({"error": f"{type(exception).__name__}: {exception}"})
+            else:
+                self.send({"done": True})
+
+    def send(self, response: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+
+
+class SegmentationServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, ruleset: Any, workers: int) -> None:
+        """
+        Binds the socket; readable and writable by the current user only,
+        as the server reads files for its clients.
+        @param socket_path path of the socket
+        @param ruleset default SRX file
+        @param workers number of requests split at once
+        """
+        self.ruleset: Any = ruleset
+        self.slots: threading.BoundedSemaphore = threading.BoundedSemaphore(workers)
+
+        umask: int = os.umask(0o177)
+        try:
+            super().__init__(socket_path, RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def segment(self, request: Dict[str, Any]) -> Iterator[Any]:
+        """
+        @param request request, see the protocol above
+        @return iterator over the items of the answer
+        """
+        from .batch import segment_batch
+        from .compressed import open_file
+        from .iterators import ITERATORS, SrxTextIterator
+        from .registry import get_document
+
+        document = get_document(request.get("srx") or self.ruleset)
+        language_code: str = request["language"]
+        iterator_name: str = request.get("iterator", "SrxTextIterator")
+        if iterator_name not in ITERATORS:
+            raise ValueError(f"Unknown iterator {iterator_name!r}")
+        iterator_class = ITERATORS[iterator_name]
+        kwargs: Dict[str, Any] = {
+            name: request[name]
+            for name in ("buffer_length", "read_ahead", "max_lookbehind_construct_length")
+            if name in request
+        }
+        if not issubclass(iterator_class, SrxTextIterator):
+            kwargs.pop("buffer_length", None)
+            kwargs.pop("read_ahead", None)
+        spans: bool = request.get("mode") == "spans"
+
+        if "texts" in request:
+            for segments in segment_batch(document, language_code, request["texts"], iterator_class, **kwargs):
+                yield list(get_spans(segments)) if spans else segments
+            return
+
+        if "path" in request:
+            with open_file(request["path"]) as text_file:
+                text: Any = text_file if issubclass(iterator_class, SrxTextIterator) else text_file.read()
+                segments = iterator_class(document, language_code, text, **kwargs)
+                yield from get_spans(segments) if spans else segments
+            return
+
+        segments = iterator_class(document, language_code, request["text"], **kwargs)
+        yield from get_spans(segments) if spans else segments
+
+
+def serve(socket_path: str, ruleset: Any, language_codes: List[str], workers: int = 4) -> None:
+    """
+    Warms up the documents, then answers requests until interrupted. The
+    socket is only created once the patterns of given languages are
+    compiled, so clients use the daemon only when it is ready.
+    @param socket_path path of the socket
+    @param ruleset default SRX file
+    @param language_codes language codes to warm up
+    @param workers number of requests split at once
+    """
+    from .registry import get_document
+
+    connection: Optional[socket.socket] = connect(socket_path)
+    if connection is not None:
+        connection.close()
+        raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+    # Through the registry, which records the languages the shared document
+    # is warmed up for.
+    started: float = time.perf_counter()
+    document = get_document(ruleset, warm_up=language_codes, scanner=True)
+    if language_codes:
+        print(
+            f"{', '.join(language_codes)}: {document.get_cache_stats()['patterns'].size} patterns compiled"
+            f" in {time.perf_counter() - started:.2f} s",
+            file=sys.stderr,
+        )
+
+    if os.path.exists(socket_path):
+        # Left by a daemon that did not shut down.
+        os.unlink(socket_path)
+
+    import signal
+
+    # Stops serve_forever through KeyboardInterrupt, so that the socket is
+    # removed.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    with SegmentationServer(socket_path, ruleset, workers) as server:
+        print(f"listening on {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
@@ -1,13 +1,16 @@
 import pathlib
+import time
+import threading
 import regex as re  # type: ignore
 from xml.sax.handler import ContentHandler
 from xml.sax import parse as sax_parse
 
-from typing import Union, Dict, List, Optional
-import xmlschema  # type: ignore
+from typing import Iterable, Union, Dict, List, Optional, Set, Tuple
 
-from .structures import Rule, LanguageRule, LanguageMap
+from .structures import Rule, LanguageRule, LanguageMap, WarmUpReport, CacheStats
+from .cache import LruCache
 from .rule_manager import RuleManager
+from . import plan as segmentation_plan
 from .utils import translate_java_regex
 
 
@@ -25,6 +28,10 @@ class SrxDocument:
         ruleset: Union[pathlib.Path, None, str] = None,
         validate_ruleset: Union[pathlib.Path, None, str] = None,
         pattern_flags: int = 0,
+        plan_cache: Union[pathlib.Path, bool, str] = True,
+        languages: Optional[Iterable[str]] = None,
+        max_patterns: Optional[int] = None,
+        max_rule_managers: Optional[int] = None,
     ) -> None:
         """
         Creates empty document.
@@ -35,22 +42,68 @@ class SrxDocument:
             (analog of segment 2.0.4 defaultPatternFlags). For example,
             pass regex.M to make ^-anchored rules match at line starts
             (pre-1.0 choppa behavior, diverges from Java).
+        plan_cache True to load the ruleset from a plan file next to it
+            (<name>.plan.json, shipped for the bundled rules) instead of
+            parsing it, a directory to also load plans from and save them
+            to there, False to always parse (see plan.py)
+        languages language codes to keep the rules of (see retain_languages),
+            None to keep all
+        max_patterns maximum number of compiled patterns to keep, the least
+            recently used ones are evicted; None for no limit
+        max_rule_managers maximum number of rule managers to keep, likewise
         """
         self.cascade = cascade
         self.pattern_flags: int = self.BASE_PATTERN_FLAGS | pattern_flags
         self.language_map_list: List[LanguageMap] = []
-        self.regex_cache: Dict[str, re.Regex] = {}
-        self.rule_manager_cache: Dict[str, RuleManager] = {}
+        self.regex_cache: LruCache = LruCache(max_patterns)
+        self.rule_manager_cache: LruCache = LruCache(max_rule_managers)
+        # Compilation times logged by warm_up, per thread identifier.
+        self.compile_logs: Dict[int, List[Tuple[float, str]]] = {}
         # Keyed by (language_code, cascade); cleared when a map is added.
         self.language_rule_cache: Dict[tuple, List[LanguageRule]] = {}
+        # Language codes the document was restricted to, None if all.
+        self.language_codes: Optional[Set[str]] = None
 
         if ruleset is not None:
             if validate_ruleset is not None:
+                # Imported here: xmlschema takes longer to import than the
+                # rest of choppa and is only needed for validation.
+                import xmlschema  # type: ignore
+
                 schema: xmlschema.XMLSchema = xmlschema.XMLSchema(str(validate_ruleset))
 
                 schema.validate(str(ruleset))
 
-            sax_parse(str(ruleset), SRXHandler(document=self))
+            if plan_cache is False:
+                sax_parse(str(ruleset), SRXHandler(document=self))
+            else:
+                self.load(ruleset, None if plan_cache is True else pathlib.Path(plan_cache))
+
+            if languages is not None:
+                self.retain_languages(languages)
+
+    def load(self, ruleset: Union[pathlib.Path, str], plan_dir: Optional[pathlib.Path]) -> None:
+        # Loads the ruleset from the first current plan found, or parses it
+        # and saves its plan to plan_dir.
+        ruleset_hash: str = segmentation_plan.get_ruleset_hash(ruleset)
+        for path in segmentation_plan.get_plan_paths(ruleset, ruleset_hash, plan_dir):
+            plan = segmentation_plan.load_plan(path, ruleset_hash)
+            if plan is not None:
+                segmentation_plan.apply_plan(self, plan)
+                return
+
+        sax_parse(str(ruleset), SRXHandler(document=self))
+
+        if plan_dir is not None:
+            try:
+                segmentation_plan.save_plan(
+                    segmentation_plan.get_cache_path(plan_dir, ruleset_hash),
+                    segmentation_plan.create_plan(self, ruleset_hash),
+                )
+            except OSError:
+                # The plan only saves time: the parsed document is used
+                # without it if plan_dir is not writable.
+                pass
 
     def add_language_map(self, pattern: str, language_rule: LanguageRule) -> None:
         """
@@ -59,33 +112,150 @@ class SrxDocument:
         self.language_map_list.append(LanguageMap(pattern, language_rule))
         self.language_rule_cache.clear()
 
+    def retain_languages(self, language_codes: Iterable[str]) -> None:
+        """
+        Removes language maps not used by any of given language codes, so
+        that language rules only other languages cascade into can be freed.
+        Rules of other language codes cannot be retrieved afterwards.
+        @param language_codes language codes to keep the rules of
+        """
+        self.language_codes = set(language_codes)
+
+        used: Set[int] = set()
+        for language_code in self.language_codes:
+            for index, language_map in enumerate(self.language_map_list):
+                if language_map.matches(language_code):
+                    used.add(index)
+                    if not self.cascade:
+                        break
+
+        self.language_map_list = [
+            language_map for index, language_map in enumerate(self.language_map_list) if index in used
+        ]
+        self.language_rule_cache.clear()
+
     def compile(self, regex: str) -> re.Regex:
         """
         Compiles given pattern as regex.Regex (V1), caches it
         """
-        key: str = f"PATTERN_{self.pattern_flags}_{regex}"
-
-        pattern: Optional[re.Regex] = self.regex_cache.get(key, None)
+        # Keyed by the pattern string alone: the flags are the same for
+        # all patterns of the document.
+        pattern: Optional[re.Regex] = self.regex_cache.get(regex)
 
         if pattern is None:
-            pattern = re.compile(translate_java_regex(regex), flags=self.pattern_flags)
-            self.regex_cache[key] = pattern
+            pattern = self.regex_cache.put(regex, self.compile_pattern(regex))
 
         return pattern
 
+    def compile_pattern(self, regex: str) -> re.Regex:
+        started: float = time.perf_counter()
+        pattern: re.Regex = re.compile(translate_java_regex(regex), flags=self.pattern_flags)
+        compile_log: Optional[List[Tuple[float, str]]] = self.compile_logs.get(threading.get_ident())
+        if compile_log is not None:
+            compile_log.append((time.perf_counter() - started, regex))
+        return pattern
+
+    def warm_up(
+        self,
+        language_codes: Iterable[str],
+        max_lookbehind_construct_length: int = 100,
+        scanner: bool = False,
+        slowest: int = 5,
+    ) -> List[WarmUpReport]:
+        """
+        Compiles in advance every pattern splitting text in given languages
+        needs: exception patterns and break rule patterns, and optionally
+        the combined patterns of CombinedSrxTextIterator, so that the first
+        text of every language is not delayed by compilation.
+        @param language_codes language codes to warm up
+        @param max_lookbehind_construct_length as passed to the iterators
+        @param scanner also compile the CombinedSrxTextIterator patterns
+        @param slowest number of slowest patterns to report per language
+        @return report for every language code
+        """
+
+        reports: List[WarmUpReport] = []
+
+        for language_code in language_codes:
+            started: float = time.perf_counter()
+            times: List[Tuple[float, str]] = []
+            self.compile_logs[threading.get_ident()] = times
+            try:
+                rule_manager: RuleManager = self.get_rule_manager(
+                    self.get_language_rule_list(language_code), max_lookbehind_construct_length
+                )
+                for rule in rule_manager.break_rule_list:
+                    self.compile(rule.before_pattern)
+                    self.compile(rule.after_pattern)
+                if scanner:
+                    rule_manager.get_scanner_patterns()
+            finally:
+                del self.compile_logs[threading.get_ident()]
+
+            reports.append(
+                WarmUpReport(
+                    language_code,
+                    time.perf_counter() - started,
+                    len(times),
+                    sorted(times, reverse=True)[:slowest],
+                )
+            )
+
+        return reports
+
     def get_rule_manager(
         self, language_rule_list: List[LanguageRule], max_lookbehind_construct_length: int
     ) -> RuleManager:
-        key: str = f"RULE_MANAGER_{language_rule_list}_{max_lookbehind_construct_length}"
+        # Fingerprints are computed once per language rule, so the key
+        # costs a tuple of a few strings, however many rules there are.
+        key: Tuple[Tuple[str, ...], int] = (
+            tuple([language_rule.get_fingerprint() for language_rule in language_rule_list]),
+            max_lookbehind_construct_length,
+        )
 
-        rule_manager: Optional[RuleManager] = self.rule_manager_cache.get(key, None)
+        rule_manager: Optional[RuleManager] = self.rule_manager_cache.get(key)
 
         if rule_manager is None:
-            rule_manager = RuleManager(self, language_rule_list, max_lookbehind_construct_length)
-            self.rule_manager_cache[key] = rule_manager
+            rule_manager = self.rule_manager_cache.put(
+                key, RuleManager(self, language_rule_list, max_lookbehind_construct_length)
+            )
 
         return rule_manager
 
+    def get_cache_stats(self) -> Dict[str, CacheStats]:
+        """
+        @return statistics of the "patterns" and "rule_managers" caches
+        """
+        return {
+            "patterns": self.regex_cache.get_stats(),
+            "rule_managers": self.rule_manager_cache.get_stats(),
+        }
+
+    def unload(self, language_code: str) -> int:
+        """
+        Drops the cached rule managers of given language code and the
+        compiled patterns no other cached rule manager uses, e.g. to free
+        memory in a long-running process that no longer splits the
+        language. They are built again if the language is used afterwards;
+        iterators already created keep working.
+        @param language_code language code to unload
+        @return number of patterns dropped
+        """
+        fingerprints: Tuple[str, ...] = tuple(
+            language_rule.get_fingerprint() for language_rule in self.get_language_rule_list(language_code)
+        )
+
+        unloaded: List[RuleManager] = self.rule_manager_cache.remove(lambda key, _: key[0] == fingerprints)
+
+        kept: Set[str] = set()
+        for rule_manager in self.rule_manager_cache.values():
+            kept.update(rule_manager.get_pattern_strings())
+
+        unused: Set[str] = {
+            regex for rule_manager in unloaded for regex in rule_manager.get_pattern_strings() if regex not in kept
+        }
+        return len(self.regex_cache.remove(lambda key, _: key in unused))
+
     def get_language_rule_list(self, language_code: str) -> List[LanguageRule]:
         """
         If cascade is true then returns all language rules matching given
@@ -103,6 +273,9 @@ class SrxDocument:
         if cached is not None:
             return cached
 
+        if self.language_codes is not None and language_code not in self.language_codes:
+            raise ValueError(f"Rules of language {language_code!r} were not retained")
+
         matching_language_rule_list: List[LanguageRule] = []
         for language_map in self.language_map_list:
             if language_map.matches(language_code):
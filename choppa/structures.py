@@ -1,5 +1,7 @@
+import hashlib
+import json
 import regex as re  # type: ignore
-from typing import NamedTuple, List, Optional
+from typing import NamedTuple, List, Optional, Tuple
 
 
 class Rule(NamedTuple):
@@ -8,20 +10,100 @@ class Rule(NamedTuple):
     after_pattern: str
 
 
+class WarmUpReport(NamedTuple):
+    # Result of SrxDocument.warm_up for one language code: time spent,
+    # number of patterns compiled for it (patterns shared with languages
+    # warmed up before are not compiled again) and the slowest ones as
+    # (seconds, pattern) pairs.
+    language_code: str
+    seconds: float
+    pattern_count: int
+    slowest: List[Tuple[float, str]]
+
+
+class WorkerStats(NamedTuple):
+    # Startup report of a SegmenterPool worker: seconds from the creation
+    # of the pool until the worker was ready, resident set size and the
+    # part of it not shared with other processes (None if unknown), in
+    # bytes.
+    pid: int
+    startup_seconds: float
+    rss: int
+    private: Optional[int]
+
+
+class FileResult(NamedTuple):
+    # Result of splitting one file (see pool.segment_file): input size in
+    # bytes, number of segments written, seconds spent and the error
+    # message, None if the file was split.
+    input_path: str
+    output_path: str
+    size: int
+    segments: int
+    seconds: float
+    error: Optional[str]
+
+
+class ShiftStats(NamedTuple):
+    # Buffer shifts of a streaming iterator (see
+    # SrxTextIterator.get_shift_stats): number of shifts and number of
+    # characters carried over from the previous buffer by them.
+    shift_count: int
+    copied_length: int
+
+
+class CacheStats(NamedTuple):
+    # Counters of an SrxDocument cache (see SrxDocument.get_cache_stats);
+    # max_size is None if the cache is unbounded.
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: Optional[int]
+
+
 class LanguageRule:
     def __init__(self, name: str, rules: Optional[List[Rule]] = None):
         self.name: str = name
         self.rules: List[Rule] = []
         if rules is not None:
             self.rules = rules[:]
+        # Computed on first use, see get_fingerprint.
+        self.fingerprint: Optional[str] = None
 
     def add_rule(self, rule: Rule) -> None:
         self.rules.append(rule)
+        self.fingerprint = None
+
+    def get_fingerprint(self) -> str:
+        """
+        Rules should only be added with add_rule, so that the fingerprint
+        stays current.
+        @return SHA-256 of the rules (not of the name); equal for language
+        rules with the same rules, in any process
+        """
+        if self.fingerprint is None:
+            content: str = json.dumps(self.rules, ensure_ascii=False, separators=(",", ":"))
+            self.fingerprint = hashlib.sha256(content.encode()).hexdigest()
+        return self.fingerprint
 
     def __str__(self) -> str:
         return f"<{self.name}>: {len(self.rules)}"
 
 
+def get_fingerprint(language_rule_list: List[LanguageRule]) -> str:
+    """
+    @param language_rule_list language rules, as returned by
+    SrxDocument.get_language_rule_list
+    @return SHA-256 of the rules of given language rules, in order; usable
+    as a key of caches shared by processes or stored on disk
+    """
+    digest = hashlib.sha256()
+    for language_rule in language_rule_list:
+        digest.update(language_rule.get_fingerprint().encode())
+    return digest.hexdigest()
+
+
 class LanguageMap:
     """
     Represents mapping between language code pattern and language rule.
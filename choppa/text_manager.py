@@ -1,5 +1,10 @@
+import codecs
+import collections
 import io
-from typing import Optional
+import queue
+import threading
+import weakref
+from typing import Any, Callable, Deque, List, Optional
 
 
 class TextManager:
@@ -13,6 +18,7 @@ class TextManager:
         text: Optional[str] = None,
         reader: Optional[io.TextIOBase] = None,
         buffer_length: Optional[int] = None,
+        partial_reads: bool = False,
     ) -> None:
 
         """
@@ -22,12 +28,23 @@ class TextManager:
         @param text
         @param reader
         @param buffer_length read buffer size
+        @param partial_reads reader returns whatever text is available, so
+            a short read does not mean the end of the text (an empty one does)
+            and the current text can be shorter than buffer size
         """
 
         self.next_character: str = ""
         self.buffer_length: int = 0
         self.reader: Optional[io.TextIOBase] = None
+        self.partial_reads: bool = partial_reads
         self.text_initialized: bool = False
+        # Buffer shift statistics: number of shifts and number of characters
+        # carried over from the previous buffer. Reading more text without
+        # deleting any (partial reads) is not a shift.
+        self.shift_count: int = 0
+        self.copied_length: int = 0
+        # Position of the current text in the whole text read so far.
+        self.offset: int = 0
 
         # Decide on not initialied texts
         self.text: str = ""
@@ -62,38 +79,44 @@ class TextManager:
     def read_text(self, amount: int) -> None:
         """
         Deletes given amount of characters from current character buffer and
-        tries to read up to given amount of new characters and stores them in
-        current character buffer.
-        @param amount amount of characters to read
+        tries to fill the character buffer up to its size with new characters.
+        With partial reads the buffer may not be full, and amount can be zero
+        to just read more text.
+        @param amount amount of characters to delete
         @throws AssertionError if self.has_more_text returns False or amount is greater than buffer size
         """
         self.init_text()
 
-        assert amount > 0, "Amount must be positive."
+        assert amount > 0 or len(self.text) < self.buffer_length, "Amount must be positive."
         assert amount <= self.buffer_length, "Amount to read is larger than buffer size."
         assert self.has_more_text(), "No more text to read."
 
-        self.text = (
-            # Text length is equal to buffer size so it is safe.
-            self.text[amount:]
-            +
-            # Next character cannot be null here, so it is safe.
-            self.next_character
-            + self.read(amount)
-        )
+        # Next character cannot be null here, so it is safe.
+        text: str = self.text[amount:] + self.next_character
+        # Without partial reads the text length is equal to buffer size, so
+        # exactly amount characters are read. Read first, so that a failed
+        # read (see TextNotAvailable) leaves the text unchanged.
+        text += self.read(self.buffer_length + 1 - len(text))
+
+        if amount > 0:
+            self.shift_count += 1
+            self.copied_length += len(self.text) - amount
+        self.offset += amount
+        self.text = text
 
     def init_text(self) -> None:
         """
         Reads initial text from reader if it has not been initialized yet.
         """
         if not self.text_initialized:
-            self.text_initialized = True
             self.text = self.read(self.buffer_length + 1)
+            self.text_initialized = True
 
     def read(self, amount: int) -> str:
         """
         Reads the given amount of characters and returns them as a string.
-        Updates next_character by reading one additional character.
+        Updates next_character by reading one additional character. With
+        partial reads the last character read is held back as the next one.
         @param amount amount to be read
         @return read characters as a string
         """
@@ -103,7 +126,7 @@ class TextManager:
         result: str = self.reader.read(amount)
         count: int = len(result)
 
-        if count == amount:
+        if count == amount or (self.partial_reads and count > 0):
             self.next_character = result[-1]
             result = result[:-1]
         elif count > 0 and count < amount:
@@ -140,3 +163,242 @@ class TextManager:
 #     }
 
 # }
+
+
+class AvailableTextReader:
+    # Represents reader returning whatever text is available, at least one
+    # character unless at the end, instead of waiting for the whole amount;
+    # used as the TextManager reader with partial reads for pipes and
+    # terminals. Newlines are translated like in text mode.
+
+    def __init__(
+        self,
+        stream: io.BufferedIOBase,
+        encoding: str = "utf-8",
+        before_read: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Creates reader decoding bytes from given stream.
+        @param stream binary stream with read1(), e.g. sys.stdin.buffer
+        @param encoding text encoding
+        @param before_read called before every read that may wait for input,
+            e.g. to flush the output
+        """
+        self.stream: io.BufferedIOBase = stream
+        self.decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+        self.before_read: Optional[Callable[[], None]] = before_read
+        # Decoded text that did not fit in the previous read.
+        self.pending: str = ""
+
+    def read(self, amount: int) -> str:
+        """
+        Reads at most given amount of characters, waiting only until some are
+        available.
+        @param amount amount of characters to read
+        @return read characters, empty at the end of the text
+        """
+        text: str = self.pending
+        if not text:
+            if self.before_read is not None:
+                self.before_read()
+
+            while True:
+                data: bytes = self.stream.read1(amount)
+                text = self.decoder.decode(data, final=not data)
+                if text or not data:
+                    break
+
+        # A character takes at least one byte, but a held back carriage
+        # return can make it one more.
+        self.pending = text[amount:]
+        return text[:amount]
+
+
+class TextNotAvailable(Exception):
+    # Raised by TextQueue when more text is read than has been appended. The
+    # text manager is left unchanged, so the read can be retried once more
+    # text is appended.
+    pass
+
+
+class TextQueue:
+    # Represents reader of text appended to it by the caller, used as the
+    # TextManager reader when the text is pushed (or awaited) instead of read.
+    # Reading more text than available is only possible after the queue has
+    # been closed, otherwise it raises TextNotAvailable. A read copies only
+    # the characters it returns: chunks are kept as appended, and `head` is
+    # the position of the next character in the first one.
+
+    def __init__(self) -> None:
+        self.chunks: Deque[str] = collections.deque()
+        self.head: int = 0
+        self.length: int = 0
+        self.closed: bool = False
+
+    def append(self, text: str) -> None:
+        """
+        Appends text to the end of the queue.
+        @param text text
+        """
+        assert not self.closed, "Queue is closed."
+        if text:
+            self.chunks.append(text)
+            self.length += len(text)
+
+    def close(self) -> None:
+        """
+        Marks the end of the text: no more text can be appended.
+        """
+        self.closed = True
+
+    def available(self) -> int:
+        """
+        @return number of characters that can be read
+        """
+        return self.length
+
+    def read(self, amount: int) -> str:
+        """
+        Reads given amount of characters, less only at the end of the text.
+        @param amount amount of characters to read
+        @return read characters
+        @throws TextNotAvailable if the queue is not closed and holds less
+        """
+        if not self.closed and self.length < amount:
+            raise TextNotAvailable
+
+        parts: List[str] = []
+        amount = min(amount, self.length)
+        self.length -= amount
+        while amount > 0:
+            chunk: str = self.chunks[0]
+            end: int = self.head + amount
+            if end < len(chunk):
+                parts.append(chunk[self.head : end])
+                self.head = end
+                break
+            parts.append(chunk[self.head :] if self.head else chunk)
+            amount -= len(chunk) - self.head
+            self.chunks.popleft()
+            self.head = 0
+        return "".join(parts)
+
+
+class ReadAheadReader:
+    # Represents reader reading another reader in a background thread, so
+    # that reading the next chunk (from a slow disk, a network or a
+    # decompressor) overlaps with splitting the text read before. At most
+    # `chunks` chunks wait to be read and one more is being read, so memory
+    # stays bounded; with one chunk of the buffer size it is double
+    # buffering. The thread stops at the end of the text, on an error, and
+    # when the reader is closed or garbage collected.
+
+    def __init__(
+        self,
+        read: Callable[[int], Any],
+        chunk_length: int,
+        chunks: int = 1,
+        close: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Creates reader and starts reading.
+        @param read function reading at most given amount of characters (or
+            bytes), empty at the end only, e.g. reader.read
+        @param chunk_length amount read at once
+        @param chunks number of chunks read ahead
+        @param close called once the reader is closed and the thread has
+            stopped, e.g. to close the underlying stream
+        """
+        # Chunks read ahead, then an empty one at the end of the text or
+        # the exception raised by read.
+        waiting: "queue.Queue[Any]" = queue.Queue(chunks)
+        self.chunks: "queue.Queue[Any]" = waiting
+        # Chunk being read and position in it.
+        self.chunk: Any = ""
+        self.position: int = 0
+        self.finished: bool = False
+
+        closing: threading.Event = threading.Event()
+        stopped: threading.Event = threading.Event()
+        lock: threading.Lock = threading.Lock()
+
+        def stop() -> None:
+            # Whichever of the reader and the thread stops last calls close.
+            with lock:
+                closing.set()
+                if stopped.is_set() and close is not None:
+                    close()
+
+        def put(item: Any) -> None:
+            while not closing.is_set():
+                try:
+                    waiting.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def read_ahead() -> None:
+            # Does not refer to the reader, so that it can be collected.
+            try:
+                while not closing.is_set():
+                    chunk: Any = read(chunk_length)
+                    put(chunk)
+                    if not chunk:
+                        return
+            except BaseException as exception:
+                put(exception)
+            finally:
+                with lock:
+                    stopped.set()
+                    if closing.is_set() and close is not None:
+                        close()
+
+        self.closer = weakref.finalize(self, stop)
+        self.thread: threading.Thread = threading.Thread(target=read_ahead, name="choppa-read-ahead", daemon=True)
+        self.thread.start()
+
+    def read_chunk(self, amount: int) -> Any:
+        """
+        Reads at most given amount of characters (or bytes), waiting only if
+        none are read ahead.
+        @param amount amount to read
+        @return read characters, empty at the end of the text
+        @throws the exception raised by the wrapped reader
+        """
+        if self.position == len(self.chunk):
+            if self.finished:
+                return self.chunk[:0]
+            item: Any = self.chunks.get()
+            if isinstance(item, BaseException):
+                self.finished = True
+                raise item
+            self.chunk = item
+            self.position = 0
+            if not item:
+                self.finished = True
+                return item
+
+        chunk: Any = self.chunk[self.position : self.position + amount]
+        self.position += len(chunk)
+        return chunk
+
+    def read(self, amount: int) -> str:
+        """
+        Reads given amount of characters, less only at the end of the text.
+        @param amount amount of characters to read
+        @return read characters
+        """
+        parts: List[str] = []
+        while amount > 0:
+            chunk: str = self.read_chunk(amount)
+            if not chunk:
+                break
+            parts.append(chunk)
+            amount -= len(chunk)
+        return parts[0] if len(parts) == 1 else "".join(parts)
+
+    def close(self) -> None:
+        """
+        Stops reading ahead.
+        """
+        self.closer()
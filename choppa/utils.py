@@ -1,4 +1,24 @@
 import regex as re  # type: ignore
+from typing import Any, Optional
+
+
+class LazyPattern:
+    # Pattern compiled on first use, so that importing choppa does not pay
+    # for compiling helper patterns. Attributes are those of the compiled
+    # regex.Regex.
+
+    __slots__ = ("pattern", "flags", "compiled")
+
+    def __init__(self, pattern: str, flags: int = 0) -> None:
+        self.pattern: str = pattern
+        self.flags: int = flags
+        self.compiled: Optional[re.Regex] = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self.compiled is None:
+            self.compiled = re.compile(self.pattern, self.flags)
+        return getattr(self.compiled, name)
+
 
 # Java-only regex constructs that have to be translated before a rule
 # pattern can be compiled by the regex package. The \\. alternative
@@ -15,7 +35,7 @@ import regex as re  # type: ignore
 # (?U) is Java's UNICODE_CHARACTER_CLASS inline flag (used by LanguageTool
 # rules to fix the JDK >= 19 \b regression); Python character classes are
 # Unicode-aware by default for str patterns, so the flag is dropped.
-JAVA_CONSTRUCT_PATTERN: re.Regex = re.compile(r"\\h|\\v|\\.|\(\?U\)")
+JAVA_CONSTRUCT_PATTERN: LazyPattern = LazyPattern(r"\\h|\\v|\\.|\(\?U\)")
 JAVA_CONSTRUCT_REPLACEMENTS = {
     r"\h": r"\p{H}",
     r"\v": r"\p{V}",
@@ -34,10 +54,10 @@ def translate_java_regex(pattern: str) -> str:
     )
 
 
-STAR_PATTERN: re.Regex = re.compile("(?<=(?<!\\\\)(?:\\\\\\\\){0,100})\\*")
-PLUS_PATTERN: re.Regex = re.compile("(?<=(?<!\\\\)(?:\\\\\\\\){0,100})(?<![\\?\\*\\+]|\\{[0-9],?[0-9]?\\}?\\})\\+")
-RANGE_PATTERN: re.Regex = re.compile("(?<=(?<!\\\\)(?:\\\\\\\\){0,100})\\{\\s*([0-9]+)\\s*,\\s*\\}")
-CAPTURING_GROUP_PATTERN: re.Regex = re.compile("(?<=(?<!\\\\)(?:\\\\\\\\){0,100})\\((?!\\?)")
+STAR_PATTERN: LazyPattern = LazyPattern("(?<=(?<!\\\\)(?:\\\\\\\\){0,100})\\*")
+PLUS_PATTERN: LazyPattern = LazyPattern("(?<=(?<!\\\\)(?:\\\\\\\\){0,100})(?<![\\?\\*\\+]|\\{[0-9],?[0-9]?\\}?\\})\\+")
+RANGE_PATTERN: LazyPattern = LazyPattern("(?<=(?<!\\\\)(?:\\\\\\\\){0,100})\\{\\s*([0-9]+)\\s*,\\s*\\}")
+CAPTURING_GROUP_PATTERN: LazyPattern = LazyPattern("(?<=(?<!\\\\)(?:\\\\\\\\){0,100})\\((?!\\?)")
 
 
 def remove_block_quotes(pattern: str) -> str:
@@ -18,39 +18,279 @@ Reference numbers for six corpora (uk news x3, English novels x3,
 ~136,000 segments, all byte-identical to Java) are in the README's
 "Performance and verification" section. Corpus files must use LF line
 endings: Java does not normalize CRLF, Python's read_text does.
+
+Compressed corpora (.gz, .bz2, .xz, .zst, or detected by content) are
+decompressed on the fly; the streaming segmentation is then also timed
+with decompression inline and in a background thread.
 """
 
 import argparse
+import io
+import json
+import os
+import subprocess
 import sys
 import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from choppa import DEFAULT_SRX_RULESET, SrxDocument
-from choppa.iterators import ITERATORS
+from choppa import DEFAULT_SRX_RULESET, SrxDocument, segment_batch
+from choppa.compressed import detect_compression, get_compression, open_file
+from choppa.iterators import ITERATORS, SrxTextIterator
+from choppa.output import FORMATS, SegmentWriter
+from choppa.parallel import CHUNKS_PER_JOB, MIN_CHUNK_LENGTH, ChunkWorker, find_seams, segment_parallel
+
+# Run in a fresh interpreter by --startup: import, document creation and
+# splitting of one short text, in seconds.
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from choppa import SrxDocument, SrxTextIterator
+imported = time.perf_counter()
+document = SrxDocument(ruleset=sys.argv[1], plan_cache=sys.argv[3] == "plan")
+loaded = time.perf_counter()
+list(SrxTextIterator(document, sys.argv[2], "Перше речення. Second sentence."))
+done = time.perf_counter()
+print(json.dumps([imported - started, loaded - imported, done - loaded]))
+"""
+
+
+# Slow sources simulated by --read-ahead: characters per second and
+# seconds of latency per started block of THROTTLE_BLOCK characters.
+THROTTLES = {"network": (1e6, 0.02), "slow disk": (4e6, 0.008)}
+THROTTLE_BLOCK = 64 * 1024
+
+# Buffer length of the --read-ahead runs, so that even a small corpus
+# takes several reads.
+READ_AHEAD_BUFFER_LENGTH = 64 * 1024
+
+
+class ThrottledReader:
+    # Stand-in for a slow disk or network: every read sleeps for the
+    # transfer time and the latency of the blocks read. Like blocking I/O,
+    # time.sleep releases the GIL.
+
+    def __init__(self, text: str, bandwidth: float, latency: float) -> None:
+        self.stream = io.StringIO(text)
+        self.bandwidth = bandwidth
+        self.latency = latency
+
+    def read(self, amount: int) -> str:
+        text = self.stream.read(amount)
+        blocks = -(-len(text) // THROTTLE_BLOCK)
+        time.sleep(blocks * self.latency + len(text) / self.bandwidth)
+        return text
+
+
+def measure_startup(srx: Path, language: str, mode: str, repeat: int = 5) -> list:
+    # Best of repeat runs of STARTUP_SCRIPT, per phase.
+    runs = [
+        json.loads(
+            subprocess.run(
+                [sys.executable, "-c", STARTUP_SCRIPT, str(srx), language, mode],
+                check=True,
+                capture_output=True,
+                text=True,
+                cwd=Path(__file__).parent.parent,
+            ).stdout
+        )
+        for _ in range(repeat)
+    ]
+    return [min(phase) for phase in zip(*runs)]
+
+
+def measure_command(arguments: list, text: str, repeat: int = 5) -> float:
+    # Best wall time of repeat runs of python with given arguments.
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable] + arguments,
+            check=True,
+            capture_output=True,
+            input=text,
+            text=True,
+            cwd=Path(__file__).parent.parent,
+        )
+        runs.append(time.perf_counter() - started)
+    return min(runs)
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
-    parser.add_argument("corpus", type=Path)
+    parser.add_argument("corpus", type=Path, nargs="?")
     parser.add_argument("--language", default="uk_two")
     parser.add_argument("--srx", type=Path, default=DEFAULT_SRX_RULESET)
     parser.add_argument("--iterator", choices=sorted(ITERATORS), default="SrxTextIterator")
     parser.add_argument("--out", type=Path, help="write segments separated by \\x01")
     parser.add_argument("--java", type=Path, help="Java segment output (\\x01-separated) to diff against")
+    parser.add_argument("--spans", action="store_true", help="also time (start, end) offsets via spans()")
+    parser.add_argument(
+        "--threads", type=int, help="also time segment_batch over the corpus lines with 1..N worker threads"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="also time segment_parallel with N processes, and the CPU time of its chunks "
+        "(the work divided among the processes)",
+    )
+    parser.add_argument(
+        "--read-ahead",
+        action="store_true",
+        help="time streaming from throttled readers (network and slow-disk stand-ins) "
+        "with and without read-ahead",
+    )
+    parser.add_argument(
+        "--output",
+        action="store_true",
+        help="time formatting and writing the segments in every CLI --format, apart from "
+        "segmentation, then the CLI end to end per format",
+    )
+    parser.add_argument(
+        "--startup",
+        action="store_true",
+        help="time import, document creation and first segmentation in a fresh process, "
+        "parsing the SRX file (cold) and loading its plan (warm), and the CLI",
+    )
     args = parser.parse_args()
 
+    if args.startup:
+        for mode, label in (("parse", "cold"), ("plan", "warm")):
+            imported, loaded, first = measure_startup(args.srx, args.language, mode)
+            print(
+                f"{label} ({mode}): import {imported * 1000:.0f} ms, document {loaded * 1000:.0f} ms, "
+                f"first segmentation {first * 1000:.0f} ms"
+            )
+        empty = measure_command(["-c", "pass"], "")
+        print(f"python startup: {empty * 1000:.0f} ms")
+        print(f"choppa --help: {measure_command(['-m', 'choppa', '--help'], '') * 1000:.0f} ms")
+        sentence = measure_command(["-m", "choppa", "-l", args.language, "-s", str(args.srx)], "Перше речення.\n")
+        print(f"choppa, one sentence: {sentence * 1000:.0f} ms")
+        if args.corpus is None:
+            return 0
+
+    if args.corpus is None:
+        parser.error("corpus is required")
+
     document = SrxDocument(ruleset=args.srx)
-    text = args.corpus.read_text(encoding="utf-8")
+    with open_file(args.corpus) as corpus:
+        text = corpus.read()
+
+    mb = len(text.encode("utf-8")) / 1e6
 
     started = time.perf_counter()
     segments = list(ITERATORS[args.iterator](document, args.language, text))
     elapsed = time.perf_counter() - started
 
-    mb = len(text.encode("utf-8")) / 1e6
     print(f"{len(segments)} segments in {elapsed:.2f}s ({mb / elapsed:.2f} MB/s)")
 
+    with open(args.corpus, "rb") as corpus:
+        compression = get_compression(args.corpus) or detect_compression(corpus)
+    if compression is not None and issubclass(ITERATORS[args.iterator], SrxTextIterator):
+        started = time.perf_counter()
+        with open_file(args.corpus, threaded=False) as corpus:
+            while corpus.read(1024 * 1024):
+                pass
+        elapsed = time.perf_counter() - started
+        print(f"{compression} decompression alone: {elapsed:.2f}s ({mb / elapsed:.2f} MB/s)")
+        for threaded, label in ((False, "inline"), (True, "background thread")):
+            started = time.perf_counter()
+            with open_file(args.corpus, threaded=threaded) as corpus:
+                count = sum(1 for _ in ITERATORS[args.iterator](document, args.language, corpus))
+            elapsed = time.perf_counter() - started
+            print(f"streamed from {compression}, {label}: {count} segments in {elapsed:.2f}s ({mb / elapsed:.2f} MB/s)")
+
+    if args.spans:
+        started = time.perf_counter()
+        spans = list(ITERATORS[args.iterator](document, args.language, text).spans())
+        elapsed = time.perf_counter() - started
+        print(f"{len(spans)} spans in {elapsed:.2f}s ({mb / elapsed:.2f} MB/s)")
+
+    if args.jobs and issubclass(ITERATORS[args.iterator], SrxTextIterator):
+        iterator_class = ITERATORS[args.iterator]
+        # Work of the processes, measured in this one: every chunk, seam
+        # checks included; a chunk whose seam is not confirmed is wasted.
+        seams = find_seams(text, min(args.jobs * CHUNKS_PER_JOB, len(text) // MIN_CHUNK_LENGTH))
+        ChunkWorker.init(document, args.language, text, seams, iterator_class, {})
+        started = time.process_time()
+        for index in range(len(seams)):
+            ChunkWorker.segment(index)
+        work = time.process_time() - started
+        started = time.process_time()
+        list(iterator_class(document, args.language, text))
+        sequential = time.process_time() - started
+        print(
+            f"{len(seams)} chunks: {work:.2f}s CPU, sequential {sequential:.2f}s CPU "
+            f"({sequential / (work / args.jobs):.1f}x faster with {args.jobs} cores)"
+        )
+        started = time.perf_counter()
+        parallel = list(segment_parallel(document, args.language, text, args.jobs, iterator_class))
+        elapsed = time.perf_counter() - started
+        print(
+            f"segment_parallel, {args.jobs} processes on {os.cpu_count()} CPUs: {elapsed:.2f}s "
+            f"({mb / elapsed:.2f} MB/s){'' if parallel == segments else ', segments differ'}"
+        )
+
+    if args.read_ahead and issubclass(ITERATORS[args.iterator], SrxTextIterator):
+        for name, (bandwidth, latency) in THROTTLES.items():
+            started = time.perf_counter()
+            reader = ThrottledReader(text, bandwidth, latency)
+            while reader.read(READ_AHEAD_BUFFER_LENGTH):
+                pass
+            reading = time.perf_counter() - started
+            timings = []
+            for read_ahead in (False, True):
+                started = time.perf_counter()
+                streamed = list(
+                    ITERATORS[args.iterator](
+                        document,
+                        args.language,
+                        ThrottledReader(text, bandwidth, latency),
+                        buffer_length=READ_AHEAD_BUFFER_LENGTH,
+                        read_ahead=read_ahead,
+                    )
+                )
+                timings.append(time.perf_counter() - started)
+                if streamed != segments:
+                    print(f"{name}: streamed segments differ (read_ahead={read_ahead})")
+            print(
+                f"{name} ({bandwidth / 1e6:g} M chars/s, {latency * 1000:g} ms per block): reading alone "
+                f"{reading:.2f}s, streaming {timings[0]:.2f}s, with read-ahead {timings[1]:.2f}s "
+                f"({1 - timings[1] / timings[0]:.0%} less)"
+            )
+
+    if args.output:
+        # Writing only: the segments are already split.
+        with open(os.devnull, "w", encoding="utf-8") as sink:
+            started = time.perf_counter()
+            for segment in segments:
+                print(segment, file=sink)
+            elapsed = time.perf_counter() - started
+            print(f"output print(): {elapsed:.2f}s ({mb / elapsed:.2f} MB/s)")
+            for output_format in FORMATS:
+                writer = SegmentWriter(sink, output_format)
+                started = time.perf_counter()
+                writer.write_all(segments)
+                writer.flush()
+                elapsed = time.perf_counter() - started
+                print(f"output {output_format}: {elapsed:.2f}s ({mb / elapsed:.2f} MB/s)")
+        # Reading, segmentation and writing to a pipe.
+        for output_format in FORMATS:
+            arguments = ["-m", "choppa", "--no-daemon", "-l", args.language, "-s", str(args.srx.resolve())]
+            arguments += ["-i", args.iterator, "--format", output_format, str(args.corpus.resolve())]
+            elapsed = measure_command(arguments, "", repeat=1)
+            print(f"choppa --format {output_format}: {elapsed:.2f}s end to end ({mb / elapsed:.2f} MB/s)")
+
+    if args.threads:
+        lines = text.splitlines(keepends=True)
+        for workers in range(1, args.threads + 1):
+            started = time.perf_counter()
+            for _ in segment_batch(document, args.language, lines, ITERATORS[args.iterator], workers=workers):
+                pass
+            elapsed = time.perf_counter() - started
+            print(f"{workers} thread(s): {len(lines)} lines in {elapsed:.2f}s ({mb / elapsed:.2f} MB/s)")
+
     if args.out:
         args.out.write_text("\x01".join(segments) + "\x01", encoding="utf-8")
 
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Write the segmentation plan of an SRX file next to it (<name>.plan.json),
+so that SrxDocument loads it instead of parsing the XML. Run after every
+update of the bundled rules:
+
+    python scripts/build_plan.py choppa/data/srx/languagetool_segment.srx
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from choppa import DEFAULT_SRX_RULESET, SrxDocument
+from choppa.plan import create_plan, get_plan_paths, get_ruleset_hash, save_plan
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("srx", type=Path, nargs="?", default=DEFAULT_SRX_RULESET)
+    args = parser.parse_args()
+
+    ruleset_hash = get_ruleset_hash(args.srx)
+    path = get_plan_paths(args.srx, ruleset_hash, None)[0]
+    save_plan(path, create_plan(SrxDocument(ruleset=args.srx, plan_cache=False), ruleset_hash))
+    print(f"{path} ({path.stat().st_size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Write a copy of an SRX file with only the language maps and language rules
+used by the given language codes, for workers that split one language:
+
+    python scripts/trim_srx.py choppa/data/srx/languagetool_segment.srx -l uk_two -o uk.srx
+
+The header is kept; comments are dropped. Segmenting with the trimmed file
+gives the same output for the given codes.
+"""
+
+import argparse
+import sys
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+from typing import List, Set
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from choppa import DEFAULT_SRX_RULESET
+from choppa.structures import LanguageMap
+
+SRX_NAMESPACE = "http://www.lisa.org/srx20"
+NAMESPACES = {"": SRX_NAMESPACE, "okpsrx": "http://okapi.sf.net/srx-extensions"}
+
+
+def trim(tree: ElementTree.ElementTree, language_codes: List[str]) -> ElementTree.ElementTree:
+    # Removes the language maps not used by any of given codes, as
+    # SrxDocument.retain_languages does, and the rules no map refers to.
+    root = tree.getroot()
+    tag = "{%s}%%s" % SRX_NAMESPACE
+    cascade: bool = root.find(tag % "header").get("cascade") == "yes"
+
+    map_rules = root.find(f"{tag % 'body'}/{tag % 'maprules'}")
+    language_maps = map_rules.findall(tag % "languagemap")
+    used: Set[int] = set()
+    for language_code in language_codes:
+        for index, element in enumerate(language_maps):
+            if LanguageMap(element.get("languagepattern"), None).matches(language_code):  # type: ignore
+                used.add(index)
+                if not cascade:
+                    break
+
+    names: Set[str] = set()
+    for index, element in enumerate(language_maps):
+        if index in used:
+            names.add(element.get("languagerulename"))
+        else:
+            map_rules.remove(element)
+
+    language_rules = root.find(f"{tag % 'body'}/{tag % 'languagerules'}")
+    for element in language_rules.findall(tag % "languagerule"):
+        if element.get("languagerulename") not in names:
+            language_rules.remove(element)
+
+    return tree
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("srx", type=Path, nargs="?", default=DEFAULT_SRX_RULESET)
+    parser.add_argument("-l", "--language", action="append", required=True, help="language code; repeatable")
+    parser.add_argument("-o", "--out", type=Path, required=True)
+    args = parser.parse_args()
+
+    for prefix, uri in NAMESPACES.items():
+        ElementTree.register_namespace(prefix, uri)
+
+    tree = trim(ElementTree.parse(args.srx), args.language)
+    tree.write(args.out, encoding="UTF-8", xml_declaration=True)
+    print(f"{args.out} ({args.out.stat().st_size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
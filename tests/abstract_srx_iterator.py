@@ -59,6 +59,11 @@ class AbstractSrxTextIterator(unittest.TestCase):
 
         self.assertEqual(expected_result, segments)
 
+        # Iterators that report segment offsets must agree with the segments.
+        if hasattr(text_iterator, "spans"):
+            spans_iterator = self.get_text_iterator(document, language_code, text)
+            self.assertEqual(expected_result, [text[start:end] for start, end in spans_iterator.spans()])
+
     def get_text_iterator(self, document: SrxDocument, language_code: str, text: str) -> AbstractTextIterator:
         raise NotImplementedError
 
@@ -0,0 +1,119 @@
+import asyncio
+import io
+import unittest
+from typing import List
+
+from choppa.iterators import AbstractTextIterator, AsyncSrxTextIterator, SrxTextIterator
+from choppa.srx_parser import SrxDocument
+
+from .abstract_srx_iterator import AbstractSrxTextIterator
+from .conftest import get_document
+from .test_incremental_srx_iterator import LimitedReader
+
+
+class ChunkReader:
+    # Async reader returning at most chunk_length characters at a time.
+
+    def __init__(self, text: str, chunk_length: int) -> None:
+        self.text: str = text
+        self.chunk_length: int = chunk_length
+
+    async def read(self, amount: int) -> str:
+        await asyncio.sleep(0)
+        result: str = self.text[: min(amount, self.chunk_length)]
+        self.text = self.text[len(result) :]
+        return result
+
+
+class OpenReader(ChunkReader):
+    # Chunk reader of a text that is not known to end, raising EOFError once
+    # it is read to the end.
+
+    async def read(self, amount: int) -> str:
+        if not self.text:
+            raise EOFError
+        return await super().read(amount)
+
+
+async def collect(iterator: AsyncSrxTextIterator) -> List[str]:
+    return [segment async for segment in iterator]
+
+
+class AsyncSrxTextIteratorTest(AbstractSrxTextIterator):
+    """
+    Streaming suite with the same buffer and margin as
+    SrxTextIteratorReaderTest, text arriving in 7-character chunks.
+    """
+
+    __test__ = True
+
+    BUFFER_SIZE: int = 60
+    MARGIN: int = 10
+
+    TEXT_LONGER_THAN_BUFFER_RESULT = ["AAAAAAAAA." for _ in range(200)]
+
+    def get_text_iterator(self, document: SrxDocument, language_code: str, text: str) -> AbstractTextIterator:
+        iterator = AsyncSrxTextIterator(
+            document,
+            language_code,
+            ChunkReader(text, 7),
+            buffer_length=self.BUFFER_SIZE,
+            margin=self.MARGIN,
+        )
+        return iter(asyncio.run(collect(iterator)))  # type: ignore
+
+    def test_stream_reader_bytes(self) -> None:
+        text: str = "Перше речення. Друге речення! Третє? " * 20
+
+        async def run() -> List[str]:
+            reader = asyncio.StreamReader()
+            data: bytes = text.encode("utf-8")
+            # Split inside multi-byte characters.
+            for start in range(0, len(data), 5):
+                reader.feed_data(data[start : start + 5])
+            reader.feed_eof()
+            return await collect(
+                AsyncSrxTextIterator(get_document(), "uk_two", reader, buffer_length=100, margin=10)
+            )
+
+        expected: List[str] = list(
+            SrxTextIterator(get_document(), "uk_two", io.StringIO(text), buffer_length=100, margin=10)
+        )
+        self.assertEqual(expected, asyncio.run(run()))
+
+    def test_loaded_buffer(self) -> None:
+        # Every segment found without reading past the text read so far is
+        # returned before the reader is awaited again.
+        text: str = "Перше речення. Друге речення! Третє? " * 20
+
+        async def run(iterator: AsyncSrxTextIterator) -> List[str]:
+            segments: List[str] = []
+            try:
+                async for segment in iterator:
+                    segments.append(segment)
+            except EOFError:
+                pass
+            return segments
+
+        for length in range(101, len(text), 13):
+            with self.subTest(length=length):
+                iterator = AsyncSrxTextIterator(
+                    get_document(), "uk_two", OpenReader(text[:length], 30), buffer_length=100, margin=10
+                )
+                segments: List[str] = asyncio.run(run(iterator))
+
+                expected: List[str] = []
+                reader: LimitedReader = LimitedReader(text[:length])
+                streaming = SrxTextIterator(get_document(), "uk_two", reader, buffer_length=100, margin=10)  # type: ignore
+                try:
+                    for segment in streaming:
+                        expected.append(segment)
+                except EOFError:
+                    pass
+                self.assertTrue(expected)
+                self.assertEqual(expected, segments)
+
+    def test_buffer_too_short(self) -> None:
+        iterator = AsyncSrxTextIterator(get_document(), "uk_two", ChunkReader("А" * 100, 30), buffer_length=20, margin=5)
+        with self.assertRaises(Exception):
+            asyncio.run(collect(iterator))
@@ -0,0 +1,89 @@
+import io
+import sys
+import threading
+import unittest
+from typing import List
+
+from choppa import DEFAULT_SRX_RULESET, SrxDocument, segment_batch
+from choppa.iterators import ITERATORS, CombinedSrxTextIterator, SrxTextIterator
+from choppa.rule_manager import RuleManager
+
+from .conftest import get_document
+
+
+class SegmentBatchTest(unittest.TestCase):
+    TEXTS: List[str] = [
+        "Це речення. А це інше! Третє?",
+        "",
+        "Проф. Іваненко каже так. Добре.",
+        "Одне речення без крапки",
+        "Ще одне. І ще.",
+    ]
+
+    def test_matches_iterator_per_text(self) -> None:
+        document = get_document()
+        for name, iterator_class in ITERATORS.items():
+            with self.subTest(iterator=name):
+                expected = [list(iterator_class(document, "uk_two", text)) for text in self.TEXTS]
+                self.assertEqual(expected, list(segment_batch(document, "uk_two", self.TEXTS, iterator_class)))
+
+    def test_threads(self) -> None:
+        document = get_document()
+        texts: List[str] = self.TEXTS * 50
+        for name, iterator_class in ITERATORS.items():
+            with self.subTest(iterator=name):
+                expected = list(segment_batch(document, "uk_two", texts, iterator_class))
+                self.assertEqual(expected, list(segment_batch(document, "uk_two", texts, iterator_class, workers=3)))
+                self.assertEqual(expected[:5], list(segment_batch(document, "uk_two", self.TEXTS, iterator_class, workers=2)))
+
+    def test_threads_cold_document(self) -> None:
+        def get_rule_manager(document: SrxDocument) -> RuleManager:
+            return document.get_rule_manager(document.get_language_rule_list("uk_two"), 100)
+
+        expected: RuleManager = get_rule_manager(SrxDocument(ruleset=DEFAULT_SRX_RULESET))
+        expected.get_scanner_patterns()
+        sizes: List[int] = [len(expected.matcher_rule_list), len(expected.scanner_rule_list)]
+
+        switch_interval: float = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            document: SrxDocument = SrxDocument(ruleset=DEFAULT_SRX_RULESET)
+            texts: List[str] = self.TEXTS * 200
+            list(segment_batch(document, "uk_two", texts, CombinedSrxTextIterator, workers=8))
+            rule_manager: RuleManager = get_rule_manager(document)
+            self.assertEqual(sizes, [len(rule_manager.matcher_rule_list), len(rule_manager.scanner_rule_list)])
+
+            # Rule managers shared by threads without warming up.
+            rule_manager = get_rule_manager(SrxDocument(ruleset=DEFAULT_SRX_RULESET))
+            threads: List[threading.Thread] = [
+                threading.Thread(target=rule_manager.get_scanner_patterns) for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        self.assertEqual(sizes, [len(rule_manager.matcher_rule_list), len(rule_manager.scanner_rule_list)])
+        self.assertEqual(len(expected.scanner_pattern_strings), len(rule_manager.scanner_pattern_strings))
+
+    def test_empty_batch(self) -> None:
+        self.assertEqual([], list(segment_batch(get_document(), "uk_two", [])))
+        self.assertEqual([], list(segment_batch(get_document(), "uk_two", [], workers=2)))
+
+    def test_reset_after_partial_iteration(self) -> None:
+        iterator = SrxTextIterator(get_document(), "uk_two", "Перше. Друге. Третє.")
+        self.assertEqual("Перше. ", next(iterator))
+
+        iterator.reset("Ось. Так.")
+        self.assertEqual(["Ось. ", "Так."], list(iterator))
+
+    def test_reset_to_reader(self) -> None:
+        text = "Перше речення. Друге речення. " * 10
+        iterator = SrxTextIterator(get_document(), "uk_two", "Ось.", buffer_length=100, margin=10)
+        self.assertEqual(["Ось."], list(iterator))
+        self.assertEqual(0, iterator.margin)
+
+        iterator.reset(io.StringIO(text))
+        self.assertEqual(10, iterator.margin)
+        self.assertEqual(list(SrxTextIterator(get_document(), "uk_two", text)), list(iterator))
@@ -0,0 +1,49 @@
+import pickle
+import unittest
+from typing import Any
+
+from choppa.cache import LruCache
+from choppa.structures import CacheStats
+
+
+def get(cache: LruCache, key: Any, value: Any) -> Any:
+    cached: Any = cache.get(key)
+    return cache.put(key, value) if cached is None else cached
+
+
+class LruCacheTest(unittest.TestCase):
+    def test_eviction(self) -> None:
+        cache: LruCache = LruCache(2)
+        self.assertEqual("a", get(cache, 1, "a"))
+        self.assertEqual("b", get(cache, 2, "b"))
+        # 1 is used again, so 2 is the least recently used.
+        self.assertEqual("a", get(cache, 1, "x"))
+        self.assertEqual("c", get(cache, 3, "c"))
+
+        self.assertEqual(["a", "c"], cache.values())
+        self.assertEqual(CacheStats(1, 3, 1, 2, 2), cache.get_stats())
+        self.assertEqual("y", get(cache, 2, "y"))
+
+    def test_unbounded(self) -> None:
+        cache: LruCache = LruCache()
+        for key in range(100):
+            get(cache, key, str(key))
+        self.assertEqual(CacheStats(0, 100, 0, 100, None), cache.get_stats())
+
+    def test_remove(self) -> None:
+        cache: LruCache = LruCache()
+        for key in range(5):
+            get(cache, key, str(key))
+        self.assertEqual(["1", "3"], cache.remove(lambda key, _: key % 2))
+        self.assertEqual(["0", "2", "4"], cache.values())
+
+    def test_pickle(self) -> None:
+        cache: LruCache = LruCache(3)
+        get(cache, "a", 1)
+        copy: LruCache = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(1, get(copy, "a", 2))
+        self.assertEqual(CacheStats(1, 1, 0, 1, 3), copy.get_stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
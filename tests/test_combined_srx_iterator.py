@@ -0,0 +1,36 @@
+import io
+
+from choppa.iterators import CombinedSrxTextIterator, AbstractTextIterator
+from choppa.srx_parser import SrxDocument
+
+from .abstract_srx_iterator import AbstractSrxTextIterator
+
+
+class CombinedSrxTextIteratorTest(AbstractSrxTextIterator):
+    __test__ = True
+
+    def get_text_iterator(self, document: SrxDocument, language_code: str, text: str) -> AbstractTextIterator:
+        return CombinedSrxTextIterator(document, language_code, text)
+
+
+class CombinedSrxTextIteratorReaderTest(AbstractSrxTextIterator):
+    """
+    Streaming variant of the suite, same buffer and margin as
+    SrxTextIteratorReaderTest.
+    """
+
+    __test__ = True
+
+    BUFFER_SIZE: int = 60
+    MARGIN: int = 10
+
+    TEXT_LONGER_THAN_BUFFER_RESULT = ["AAAAAAAAA." for _ in range(200)]
+
+    def get_text_iterator(self, document: SrxDocument, language_code: str, text: str) -> AbstractTextIterator:
+        return CombinedSrxTextIterator(
+            document,
+            language_code,
+            io.StringIO(text),
+            buffer_length=self.BUFFER_SIZE,
+            margin=self.MARGIN,
+        )
@@ -0,0 +1,121 @@
+import gzip
+import io
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List
+
+from choppa.compressed import (
+    COMPRESSIONS,
+    ThreadedReader,
+    compressing,
+    detect_compression,
+    get_compression,
+    open_file,
+    open_input,
+    open_output,
+)
+
+CORPUS: Path = Path(__file__).parent / "data" / "ci_corpus" / "uk_wikipedia.txt"
+
+
+def get_compressions() -> List[str]:
+    # Zstandard only where Python or the zstandard package supports it.
+    try:
+        compressing(io.BytesIO(), "zstd")
+    except ImportError:
+        return COMPRESSIONS[:-1]
+    return COMPRESSIONS
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    stream: io.BytesIO = io.BytesIO()
+    with compressing(stream, compression) as compressed:
+        compressed.write(data)
+    return stream.getvalue()
+
+
+class FailingStream(io.RawIOBase):
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray) -> int:
+        raise OSError("disk error")
+
+
+class CompressedTest(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        text: str = CORPUS.read_text(encoding="utf-8")
+        for compression in get_compressions():
+            for threaded in (True, False):
+                with self.subTest(compression=compression, threaded=threaded):
+                    stream: io.BytesIO = io.BytesIO()
+                    with open_output(stream, compression) as output:
+                        output.write(text)
+                    self.assertFalse(stream.closed)
+
+                    data: io.BufferedReader = io.BufferedReader(io.BytesIO(stream.getvalue()))
+                    self.assertEqual(compression, detect_compression(data))
+                    with open_input(data, compression, threaded=threaded) as decompressed:
+                        self.assertEqual(text, decompressed.read())
+
+    def test_detect(self) -> None:
+        self.assertEqual("gzip", get_compression("corpus.TXT.GZ"))
+        self.assertEqual("zstd", get_compression(Path("a/b.zst")))
+        self.assertIsNone(get_compression("corpus.txt"))
+
+        for text in ("Речення.", "BZh, not bzip2", ""):
+            self.assertIsNone(detect_compression(io.BufferedReader(io.BytesIO(text.encode()))))
+        self.assertEqual("bz2", detect_compression(io.BufferedReader(io.BytesIO(compress(b"", "bz2")))))
+
+    def test_open_file(self) -> None:
+        text: str = "Перше речення.\nДруге речення.\n"
+        with tempfile.TemporaryDirectory() as directory:
+            # Detected by the extension or, without one, by the content.
+            for name in ("text.txt", "text.gz", "text"):
+                path: Path = Path(directory) / name
+                path.write_bytes(text.encode() if name == "text.txt" else gzip.compress(text.encode()))
+                with open_file(path) as text_file:
+                    self.assertEqual(text, text_file.read())
+
+    def test_threaded_reader(self) -> None:
+        data: bytes = bytes(range(256)) * 1000
+        reader: ThreadedReader = ThreadedReader(io.BytesIO(data), chunk_size=1000, chunks=2)
+        self.assertEqual(data, io.BufferedReader(reader).read())
+        # The stream is read ahead by at most two chunks (and one that
+        # waits to be queued) of unread data.
+        stream: io.BytesIO = io.BytesIO(data)
+        reader = ThreadedReader(stream, chunk_size=1000, chunks=2)
+        self.assertEqual(data[:10], reader.read(10))
+        reader.reader.thread.join(0.5)
+        self.assertLessEqual(stream.tell(), 4000)
+        reader.close()
+        # Closed by the thread once it stops waiting to queue a chunk.
+        reader.reader.thread.join()
+        self.assertTrue(stream.closed)
+
+        with self.assertRaisesRegex(OSError, "disk error"):
+            io.BufferedReader(ThreadedReader(FailingStream())).read()
+
+    def test_cli(self) -> None:
+        text: str = CORPUS.read_text(encoding="utf-8")[:20000]
+        expected: bytes = subprocess.run(
+            [sys.executable, "-m", "choppa", "--no-daemon"], input=text.encode(), capture_output=True, check=True
+        ).stdout
+        for compression in get_compressions():
+            with self.subTest(compression=compression):
+                # Decompressed from stdin, compressed to stdout.
+                result = subprocess.run(
+                    [sys.executable, "-m", "choppa", "--no-daemon", "--compress", compression],
+                    input=compress(text.encode(), compression),
+                    capture_output=True,
+                    check=True,
+                )
+                with open_input(io.BufferedReader(io.BytesIO(result.stdout)), compression) as output:
+                    self.assertEqual(expected.decode(), output.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import io
+from typing import List
+
+from choppa.iterators import AbstractTextIterator, IncrementalSrxTextIterator, SrxTextIterator
+from choppa.srx_parser import SrxDocument
+
+from .abstract_srx_iterator import AbstractSrxTextIterator
+from .conftest import get_document
+
+
+class LimitedReader:
+    # Reader of a text that is not known to end, raising EOFError on a read
+    # past it.
+
+    def __init__(self, text: str) -> None:
+        self.text: str = text
+        self.position: int = 0
+
+    def read(self, amount: int) -> str:
+        if self.position + amount > len(self.text):
+            raise EOFError
+        result: str = self.text[self.position : self.position + amount]
+        self.position += amount
+        return result
+
+
+class IncrementalSrxTextIteratorTest(AbstractSrxTextIterator):
+    """
+    Streaming suite with the same buffer and margin as
+    SrxTextIteratorReaderTest, text fed in 7-character chunks.
+    """
+
+    __test__ = True
+
+    BUFFER_SIZE: int = 60
+    MARGIN: int = 10
+
+    TEXT_LONGER_THAN_BUFFER_RESULT = ["AAAAAAAAA." for _ in range(200)]
+
+    def get_text_iterator(self, document: SrxDocument, language_code: str, text: str) -> AbstractTextIterator:
+        iterator = IncrementalSrxTextIterator(document, language_code, buffer_length=self.BUFFER_SIZE, margin=self.MARGIN)
+        segments: List[str] = []
+        for start in range(0, len(text), 7):
+            segments.extend(iterator.feed(text[start : start + 7]))
+        segments.extend(iterator.close())
+        return iter(segments)  # type: ignore
+
+    def test_final_segments(self) -> None:
+        text: str = "Перше речення. Друге речення! Третє? " * 20
+        iterator = IncrementalSrxTextIterator(get_document(), "uk_two", buffer_length=100, margin=10)
+
+        segments: List[str] = iterator.feed(text[:100])
+        self.assertEqual([], segments)
+        for start in range(100, len(text), 50):
+            segments.extend(iterator.feed(text[start : start + 50]))
+            self.assertLessEqual(iterator.text_queue.available(), 100 + 50)
+        self.assertTrue(segments)
+        segments.extend(iterator.close())
+
+        expected: List[str] = list(
+            SrxTextIterator(get_document(), "uk_two", io.StringIO(text), buffer_length=100, margin=10)
+        )
+        self.assertEqual(expected, segments)
+        self.assertEqual([], iterator.close())
+
+    def test_loaded_buffer(self) -> None:
+        # Every segment found without reading past the text fed so far is
+        # returned by feed().
+        text: str = "Перше речення. Друге речення! Третє? " * 20
+        for length in range(101, len(text), 13):
+            with self.subTest(length=length):
+                iterator = IncrementalSrxTextIterator(get_document(), "uk_two", buffer_length=100, margin=10)
+                segments: List[str] = iterator.feed(text[:length])
+
+                expected: List[str] = []
+                reader: LimitedReader = LimitedReader(text[:length])
+                streaming = SrxTextIterator(get_document(), "uk_two", reader, buffer_length=100, margin=10)  # type: ignore
+                try:
+                    for segment in streaming:
+                        expected.append(segment)
+                except EOFError:
+                    pass
+                self.assertTrue(expected)
+                self.assertEqual(expected, segments)
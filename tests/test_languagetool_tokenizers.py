@@ -15,6 +15,7 @@ from pathlib import Path
 from typing import List
 
 from choppa import SrxTextIterator
+from choppa.iterators import CombinedSrxTextIterator
 
 from .conftest import get_document
 
@@ -23,6 +24,7 @@ DATA_DIR = Path(__file__).parent / "data" / "lt"
 
 class LanguageToolTokenizerTest(unittest.TestCase):
     maxDiff = None
+    ITERATOR = SrxTextIterator
 
     def run_language(self, fixture_path: Path) -> None:
         fixture = json.loads(fixture_path.read_text(encoding="utf-8"))
@@ -34,7 +36,7 @@ class LanguageToolTokenizerTest(unittest.TestCase):
             text = "".join(expected)
             with self.subTest(case=i, text=text[:80]):
                 segments = list(
-                    SrxTextIterator(document, language + case["mode"], text)
+                    self.ITERATOR(document, language + case["mode"], text)
                 )
                 self.assertEqual(expected, segments)
 
@@ -48,3 +50,7 @@ def _make_test(path: Path):
 
 for _path in sorted(DATA_DIR.glob("*.json")):
     setattr(LanguageToolTokenizerTest, f"test_{_path.stem}", _make_test(_path))
+
+
+class CombinedLanguageToolTokenizerTest(LanguageToolTokenizerTest):
+    ITERATOR = CombinedSrxTextIterator
@@ -0,0 +1,78 @@
+import gzip
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from choppa.__main__ import DEFAULT_BUFFER_LENGTH, DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH, ITERATOR_NAMES
+from choppa.iterators import ITERATORS, AbstractTextIterator
+
+CORPUS = Path(__file__).parent / "data" / "ci_corpus" / "uk_wikipedia.txt"
+
+
+class CliTest(unittest.TestCase):
+    def test_mirrors(self) -> None:
+        # The CLI parses its arguments without importing the iterators.
+        self.assertEqual(sorted(ITERATORS), ITERATOR_NAMES)
+        self.assertEqual(AbstractTextIterator.DEFAULT_BUFFER_LENGTH, DEFAULT_BUFFER_LENGTH)
+        self.assertEqual(
+            AbstractTextIterator.DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH, DEFAULT_MAX_LOOKBEHIND_CONSTRUCT_LENGTH
+        )
+
+    def test_directory(self) -> None:
+        text: str = CORPUS.read_text(encoding="utf-8")
+        with tempfile.TemporaryDirectory() as directory:
+            input_dir: Path = Path(directory) / "in"
+            (input_dir / "nested").mkdir(parents=True)
+            (input_dir / "a.txt").write_text(text[:20000], encoding="utf-8")
+            (input_dir / "nested" / "b.txt").write_text(text[20000:23000], encoding="utf-8")
+            (input_dir / "skipped.md").write_text("Ні.", encoding="utf-8")
+
+            output_dir: Path = input_dir / "out"
+            result = subprocess.run(
+                [sys.executable, "-m", "choppa", "--input-dir", str(input_dir), "--glob", "**/*.txt"]
+                + ["--output-dir", str(output_dir), "-j", "2", "--report", str(Path(directory) / "report.tsv")],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+            )
+            self.assertEqual(0, result.returncode, result.stderr)
+            self.assertIn("2 files, 0 failed", result.stderr)
+
+            for name in ("a.txt", "nested/b.txt"):
+                expected: str = subprocess.run(
+                    [sys.executable, "-m", "choppa", "--no-daemon", str(input_dir / name)],
+                    capture_output=True,
+                    text=True,
+                    encoding="utf-8",
+                    check=True,
+                ).stdout
+                self.assertEqual(expected, (output_dir / name).read_text(encoding="utf-8"))
+            self.assertEqual(3, len((Path(directory) / "report.tsv").read_text(encoding="utf-8").splitlines()))
+
+    def test_directory_same_output(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            input_dir: Path = Path(directory) / "in"
+            input_dir.mkdir()
+            (input_dir / "a.txt").write_text("Раз. Два.", encoding="utf-8")
+            with gzip.open(input_dir / "a.txt.gz", "wt", encoding="utf-8") as gzip_file:
+                gzip_file.write("Три.")
+            (input_dir / "b.txt").write_text("Чотири.", encoding="utf-8")
+
+            output_dir: Path = Path(directory) / "out"
+            result = subprocess.run(
+                [sys.executable, "-m", "choppa", "--input-dir", str(input_dir), "--glob", "*"]
+                + ["--output-dir", str(output_dir)],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+            )
+            self.assertEqual(1, result.returncode, result.stderr)
+            self.assertIn("3 files, 2 failed", result.stderr)
+            self.assertIn("a.txt.gz: same output file as", result.stderr)
+            self.assertEqual(["b.txt"], [path.name for path in output_dir.iterdir()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import io
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from typing import List
+
+from choppa import DEFAULT_SRX_RULESET
+from choppa.iterators import SrxTextIterator
+from choppa.output import FORMATS, SegmentWriter
+from choppa.srx_parser import SrxDocument
+
+SEGMENTS: List[str] = ["Перше \"речення\". ", "Друге\tз\\табом\r\n", "Третє."]
+
+
+def write(output_format: str, segments: List[str]) -> str:
+    stream: io.StringIO = io.StringIO()
+    writer: SegmentWriter = SegmentWriter(stream, output_format)
+    writer.write_all(segments)
+    writer.flush()
+    return stream.getvalue()
+
+
+class SegmentWriterTest(unittest.TestCase):
+    def test_formats(self) -> None:
+        self.assertEqual("".join(segment + "\n" for segment in SEGMENTS), write("lines", SEGMENTS))
+        self.assertEqual(SEGMENTS, write("nul", SEGMENTS).split("\0")[:-1])
+        self.assertEqual("0\t17\n17\t32\n32\t38\n", write("offsets", SEGMENTS))
+        self.assertEqual("1\t17\t32\tДруге\\tз\\\\табом\\r\\n", write("tsv", SEGMENTS).split("\n")[1])
+
+        lines: List[str] = write("jsonl", SEGMENTS).split("\n")
+        self.assertEqual("", lines.pop())
+        for index, (line, segment) in enumerate(zip(lines, SEGMENTS)):
+            record = json.loads(line)
+            self.assertEqual(segment, record["text"])
+            self.assertEqual(index, record["index"])
+            self.assertEqual(segment, "".join(SEGMENTS)[record["start"] : record["end"]])
+            self.assertEqual(json.dumps(record, ensure_ascii=False), line)
+
+        with self.assertRaises(ValueError):
+            SegmentWriter(io.StringIO(), "xml")
+
+    def test_reset(self) -> None:
+        stream: io.StringIO = io.StringIO()
+        writer: SegmentWriter = SegmentWriter(stream, "tsv")
+        writer.write_all(["Раз. ", "Два."])
+        writer.reset()
+        writer.write("Три.")
+        writer.flush()
+        self.assertEqual("0\t0\t5\tРаз. \n1\t5\t9\tДва.\n2\t0\t4\tТри.\n", stream.getvalue())
+
+    def test_buffer(self) -> None:
+        stream: io.StringIO = io.StringIO()
+        writer: SegmentWriter = SegmentWriter(stream, "lines", buffer_size=10)
+        writer.write("Раз. ")
+        self.assertEqual("", stream.getvalue())
+        writer.write("Два. ")
+        self.assertEqual("Раз. \nДва. \n", stream.getvalue())
+        writer.write("Три.")
+        writer.flush()
+        self.assertEqual("Раз. \nДва. \nТри.\n", stream.getvalue())
+
+        stream = io.StringIO()
+        writer = SegmentWriter(stream, "nul", buffer_size=0)
+        writer.write("Раз.")
+        self.assertEqual("Раз.\0", stream.getvalue())
+
+    def test_cli(self) -> None:
+        corpus: Path = Path(__file__).parent / "data" / "ci_corpus" / "uk_wikipedia.txt"
+        text: str = corpus.read_text(encoding="utf-8")[:5000]
+        expected: List[str] = list(SrxTextIterator(SrxDocument(ruleset=DEFAULT_SRX_RULESET), "uk_two", text))
+        for output_format in FORMATS:
+            output: bytes = subprocess.run(
+                [sys.executable, "-m", "choppa", "--no-daemon", "--format", output_format],
+                input=text.encode(),
+                capture_output=True,
+                check=True,
+            ).stdout
+            self.assertEqual(write(output_format, expected), output.decode(), output_format)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from pathlib import Path
+from typing import List
+
+from choppa.iterators import CombinedSrxTextIterator, SrxTextIterator
+from choppa.parallel import SEARCH_WINDOW, ChunkWorker, find_seams, segment_parallel, split
+from choppa.srx_parser import SrxDocument
+from choppa.structures import LanguageRule, Rule
+
+from .conftest import get_document
+
+CORPUS = Path(__file__).parent / "data" / "ci_corpus" / "uk_wikipedia.txt"
+
+
+class SegmentParallelTest(unittest.TestCase):
+    def segment_in_process(self, document: SrxDocument, text: str, seams: List[int], iterator_class=SrxTextIterator):
+        ChunkWorker.init(document, "", text, seams, iterator_class, {})
+        results = [ChunkWorker.segment(index) for index in range(len(seams))]
+        return results, list(split(text, iter(results), seams))
+
+    def test_find_seams(self) -> None:
+        text: str = "Перше.\nДруге.\n\nТретє.\nЧетверте."
+        seams: List[int] = find_seams(text, 3)
+        self.assertEqual(0, seams[0])
+        self.assertEqual(sorted(set(seams)), seams)
+        self.assertTrue(all(text[seam - 1] == "\n" for seam in seams[1:]))
+        self.assertEqual([0], find_seams("Один рядок.", 4))
+
+    def test_same_as_sequential(self) -> None:
+        document: SrxDocument = get_document()
+        text: str = CORPUS.read_text(encoding="utf-8")[:100000]
+        expected: List[str] = list(SrxTextIterator(document, "uk_two", text))
+
+        for iterator_class in (SrxTextIterator, CombinedSrxTextIterator):
+            with self.subTest(iterator=iterator_class.__name__):
+                ChunkWorker.init(document, "uk_two", text, find_seams(text, 6), iterator_class, {})
+                seams: List[int] = ChunkWorker.seams
+                results = [ChunkWorker.segment(index) for index in range(len(seams))]
+                self.assertEqual(expected, list(split(text, iter(results), seams)))
+
+    def test_search_window(self) -> None:
+        # Matchers resumed window by window find the same segments.
+        document: SrxDocument = get_document()
+        text: str = CORPUS.read_text(encoding="utf-8")[:30000]
+        for iterator_class in (SrxTextIterator, CombinedSrxTextIterator):
+            expected: List[str] = list(iterator_class(document, "uk_two", text))
+            for search_window in (0, 7):
+                with self.subTest(iterator=iterator_class.__name__, search_window=search_window):
+                    iterator = iterator_class(document, "uk_two", text)
+                    iterator.search_window = search_window
+                    self.assertEqual(expected, list(iterator))
+
+    def test_chunk_work_is_bounded(self) -> None:
+        # Rule matchers of a chunk do not search the rest of the text (the
+        # empty before pattern of the bundled rules walks every character),
+        # except when nothing is left to find.
+        text: str = CORPUS.read_text(encoding="utf-8")
+        ChunkWorker.init(get_document(), "uk_two", text, find_seams(text, 8), SrxTextIterator, {})
+        for index in range(len(ChunkWorker.seams) - 1):
+            ends, _ = ChunkWorker.segment(index)
+            assert ChunkWorker.iterator is not None and ChunkWorker.iterator.rule_matcher_list is not None
+            for matcher in ChunkWorker.iterator.rule_matcher_list:
+                if not matcher.hit_end():
+                    self.assertLessEqual(matcher.get_position(), ends[-1] + 2 * SEARCH_WINDOW)
+
+    def test_pool(self) -> None:
+        document: SrxDocument = get_document()
+        text: str = CORPUS.read_text(encoding="utf-8")
+        self.assertEqual(
+            list(SrxTextIterator(document, "uk_two", text)),
+            list(segment_parallel(document, "uk_two", text, jobs=2)),
+        )
+
+    def test_seam_without_break(self) -> None:
+        # No break at 4, so the first chunk goes on until the seam at 6.
+        language_rule: LanguageRule = LanguageRule("")
+        language_rule.add_rule(Rule(True, r"\.", r"\s"))
+        document: SrxDocument = SrxDocument()
+        document.add_language_map(".*", language_rule)
+
+        results, segments = self.segment_in_process(document, "a. bb. cc. d", [0, 4, 6])
+        self.assertEqual(["a.", " bb.", " cc.", " d"], segments)
+        self.assertEqual(([2, 6], 2), results[0])
+
+    def test_seam_out_of_sync(self) -> None:
+        # The iterator breaks at 2, but the "aa" rule has already matched
+        # across it (its after pattern failed) and continued behind it,
+        # while an iterator started at 2 finds "aa" at 2.
+        language_rule: LanguageRule = LanguageRule("")
+        language_rule.add_rule(Rule(True, r"xa", r""))
+        language_rule.add_rule(Rule(True, r"aa", r"b"))
+        document: SrxDocument = SrxDocument()
+        document.add_language_map(".*", language_rule)
+
+        results, segments = self.segment_in_process(document, "xaaab", [0, 2])
+        self.assertEqual(["xa", "aab"], segments)
+        self.assertEqual(([2, 5], 2), results[0])
+        self.assertEqual([4, 5], results[1][0])
@@ -0,0 +1,69 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, List
+
+from choppa import DEFAULT_SRX_RULESET
+from choppa.plan import get_cache_path, get_plan_paths, get_ruleset_hash, load_plan
+from choppa.srx_parser import SrxDocument
+
+
+def describe(document: SrxDocument) -> List[Any]:
+    return [document.cascade] + [
+        (language_map.language_pattern.pattern, language_map.language_rule.name, language_map.language_rule.rules)
+        for language_map in document.language_map_list
+    ]
+
+
+class PlanTest(unittest.TestCase):
+    EXAMPLE_DOCUMENT_NAME: str = "choppa/data/srx/test/example.srx"
+
+    def test_bundled_plan_is_current(self) -> None:
+        # Regenerate with scripts/build_plan.py when the bundled rules change.
+        ruleset_hash: str = get_ruleset_hash(DEFAULT_SRX_RULESET)
+        path: Path = get_plan_paths(DEFAULT_SRX_RULESET, ruleset_hash, None)[0]
+        self.assertIsNotNone(load_plan(path, ruleset_hash))
+
+    def test_same_as_parsed(self) -> None:
+        self.assertEqual(
+            describe(SrxDocument(ruleset=DEFAULT_SRX_RULESET, plan_cache=False)),
+            describe(SrxDocument(ruleset=DEFAULT_SRX_RULESET)),
+        )
+
+    def test_plan_dir(self) -> None:
+        with tempfile.TemporaryDirectory() as plan_dir:
+            parsed: SrxDocument = SrxDocument(ruleset=self.EXAMPLE_DOCUMENT_NAME, plan_cache=plan_dir)
+            path: Path = get_cache_path(Path(plan_dir), get_ruleset_hash(self.EXAMPLE_DOCUMENT_NAME))
+            self.assertTrue(path.exists())
+
+            # The plan is used instead of the file from now on.
+            plan = json.loads(path.read_text(encoding="utf-8"))
+            plan["language_rules"][0]["name"] = "Planned"
+            path.write_text(json.dumps(plan), encoding="utf-8")
+            planned: SrxDocument = SrxDocument(ruleset=self.EXAMPLE_DOCUMENT_NAME, plan_cache=plan_dir)
+            self.assertEqual("Planned", planned.language_map_list[0].language_rule.name)
+            planned.language_map_list[0].language_rule.name = parsed.language_map_list[0].language_rule.name
+            self.assertEqual(describe(parsed), describe(planned))
+
+    def test_stale_plan(self) -> None:
+        with tempfile.TemporaryDirectory() as plan_dir:
+            path: Path = get_cache_path(Path(plan_dir), get_ruleset_hash(self.EXAMPLE_DOCUMENT_NAME))
+            path.write_text(json.dumps({"version": 0}), encoding="utf-8")
+            self.assertIsNone(load_plan(path, get_ruleset_hash(self.EXAMPLE_DOCUMENT_NAME)))
+
+            document: SrxDocument = SrxDocument(ruleset=self.EXAMPLE_DOCUMENT_NAME, plan_cache=plan_dir)
+            self.assertEqual(
+                describe(SrxDocument(ruleset=self.EXAMPLE_DOCUMENT_NAME, plan_cache=False)), describe(document)
+            )
+            self.assertIsNotNone(load_plan(path, get_ruleset_hash(self.EXAMPLE_DOCUMENT_NAME)))
+
+    def test_plan_dir_not_writable(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            # Not a directory, so that it cannot be created (even by root).
+            plan_file: Path = Path(directory) / "plans"
+            plan_file.write_text("", encoding="utf-8")
+            document: SrxDocument = SrxDocument(ruleset=self.EXAMPLE_DOCUMENT_NAME, plan_cache=plan_file / "plans")
+            self.assertEqual(
+                describe(SrxDocument(ruleset=self.EXAMPLE_DOCUMENT_NAME, plan_cache=False)), describe(document)
+            )
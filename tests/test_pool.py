@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List, Tuple
+
+from choppa.batch import segment_batch
+from choppa.iterators import CombinedSrxTextIterator, SrxTextIterator
+from choppa.pool import SegmenterPool, get_memory_usage
+from choppa.srx_parser import SrxDocument
+from choppa.structures import FileResult
+
+from .conftest import get_document
+
+CORPUS = Path(__file__).parent / "data" / "ci_corpus" / "uk_wikipedia.txt"
+
+
+class SegmenterPoolTest(unittest.TestCase):
+    def test_same_as_batch(self) -> None:
+        document: SrxDocument = get_document()
+        texts: List[str] = CORPUS.read_text(encoding="utf-8").splitlines()[:500]
+
+        with SegmenterPool(document, ["uk_two", "en_two"], processes=2, chunk_size=16) as pool:
+            self.assertEqual(2, len(pool.worker_stats))
+            self.assertTrue(all(stats.rss > 0 for stats in pool.worker_stats))
+
+            self.assertEqual(list(segment_batch(document, "uk_two", texts)), list(pool.imap(texts)))
+            self.assertEqual(
+                list(segment_batch(document, "en_two", texts)),
+                [segments for _, segments in sorted(pool.imap_unordered(texts, "en_two"))],
+            )
+            self.assertEqual([], list(pool.imap([])))
+
+            with self.assertRaises(ValueError):
+                list(pool.imap(texts, "de_two"))
+
+    def test_combined(self) -> None:
+        document: SrxDocument = get_document()
+        texts: List[str] = ["Перше речення. Друге речення.", "", "Т. зв. третє."]
+
+        with SegmenterPool(document, ["uk_two"], processes=1, iterator_class=CombinedSrxTextIterator) as pool:
+            self.assertEqual(list(segment_batch(document, "uk_two", texts)), list(pool.imap(texts)))
+
+    def test_files(self) -> None:
+        document: SrxDocument = get_document()
+        lines: List[str] = CORPUS.read_text(encoding="utf-8").splitlines(keepends=True)
+
+        with tempfile.TemporaryDirectory() as directory:
+            pairs: List[Tuple[str, str]] = []
+            for index in range(4):
+                input_path: str = os.path.join(directory, f"{index}.txt")
+                Path(input_path).write_text("".join(lines[index * 50 : index * 50 + 50]), encoding="utf-8")
+                pairs.append((input_path, os.path.join(directory, "out", f"{index}.txt")))
+            Path(pairs[3][0]).write_bytes(b"\xff broken")
+
+            with SegmenterPool(document, ["uk_two"], processes=2) as pool:
+                results: List[FileResult] = sorted(pool.imap_files(pairs))
+
+            for (input_path, output_path), result in zip(pairs[:3], results):
+                text: str = Path(input_path).read_text(encoding="utf-8")
+                expected: List[str] = list(SrxTextIterator(document, "uk_two", text))
+                self.assertIsNone(result.error)
+                self.assertEqual(len(expected), result.segments)
+                self.assertEqual(len(text.encode()), result.size)
+                self.assertEqual("".join(segment + "\n" for segment in expected), Path(output_path).read_text("utf-8"))
+
+            self.assertIn("UnicodeDecodeError", results[3].error)
+            # Nothing is left of a failed file.
+            self.assertEqual(["0.txt", "1.txt", "2.txt"], sorted(os.listdir(os.path.join(directory, "out"))))
+
+    def test_memory_usage(self) -> None:
+        rss, private = get_memory_usage()
+        self.assertGreater(rss, 0)
+        if private is not None:
+            self.assertLessEqual(private, rss)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,6 +9,7 @@ import unittest
 from hypothesis import given, settings, strategies as st
 
 from choppa import SrxTextIterator
+from choppa.iterators import CombinedSrxTextIterator
 
 from .conftest import get_document
 
@@ -68,3 +69,10 @@ class SegmentationPropertiesTest(unittest.TestCase):
             )
         )
         self.assertEqual(string_segments, reader_segments)
+
+    @settings(deadline=None)
+    @given(text=TEXTS, language=LANGUAGES)
+    def test_combined_iterator_equals_string_mode(self, text: str, language: str) -> None:
+        string_segments = list(SrxTextIterator(get_document(), language, text))
+        combined_segments = list(CombinedSrxTextIterator(get_document(), language, text))
+        self.assertEqual(string_segments, combined_segments)
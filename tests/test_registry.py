@@ -0,0 +1,95 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from typing import Any, List
+from unittest import mock
+
+import regex as re
+
+from choppa import DEFAULT_SRX_RULESET, get_document
+from choppa.registry import clear_documents
+from choppa.srx_parser import SrxDocument
+
+
+class RegistryTest(unittest.TestCase):
+    EXAMPLE_DOCUMENT_NAME: str = "choppa/data/srx/test/example.srx"
+
+    def tearDown(self) -> None:
+        clear_documents()
+
+    def test_shared(self) -> None:
+        document: SrxDocument = get_document()
+        self.assertIs(document, get_document(DEFAULT_SRX_RULESET))
+        self.assertIs(document, get_document(str(DEFAULT_SRX_RULESET)))
+        self.assertIsNot(document, get_document(pattern_flags=re.M))
+        self.assertIsNot(document, get_document(self.EXAMPLE_DOCUMENT_NAME))
+
+    def test_threads(self) -> None:
+        documents: List[SrxDocument] = []
+        warmed_up: List[List[str]] = []
+        original_warm_up = SrxDocument.warm_up
+
+        def warm_up(document: SrxDocument, language_codes: List[str], *args: Any, **kwargs: Any) -> Any:
+            warmed_up.append(list(language_codes))
+            return original_warm_up(document, language_codes, *args, **kwargs)
+
+        def load() -> None:
+            documents.append(get_document(self.EXAMPLE_DOCUMENT_NAME, warm_up=["fr_FR"]))
+
+        with mock.patch.object(SrxDocument, "warm_up", warm_up):
+            threads: List[threading.Thread] = [threading.Thread(target=load) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            get_document(self.EXAMPLE_DOCUMENT_NAME, warm_up=["fr_FR", "en"])
+            # The scanner patterns once more, covering the others.
+            get_document(self.EXAMPLE_DOCUMENT_NAME, warm_up=["en"], scanner=True)
+            get_document(self.EXAMPLE_DOCUMENT_NAME, warm_up=["en"], scanner=True)
+            get_document(self.EXAMPLE_DOCUMENT_NAME, warm_up=["en"])
+        self.assertEqual(8, len(documents))
+        self.assertTrue(all(document is documents[0] for document in documents))
+        self.assertTrue(documents[0].rule_manager_cache)
+        # Once per language code.
+        self.assertEqual([["fr_FR"], ["en"], ["en"]], warmed_up)
+
+    def test_warm_up_threads(self) -> None:
+        # Every thread logs the patterns it compiles itself, so that every
+        # compiled pattern is in a report (twice if two threads compiled it).
+        document: SrxDocument = SrxDocument(ruleset=DEFAULT_SRX_RULESET)
+        counts: List[int] = []
+        switch_interval: float = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+
+        def warm_up(language_code: str) -> None:
+            counts.append(document.warm_up([language_code])[0].pattern_count)
+
+        threads: List[threading.Thread] = [
+            threading.Thread(target=warm_up, args=(language_code,)) for language_code in ("uk_two", "en_two", "pl_one")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(3, len(counts))
+        self.assertGreaterEqual(sum(counts), document.get_cache_stats()["patterns"].size)
+        self.assertEqual({}, document.compile_logs)
+
+    def test_reload(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path: Path = Path(directory) / "rules.srx"
+            shutil.copy(self.EXAMPLE_DOCUMENT_NAME, path)
+            document: SrxDocument = get_document(path, reload=True)
+            self.assertIs(document, get_document(path, reload=True))
+
+            path.write_text(path.read_text(encoding="utf-8").replace("French", "Français"), encoding="utf-8")
+            os.utime(path, ns=(0, 0))
+            self.assertIs(document, get_document(path))
+            reloaded: SrxDocument = get_document(path, reload=True)
+            self.assertIsNot(document, reloaded)
+            self.assertEqual("Français", reloaded.get_language_rule_list("fr_FR")[0].name)
@@ -1,5 +1,5 @@
 import unittest
-from choppa.rule_matcher import RuleMatcher
+from choppa.rule_matcher import RuleMatcher, RuleMatcherQueue
 from choppa.srx_parser import SrxDocument, Rule
 
 
@@ -121,3 +121,91 @@ class RuleMatcherTest(unittest.TestCase):
         self.assertEqual(11, matcher.get_break_position())
 
         self.assertFalse(matcher.find(12))
+
+    def test_reset(self):
+        # Java Matcher.reset(CharSequence): search the new text from its start.
+        document: SrxDocument = SrxDocument()
+        rule: Rule = Rule(True, r"\.", " ")
+        matcher: RuleMatcher = RuleMatcher(document, rule, "a. b.")
+        self.assertTrue(matcher.find())
+        self.assertFalse(matcher.find())
+        self.assertTrue(matcher.hit_end())
+
+        matcher.reset("b. c. d")
+        self.assertFalse(matcher.hit_end())
+        self.assertTrue(matcher.find())
+        self.assertEqual(2, matcher.get_break_position())
+        self.assertTrue(matcher.find())
+        self.assertEqual(5, matcher.get_break_position())
+        self.assertFalse(matcher.find())
+
+    def test_search_window(self):
+        # Pending after searching 3 characters, resumed by the next find().
+        document: SrxDocument = SrxDocument()
+        matcher: RuleMatcher = RuleMatcher(document, Rule(True, "", "x"), "aaaaaaax", search_window=3)
+        self.assertFalse(matcher.find())
+        self.assertFalse(matcher.hit_end())
+        self.assertEqual((4,), matcher.get_state())
+        self.assertFalse(matcher.find(limit=5))
+        self.assertEqual(6, matcher.get_position())
+        self.assertTrue(matcher.find())
+        self.assertEqual(7, matcher.get_break_position())
+        self.assertFalse(matcher.pending)
+
+
+class RuleMatcherQueueTest(unittest.TestCase):
+    def create_queue(self, text: str, *rules: Rule) -> RuleMatcherQueue:
+        document: SrxDocument = SrxDocument()
+        queue: RuleMatcherQueue = RuleMatcherQueue()
+        for index, rule in enumerate(rules):
+            matcher: RuleMatcher = RuleMatcher(document, rule, text)
+            matcher.find()
+            queue.push(index, matcher)
+        return queue
+
+    def test_min_matcher_rule_order(self):
+        # Both rules break at 3; the first one in rule order wins.
+        queue: RuleMatcherQueue = self.create_queue("ab. c", Rule(True, r"b\.", ""), Rule(True, r"\.", ""))
+        self.assertEqual(2, len(queue))
+        self.assertEqual(r"b\.", queue.get_min_matcher().rule.before_pattern)
+        self.assertEqual((3, 0), queue.peek()[:2])
+
+    def test_exhausted_matchers_drop_out(self):
+        queue: RuleMatcherQueue = self.create_queue("a. b. c", Rule(True, r"\.", ""), Rule(True, "x", ""))
+        self.assertEqual(1, len(queue))
+
+        queue.move(2)
+        self.assertEqual(5, queue.get_min_matcher().get_break_position())
+
+        queue.move(5)
+        self.assertEqual(0, len(queue))
+        self.assertIsNone(queue.get_min_matcher())
+
+    def test_cut(self):
+        # The a+ match starting before the cut is searched again from it.
+        queue: RuleMatcherQueue = self.create_queue("aaa.a.", Rule(True, r"a+\.", ""), Rule(True, r"\.", ""))
+        self.assertEqual(4, queue.get_min_matcher().get_break_position())
+
+        queue.cut(2)
+        matcher: RuleMatcher = queue.get_min_matcher()
+        self.assertEqual(2, matcher.get_start_position())
+        self.assertEqual(4, matcher.get_break_position())
+        self.assertEqual(0, queue.peek()[1])
+
+    def test_pending_matchers(self):
+        # Pending matchers are resumed when they could be the first one, or
+        # start before a cut; the results are the same as without a window.
+        document: SrxDocument = SrxDocument()
+        text: str = "aaaa. bbbbbbbbbb."
+        queue: RuleMatcherQueue = RuleMatcherQueue()
+        for index, rule in enumerate((Rule(True, "", r"b\."), Rule(True, r"\.", ""))):
+            matcher: RuleMatcher = RuleMatcher(document, rule, text, search_window=2)
+            matcher.find()
+            queue.push(index, matcher)
+        self.assertTrue(queue.matchers[0].pending)
+
+        self.assertEqual(5, queue.get_min_matcher().get_break_position())
+        queue.move(5)
+        queue.cut(5)
+        matcher = queue.get_min_matcher()
+        self.assertEqual((0, 15), (queue.peek()[1], matcher.get_break_position()))
@@ -0,0 +1,104 @@
+import unittest
+
+import regex as re
+
+from choppa.rule_scanner import RuleScanner, is_scannable, is_self_synchronizing, split_tokens
+from choppa.srx_parser import SrxDocument
+from choppa.structures import LanguageRule, Rule
+
+
+FLAGS: int = SrxDocument.BASE_PATTERN_FLAGS
+
+
+class RuleScannerAnalysisTest(unittest.TestCase):
+    def test_split_tokens(self) -> None:
+        self.assertEqual(
+            [
+                ("lookaround", r"(?<!\p{H}[А-Я])", ""),
+                ("atom", "[.!?…]", "{1,3}"),
+                ("atom", r" ", ""),
+                ("group", r"(\.|…)", "+"),
+            ],
+            split_tokens(r"(?<!\p{H}[А-Я])[.!?…]{1,3} (\.|…)+"),
+        )
+
+    def test_unsupported_constructs(self) -> None:
+        self.assertIsNone(split_tokens(r"(a)\1"))
+        self.assertIsNone(split_tokens(r"(?P<name>a)"))
+        self.assertIsNone(split_tokens(r"(?i)a"))
+        self.assertIsNone(split_tokens(r"\Qa.b\E"))
+
+    def test_self_synchronizing(self) -> None:
+        self.assertTrue(is_self_synchronizing(r"[.!?…]['»\"„“”\]›]*[\p{H}\p{V}]+", FLAGS))
+        self.assertTrue(is_self_synchronizing(r"\p{L}[\.!?…] +\s+", FLAGS))
+        self.assertTrue(is_self_synchronizing(r"\{0>", FLAGS))
+        self.assertTrue(is_self_synchronizing(r" ", FLAGS))
+        # A match of "ab" may start inside the match "aab" of a+b.
+        self.assertFalse(is_self_synchronizing(r"a+b", FLAGS))
+        self.assertFalse(is_self_synchronizing(r"\r?\n\s*\r?\n", FLAGS))
+        self.assertFalse(is_self_synchronizing(r"[.!?]{1,3}\s", FLAGS))
+        self.assertFalse(is_self_synchronizing(r"a\p{L}", FLAGS))
+        self.assertFalse(is_self_synchronizing(r"ab|b", FLAGS))
+        self.assertFalse(is_self_synchronizing(r"\..", FLAGS))
+        # Case-insensitive matching makes "A" and "a" the same character.
+        self.assertTrue(is_self_synchronizing(r"A\.a", FLAGS))
+        self.assertFalse(is_self_synchronizing(r"A\.a", FLAGS | re.I))
+
+    def test_scannable(self) -> None:
+        self.assertTrue(is_scannable(Rule(True, "", r"<0\}"), FLAGS))
+        self.assertTrue(is_scannable(Rule(True, r"\.", r"\s"), FLAGS))
+        self.assertFalse(is_scannable(Rule(True, r"\.", r"(\s)\1"), FLAGS))
+        self.assertFalse(is_scannable(Rule(True, r"\.+", ""), FLAGS))
+
+
+class RuleScannerTest(unittest.TestCase):
+    def create_document(self) -> SrxDocument:
+        language_rule: LanguageRule = LanguageRule("")
+        language_rule.add_rule(Rule(True, r"\.", r"\s"))
+        language_rule.add_rule(Rule(True, "", r"\n"))
+        language_rule.add_rule(Rule(True, r"\.\s", ""))
+
+        document: SrxDocument = SrxDocument()
+        document.add_language_map(".*", language_rule)
+        return document
+
+    def test_find(self) -> None:
+        document: SrxDocument = self.create_document()
+        rule_manager = document.get_rule_manager(document.get_language_rule_list(""), 100)
+        text: str = "a. b\nc"
+        scanner: RuleScanner = RuleScanner(rule_manager, text)
+
+        self.assertTrue(scanner.find())
+        self.assertEqual(1, scanner.get_start_position())
+        self.assertEqual(2, scanner.get_break_position())
+        self.assertEqual(rule_manager.break_rule_list[0], scanner.rule)
+
+        scanner.move(2)
+        self.assertTrue(scanner.find())
+        self.assertEqual(3, scanner.get_break_position())
+        self.assertEqual(rule_manager.break_rule_list[2], scanner.rule)
+
+        scanner.cut(3)
+        scanner.move(3)
+        self.assertTrue(scanner.find())
+        self.assertEqual(4, scanner.get_break_position())
+        self.assertEqual(rule_manager.break_rule_list[1], scanner.rule)
+
+        scanner.move(4)
+        self.assertFalse(scanner.find())
+        self.assertTrue(scanner.hit_end())
+
+    def test_rule_order_ties(self) -> None:
+        # Both rules break after the dot; the first one in SRX order wins.
+        language_rule: LanguageRule = LanguageRule("")
+        language_rule.add_rule(Rule(True, r"b\.", ""))
+        language_rule.add_rule(Rule(True, r"\.", ""))
+
+        document: SrxDocument = SrxDocument()
+        document.add_language_map(".*", language_rule)
+        rule_manager = document.get_rule_manager(document.get_language_rule_list(""), 100)
+
+        scanner: RuleScanner = RuleScanner(rule_manager, "ab.c")
+        self.assertTrue(scanner.find())
+        self.assertEqual(3, scanner.get_break_position())
+        self.assertEqual(rule_manager.break_rule_list[0], scanner.rule)
@@ -0,0 +1,167 @@
+import gzip
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from typing import List
+
+from choppa import DEFAULT_SRX_RULESET
+from choppa.__main__ import ITERATOR_NAMES
+from choppa.batch import segment_batch
+from choppa.iterators import SrxTextIterator
+from choppa.server import Client, SegmentationServer, ServerError, connect
+
+from .conftest import get_document
+
+CORPUS = Path(__file__).parent / "data" / "ci_corpus" / "uk_wikipedia.txt"
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix domain sockets required")
+class SegmentationServerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path: str = os.path.join(self.directory.name, "choppa.sock")
+        self.server = SegmentationServer(self.socket_path, DEFAULT_SRX_RULESET, workers=2)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.directory.cleanup()
+
+    def test_requests(self) -> None:
+        text: str = CORPUS.read_text(encoding="utf-8")[:30000]
+        expected: List[str] = list(SrxTextIterator(get_document(), "uk_two", text))
+        self.assertEqual(0o600, os.stat(self.socket_path).st_mode & 0o777)
+
+        with Client(connect(self.socket_path)) as client:
+            self.assertEqual(expected, list(client.request({"language": "uk_two", "text": text})))
+
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt", delete=False) as text_file:
+                text_file.write(text)
+            try:
+                for iterator in ITERATOR_NAMES:
+                    with self.subTest(iterator=iterator):
+                        request = {"language": "uk_two", "path": text_file.name, "iterator": iterator}
+                        self.assertEqual(expected, list(client.request(request)))
+                        request["read_ahead"] = True
+                        self.assertEqual(expected, list(client.request(request)))
+            finally:
+                os.unlink(text_file.name)
+
+            gzip_path: str = os.path.join(self.directory.name, "text.txt.gz")
+            with gzip.open(gzip_path, "wt", encoding="utf-8") as gzip_file:
+                gzip_file.write(text)
+            self.assertEqual(expected, list(client.request({"language": "uk_two", "path": gzip_path})))
+
+            spans = list(client.request({"language": "uk_two", "text": text, "mode": "spans"}))
+            self.assertEqual(expected, [text[start:end] for start, end in spans])
+
+            texts: List[str] = text.splitlines()
+            self.assertEqual(
+                list(segment_batch(get_document(), "en_two", texts)),
+                list(client.request({"language": "en_two", "texts": texts})),
+            )
+
+            with self.assertRaisesRegex(ServerError, "Unknown iterator"):
+                list(client.request({"language": "uk_two", "text": text, "iterator": "NoIterator"}))
+            # The connection stays usable after an error.
+            self.assertEqual(["Так. "], list(client.request({"language": "uk_two", "text": "Так. "})))
+
+    def test_cli(self) -> None:
+        text: str = CORPUS.read_text(encoding="utf-8")[:5000]
+        environment = dict(os.environ, CHOPPA_SOCKET=self.socket_path)
+
+        outputs: List[str] = []
+        for options in ([], ["--no-daemon"], ["--line-by-line"], ["--line-by-line", "--no-daemon"]):
+            outputs.append(
+                subprocess.run(
+                    [sys.executable, "-m", "choppa", *options],
+                    input=text,
+                    env=environment,
+                    capture_output=True,
+                    text=True,
+                    encoding="utf-8",
+                    check=True,
+                ).stdout
+            )
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[2], outputs[3])
+
+        # A compressed file is sent by path and decompressed by the daemon.
+        gzip_path: str = os.path.join(self.directory.name, "text.txt.gz")
+        with gzip.open(gzip_path, "wt", encoding="utf-8") as gzip_file:
+            gzip_file.write(text)
+        output: str = subprocess.run(
+            [sys.executable, "-m", "choppa", gzip_path],
+            env=environment,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            check=True,
+        ).stdout
+        self.assertEqual(outputs[0], output)
+
+    def test_cli_long_input(self) -> None:
+        # Longer than DAEMON_MAX_LENGTH: split in-process, with the text
+        # already read.
+        text: str = CORPUS.read_text(encoding="utf-8") * 4
+        line: str = text.replace("\n", " ")
+        environment = dict(os.environ, CHOPPA_SOCKET=self.socket_path)
+        for options, input_text in (([], text), (["--line-by-line"], f"Раз. Два.\n{line}\nТри. Чотири.\n")):
+            outputs: List[str] = [
+                subprocess.run(
+                    [sys.executable, "-m", "choppa", *options, *no_daemon],
+                    input=input_text,
+                    env=environment,
+                    capture_output=True,
+                    text=True,
+                    encoding="utf-8",
+                    check=True,
+                ).stdout
+                for no_daemon in ([], ["--no-daemon"])
+            ]
+            self.assertEqual(outputs[1], outputs[0], options)
+
+    def test_cli_buffer_length(self) -> None:
+        # Stdin longer than --buffer-length is split as a stream, with the
+        # same segments or the same "Buffer too short" error.
+        text: str = CORPUS.read_text(encoding="utf-8")[:3000]
+        environment = dict(os.environ, CHOPPA_SOCKET=self.socket_path)
+        for input_text in (text, "А" * 500):
+            results = [
+                subprocess.run(
+                    [sys.executable, "-m", "choppa", "--buffer-length", "200", *no_daemon],
+                    input=input_text,
+                    env=environment,
+                    capture_output=True,
+                    text=True,
+                    encoding="utf-8",
+                )
+                for no_daemon in ([], ["--no-daemon"])
+            ]
+            self.assertEqual(
+                (results[1].returncode, results[1].stdout), (results[0].returncode, results[0].stdout)
+            )
+        self.assertNotEqual(0, results[0].returncode)
+        self.assertIn("Buffer too short", results[0].stderr)
+
+    def test_not_running(self) -> None:
+        self.assertIsNone(connect(os.path.join(self.directory.name, "missing.sock")))
+
+
+class ClientTest(unittest.TestCase):
+    def test_client_is_light(self) -> None:
+        code: str = "import sys, choppa.__main__, choppa.server; print('regex' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+        self.assertEqual("False", result.stdout.strip())
+
+
+if __name__ == "__main__":
+    unittest.main()
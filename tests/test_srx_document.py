@@ -1,10 +1,14 @@
+import subprocess
+import sys
 import unittest
 from typing import List
 
 from xmlschema.validators.exceptions import XMLSchemaValidationError  # type: ignore
 
+from choppa import DEFAULT_SRX_RULESET
+from choppa.iterators import CombinedSrxTextIterator, SrxTextIterator
 from choppa.srx_parser import SrxDocument
-from choppa.structures import LanguageRule, Rule
+from choppa.structures import LanguageRule, Rule, WarmUpReport, get_fingerprint
 
 
 class SrxDocumentTest(unittest.TestCase):
@@ -47,6 +51,23 @@ class SrxDocumentTest(unittest.TestCase):
         self.assertEqual(1, len(language_rule_list))
         self.assertEqual(language_rule4, language_rule_list[0])
 
+    def test_retain_languages(self) -> None:
+        for cascade in (True, False):
+            document: SrxDocument = SrxDocument()
+            language_rules: List[LanguageRule] = [LanguageRule(str(index)) for index in range(4)]
+            document.add_language_map("a.*", language_rules[0])
+            document.add_language_map("b", language_rules[1])
+            document.add_language_map("ab", language_rules[2])
+            document.add_language_map(".*", language_rules[3])
+            document.cascade = cascade
+            expected: List[LanguageRule] = document.get_language_rule_list("ab")
+
+            document.retain_languages(["ab"])
+            self.assertEqual(expected, document.get_language_rule_list("ab"))
+            self.assertEqual(len(expected), len(document.language_map_list))
+            with self.assertRaises(ValueError):
+                document.get_language_rule_list("b")
+
 
 class SrxParserTest(unittest.TestCase):
     TICKET_1_DOCUMENT_NAME: str = "choppa/data/srx/test/ticket1.srx"
@@ -74,6 +95,92 @@ class SrxParserTest(unittest.TestCase):
         self.assertEqual(r"\s[Mm]lles\.", rule1.before_pattern)
         self.assertEqual(r"\s", rule1.after_pattern)
 
+    def test_srx2_languages(self) -> None:
+        document: SrxDocument = SrxDocument(ruleset=self.SRX_2_DOCUMENT_NAME, languages=["fr_FR"])
+
+        language_rule_list: List[LanguageRule] = document.get_language_rule_list("fr_FR")
+        self.assertEqual(["French", "Default"], [language_rule.name for language_rule in language_rule_list])
+        self.assertEqual(2, len(document.language_map_list))
+
+    def test_warm_up(self) -> None:
+        document: SrxDocument = SrxDocument(ruleset=DEFAULT_SRX_RULESET, languages=["uk_two", "uk_one"])
+
+        reports: List[WarmUpReport] = document.warm_up(["uk_two", "uk_one"], scanner=True, slowest=3)
+        self.assertEqual(["uk_two", "uk_one"], [report.language_code for report in reports])
+        self.assertGreater(reports[0].pattern_count, 0)
+        self.assertEqual(3, len(reports[0].slowest))
+        self.assertEqual(sorted(reports[0].slowest, reverse=True), reports[0].slowest)
+
+        # Splitting compiles nothing any more.
+        misses: int = document.get_cache_stats()["patterns"].misses
+        for iterator_class in (SrxTextIterator, CombinedSrxTextIterator):
+            list(iterator_class(document, "uk_two", "Перше речення. Друге речення."))
+        self.assertEqual(misses, document.get_cache_stats()["patterns"].misses)
+        self.assertEqual([], document.warm_up(["uk_two"])[0].slowest)
+
+    def test_fingerprint(self) -> None:
+        language_rule: LanguageRule = LanguageRule("1", [Rule(True, r"\.", r"\s")])
+        same: LanguageRule = LanguageRule("2", [Rule(True, r"\.", r"\s")])
+        self.assertEqual(language_rule.get_fingerprint(), same.get_fingerprint())
+
+        fingerprint: str = language_rule.get_fingerprint()
+        language_rule.add_rule(Rule(False, "Mr\\.", r"\s"))
+        self.assertNotEqual(fingerprint, language_rule.get_fingerprint())
+        self.assertNotEqual(get_fingerprint([language_rule, same]), get_fingerprint([same, language_rule]))
+
+        # Rule managers are shared by equal rules and the fingerprints do
+        # not depend on the process.
+        document: SrxDocument = SrxDocument(ruleset=DEFAULT_SRX_RULESET)
+        other: SrxDocument = SrxDocument(ruleset=DEFAULT_SRX_RULESET, plan_cache=False)
+        self.assertIs(
+            document.get_rule_manager(document.get_language_rule_list("uk_two"), 100),
+            document.get_rule_manager(list(other.get_language_rule_list("uk_two")), 100),
+        )
+        script: str = (
+            "from choppa import DEFAULT_SRX_RULESET, SrxDocument\n"
+            "from choppa.structures import get_fingerprint\n"
+            "print(get_fingerprint(SrxDocument(ruleset=DEFAULT_SRX_RULESET).get_language_rule_list('uk_two')))"
+        )
+        output: str = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        self.assertEqual(get_fingerprint(other.get_language_rule_list("uk_two")), output)
+
+    def test_bounded_cache(self) -> None:
+        text: str = "Перше речення. Друге речення! Третє речення? Т. зв. четверте речення."
+        expected: List[str] = list(SrxTextIterator(SrxDocument(ruleset=DEFAULT_SRX_RULESET), "uk_two", text))
+
+        document: SrxDocument = SrxDocument(ruleset=DEFAULT_SRX_RULESET, max_patterns=5, max_rule_managers=1)
+        for language_code in ("uk_two", "en_two", "uk_two"):
+            list(SrxTextIterator(document, language_code, text))
+        self.assertEqual(expected, list(SrxTextIterator(document, "uk_two", text)))
+
+        stats = document.get_cache_stats()
+        self.assertEqual(5, stats["patterns"].size)
+        self.assertGreater(stats["patterns"].evictions, 0)
+        self.assertEqual(1, stats["rule_managers"].size)
+        self.assertEqual(2, stats["rule_managers"].evictions)
+        self.assertEqual(1, stats["rule_managers"].hits)
+
+    def test_unload(self) -> None:
+        document: SrxDocument = SrxDocument(ruleset=DEFAULT_SRX_RULESET)
+        text: str = "Перше речення. Друге речення."
+        expected: List[str] = list(SrxTextIterator(document, "uk_two", text))
+        list(SrxTextIterator(document, "en_two", "First sentence. Second one."))
+        patterns: int = len(document.regex_cache)
+
+        self.assertGreater(document.unload("uk_two"), 0)
+        self.assertEqual(1, len(document.rule_manager_cache))
+        self.assertLess(len(document.regex_cache), patterns)
+
+        # Patterns shared with English are kept.
+        misses: int = document.get_cache_stats()["patterns"].misses
+        list(SrxTextIterator(document, "en_two", "First sentence. Second one."))
+        self.assertEqual(misses, document.get_cache_stats()["patterns"].misses)
+
+        self.assertEqual(expected, list(SrxTextIterator(document, "uk_two", text)))
+        self.assertEqual(0, document.unload("de_two"))
+
     def test_srx2_invalid(self) -> None:
         with self.assertRaises(XMLSchemaValidationError):
             SrxDocument(ruleset=self.INVALID_DOCUMENT_NAME, validate_ruleset=self.SRX_2_XSD)
@@ -1,6 +1,7 @@
-from typing import List
+from typing import List, Tuple
 
 from choppa.iterators import SrxTextIterator, AbstractTextIterator
+from choppa.rule_matcher import RuleMatcher
 from choppa.srx_parser import SrxDocument
 from choppa.structures import LanguageRule, Rule
 
@@ -30,3 +31,33 @@ class SrxTextIteratorTest(AbstractSrxTextIterator):
             SrxTextIterator(document, "", text, max_lookbehind_construct_length=2)
         )
         self.assertEqual(expected, segments)
+
+    def test_exception_checked_once_per_position(self) -> None:
+        # After an exception check at a break position every matcher is
+        # moved past it, so no (exception pattern, position) pair is
+        # checked twice within a buffer - memoizing is_exception would
+        # never hit.
+        language_rule: LanguageRule = LanguageRule("")
+        language_rule.add_rule(Rule(False, r"Dr\.", r"\s"))
+        language_rule.add_rule(Rule(True, r"\.", r"\s"))
+        language_rule.add_rule(Rule(True, r"[.!?]", r"\s"))
+        language_rule.add_rule(Rule(True, r"\w\.", r"\s"))
+
+        document: SrxDocument = SrxDocument()
+        document.add_language_map(".*", language_rule)
+
+        text: str = "Dr. Who. Dr. No! Dr. Strange. " * 3
+        iterator: SrxTextIterator = SrxTextIterator(document, "", text)
+        checked: List[Tuple[str, int]] = []
+        is_exception = iterator.is_exception
+
+        def record(rule_matcher: RuleMatcher) -> bool:
+            pattern = iterator.rule_manager.get_exception_pattern(rule_matcher.rule)
+            checked.append((pattern.pattern, rule_matcher.get_break_position()))
+            return is_exception(rule_matcher)
+
+        iterator.is_exception = record  # type: ignore
+        segments: List[str] = list(iterator)
+        self.assertEqual(["Dr. Who.", " Dr. No!", " Dr. Strange.", " Dr. Who."], segments[:4])
+        self.assertEqual(len(checked), len(set(checked)))
+        self.assertIn((checked[0][0], 3), checked)
@@ -2,8 +2,10 @@ import io
 
 from choppa.iterators import SrxTextIterator, AbstractTextIterator
 from choppa.srx_parser import SrxDocument
+from choppa.structures import ShiftStats
 
 from .abstract_srx_iterator import AbstractSrxTextIterator
+from .conftest import get_document
 
 
 class SrxTextIteratorReaderTest(AbstractSrxTextIterator):
@@ -32,3 +34,102 @@ class SrxTextIteratorReaderTest(AbstractSrxTextIterator):
             buffer_length=self.BUFFER_SIZE,
             margin=self.MARGIN,
         )
+
+    def test_last_segment_without_break_after_shift(self) -> None:
+        text: str = "AAAAAAAAA. BBBBBBBBB"
+        iterator = SrxTextIterator(get_document(), "uk_two", io.StringIO(text), buffer_length=15, margin=3)
+        self.assertEqual(["AAAAAAAAA. ", "BBBBBBBBB"], list(iterator))
+
+    def test_shift_stats(self) -> None:
+        text: str = "AAAAAAAAA. BBBBBBBBB"
+        iterator = SrxTextIterator(get_document(), "uk_two", io.StringIO(text), buffer_length=15, margin=3)
+        self.assertEqual((0, 0), iterator.get_shift_stats())
+        list(iterator)
+        # The buffer is shifted by the first segment, carrying over "BBBB".
+        self.assertEqual(ShiftStats(1, 4), iterator.get_shift_stats())
+
+        iterator.reset(text)
+        list(iterator)
+        self.assertEqual((0, 0), iterator.get_shift_stats())
+
+
+class ChunkReader:
+    # Reader returning at most chunk_length characters at a time, like a pipe.
+
+    def __init__(self, text: str, chunk_length: int) -> None:
+        self.text: str = text
+        self.chunk_length: int = chunk_length
+
+    def read(self, amount: int) -> str:
+        result: str = self.text[: min(amount, self.chunk_length)]
+        self.text = self.text[len(result) :]
+        return result
+
+
+class SrxTextIteratorLowLatencyTest(AbstractSrxTextIterator):
+    """
+    Streaming suite in low-latency mode, text arriving in 7-character chunks.
+    """
+
+    __test__ = True
+
+    BUFFER_SIZE: int = 60
+    MARGIN: int = 10
+
+    TEXT_LONGER_THAN_BUFFER_RESULT = ["AAAAAAAAA." for _ in range(200)]
+
+    def get_text_iterator(self, document: SrxDocument, language_code: str, text: str) -> AbstractTextIterator:
+        return SrxTextIterator(
+            document,
+            language_code,
+            ChunkReader(text, 7),  # type: ignore
+            buffer_length=self.BUFFER_SIZE,
+            margin=self.MARGIN,
+            low_latency=True,
+        )
+
+    def test_segments_before_full_buffer(self) -> None:
+        # Only the text before the margin is needed for the first segment.
+        reader = ChunkReader("Перше речення. Друге речення. " * 2, 40)
+        iterator = SrxTextIterator(
+            get_document(), "uk_two", reader, buffer_length=1000, margin=10, low_latency=True  # type: ignore
+        )
+        self.assertEqual("Перше речення. ", next(iterator))
+        self.assertEqual(len("Перше речення. Друге речення. ") * 2 - 40, len(reader.text))
+
+    def test_shift_stats(self) -> None:
+        # Reading more text without dropping any is not a shift.
+        reader = ChunkReader("Перше речення. Друге речення. " * 2, 40)
+        iterator = SrxTextIterator(
+            get_document(), "uk_two", reader, buffer_length=1000, margin=10, low_latency=True  # type: ignore
+        )
+        self.assertEqual(4, len(list(iterator)))
+        self.assertEqual(ShiftStats(2, 38), iterator.get_shift_stats())
+
+
+class SrxTextIteratorReadAheadTest(AbstractSrxTextIterator):
+    """
+    Streaming suite with the text read ahead in a background thread, from a
+    reader returning 7-character chunks.
+    """
+
+    __test__ = True
+
+    BUFFER_SIZE: int = 60
+    MARGIN: int = 10
+
+    TEXT_LONGER_THAN_BUFFER_RESULT = ["AAAAAAAAA." for _ in range(200)]
+
+    def get_text_iterator(self, document: SrxDocument, language_code: str, text: str) -> AbstractTextIterator:
+        return SrxTextIterator(
+            document,
+            language_code,
+            ChunkReader(text, 7),  # type: ignore
+            buffer_length=self.BUFFER_SIZE,
+            margin=self.MARGIN,
+            read_ahead=True,
+        )
+
+    def test_low_latency(self) -> None:
+        with self.assertRaises(AssertionError):
+            SrxTextIterator(get_document(), "uk_two", io.StringIO(""), low_latency=True, read_ahead=True)
@@ -1,7 +1,9 @@
+import gc
 import unittest
 import io
+from typing import List
 
-from choppa.text_manager import TextManager
+from choppa.text_manager import AvailableTextReader, ReadAheadReader, TextManager, TextNotAvailable, TextQueue
 
 
 class TextManagerTest(unittest.TestCase):
@@ -37,6 +39,38 @@ class TextManagerTest(unittest.TestCase):
         self.assertEqual("xt", manager.get_text())
         self.assertFalse(manager.has_more_text())
 
+    def test_shift_statistics(self) -> None:
+        manager: TextManager = TextManager(reader=io.StringIO("abcdefgh"), buffer_length=4)
+        self.assertEqual("abcd", manager.get_text())
+        self.assertEqual(0, manager.shift_count)
+
+        manager.read_text(3)
+        self.assertEqual("defg", manager.get_text())
+        manager.read_text(1)
+        self.assertEqual("efgh", manager.get_text())
+        self.assertEqual(2, manager.shift_count)
+        self.assertEqual(1 + 3, manager.copied_length)
+        self.assertEqual(4, manager.offset)
+
+    def test_partial_reads(self) -> None:
+        text: io.StringIO = io.StringIO("abcdef")
+        reader = type("Reader", (), {"read": lambda self, amount: text.read(min(amount, 3))})()
+        manager: TextManager = TextManager(reader=reader, buffer_length=4, partial_reads=True)
+
+        # The last character read is held back until the end is known.
+        self.assertEqual("ab", manager.get_text())
+        self.assertTrue(manager.has_more_text())
+        manager.read_text(0)
+        self.assertEqual("abcd", manager.get_text())
+        manager.read_text(2)
+        self.assertEqual("cde", manager.get_text())
+        self.assertTrue(manager.has_more_text())
+        manager.read_text(0)
+        self.assertEqual("cdef", manager.get_text())
+        self.assertFalse(manager.has_more_text())
+        # Refills are not shifts.
+        self.assertEqual((1, 2), (manager.shift_count, manager.copied_length))
+
     def test_empty_reader(self) -> None:
         manager: TextManager = TextManager(reader=io.StringIO(""), buffer_length=2)
         self.assertEqual("", manager.get_text())
@@ -51,3 +85,94 @@ class TextManagerTest(unittest.TestCase):
         with self.assertRaises(AssertionError):
             TextManager(text="foobar", reader=io.StringIO("barfoo"))
             TextManager()
+
+
+class AvailableTextReaderTest(unittest.TestCase):
+    def test_read(self) -> None:
+        data: bytes = "ї\r\nє".encode()
+        stream = io.BufferedReader(io.BytesIO(data), buffer_size=1)
+        reader: AvailableTextReader = AvailableTextReader(stream)
+
+        result: str = ""
+        text: str = reader.read(1)
+        while text:
+            result += text
+            text = reader.read(1)
+        self.assertEqual("ї\nє", result)
+
+
+class ReadAheadReaderTest(unittest.TestCase):
+    def test_read(self) -> None:
+        text: str = "Перше речення. Друге речення. " * 100
+        stream: io.StringIO = io.StringIO(text)
+        reader: ReadAheadReader = ReadAheadReader(stream.read, 100)
+        manager: TextManager = TextManager(reader=reader, buffer_length=30)  # type: ignore
+
+        result: str = ""
+        while manager.has_more_text():
+            result += manager.get_text()[:20]
+            manager.read_text(20)
+        self.assertEqual(text, result + manager.get_text())
+
+    def test_bounded(self) -> None:
+        stream: io.StringIO = io.StringIO("x" * 10000)
+        reader: ReadAheadReader = ReadAheadReader(stream.read, 100)
+        self.assertEqual("x" * 150, reader.read(150))
+        # One chunk waits in the queue, one more waits to be queued.
+        reader.thread.join(0.5)
+        self.assertLessEqual(stream.tell(), 400)
+
+        closed: list = []
+        reader = ReadAheadReader(stream.read, 100, close=lambda: closed.append(True))
+        thread = reader.thread
+        del reader
+        gc.collect()
+        thread.join()
+        self.assertEqual([True], closed)
+
+    def test_error(self) -> None:
+        def read(amount: int) -> str:
+            raise OSError("connection reset")
+
+        with self.assertRaisesRegex(OSError, "connection reset"):
+            ReadAheadReader(read, 100).read(10)
+
+
+class TextQueueTest(unittest.TestCase):
+    def test_reader(self) -> None:
+        queue: TextQueue = TextQueue()
+        queue.append("te")
+        queue.append("xt")
+        manager: TextManager = TextManager(reader=queue, buffer_length=2)  # type: ignore
+
+        self.assertEqual("te", manager.get_text())
+        self.assertEqual(1, queue.available())
+        with self.assertRaises(TextNotAvailable):
+            manager.read_text(2)
+        # Unchanged, so the read can be retried.
+        self.assertEqual("te", manager.get_text())
+        self.assertEqual((0, 0), (manager.offset, manager.shift_count))
+
+        queue.close()
+        manager.read_text(2)
+        self.assertEqual("xt", manager.get_text())
+        self.assertFalse(manager.has_more_text())
+        with self.assertRaises(AssertionError):
+            queue.append("more")
+
+    def test_chunks(self) -> None:
+        queue: TextQueue = TextQueue()
+        for chunk in ["ab", "", "cde", "f", "ghij"]:
+            queue.append(chunk)
+        self.assertEqual(10, queue.available())
+        result: List[str] = [queue.read(amount) for amount in [1, 3, 0, 2, 3]]
+        self.assertEqual(["a", "bcd", "", "ef", "ghi"], result)
+        self.assertEqual(1, queue.available())
+        queue.append("kl")
+        with self.assertRaises(TextNotAvailable):
+            queue.read(4)
+        self.assertEqual("jk", queue.read(2))
+        queue.close()
+        self.assertEqual("l", queue.read(4))
+        self.assertEqual("", queue.read(4))
+        self.assertEqual(0, queue.available())
@@ -1,8 +1,10 @@
+import subprocess
+import sys
 import unittest
 
 import regex as re
 
-from choppa.utils import remove_block_quotes, finitize, translate_java_regex
+from choppa.utils import LazyPattern, remove_block_quotes, finitize, translate_java_regex
 
 
 class UtilsTest(unittest.TestCase):
@@ -57,3 +59,15 @@ class TranslateJavaRegexTest(unittest.TestCase):
         for code in java_v:
             self.assertTrue(vertical.fullmatch(chr(code)), hex(code))
             self.assertFalse(horizontal.fullmatch(chr(code)), hex(code))
+
+    def test_lazy_pattern(self) -> None:
+        pattern: LazyPattern = LazyPattern(r"a+", re.I)
+        self.assertIsNone(pattern.compiled)
+        self.assertEqual("AA", pattern.match("AAb").group())
+        self.assertIsNotNone(pattern.compiled)
+
+    def test_import_is_lazy(self) -> None:
+        # Validation and thread pool modules are only imported when used.
+        code: str = "import sys, choppa; print(sorted({'xmlschema', 'concurrent.futures', 'tempfile'} & set(sys.modules)))"
+        result = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+        self.assertEqual("[]", result.stdout.strip())